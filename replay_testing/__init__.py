@@ -13,15 +13,29 @@
 # limitations under the License.
 #
 
+from .columnar import export_topic, load_topic_table
 from .decorators.analyze import analyze
 from .decorators.fixtures import fixtures
 from .decorators.run import run
 from .fixtures import BaseFixture, LocalFixture, NexusFixture, S3Fixture
+from .join import JoinedMessage, join_latencies, join_messages, merge_messages
 from .junit_to_xml import unittest_results_to_xml
 from .logging_config import get_logger
-from .models import ReplayRunParams, RunnerArgs
-from .reader import get_sequential_mcap_reader, read_messages
+from .message_store import MessageStore
+from .message_views import image_to_array, laserscan_to_arrays, pointcloud2_to_array
+from .models import (
+    Downsample,
+    FilterOptions,
+    ReadinessConditions,
+    ReplayRunParams,
+    RunnerArgs,
+    TimeWindow,
+    TopicRequirement,
+)
+from .reader import get_sequential_mcap_reader, read_columns, read_messages, read_serialized_messages
 from .replay_runner import ReplayTestingRunner
+from .run_stats import RunStatistics, TopicStatistics, read_run_stats
+from .topic_summary import read_fixture_summary
 
 # Alias for backward compatibility. Should be removed in future versions.
 McapFixture = LocalFixture
@@ -33,8 +47,29 @@ __all__ = [
     'ReplayTestingRunner',
     'get_sequential_mcap_reader',
     'read_messages',
+    'read_columns',
+    'read_serialized_messages',
+    'pointcloud2_to_array',
+    'image_to_array',
+    'laserscan_to_arrays',
+    'export_topic',
+    'load_topic_table',
+    'MessageStore',
+    'merge_messages',
+    'join_messages',
+    'join_latencies',
+    'JoinedMessage',
     'ReplayRunParams',
     'RunnerArgs',
+    'ReadinessConditions',
+    'FilterOptions',
+    'Downsample',
+    'TimeWindow',
+    'TopicRequirement',
+    'read_fixture_summary',
+    'read_run_stats',
+    'RunStatistics',
+    'TopicStatistics',
     'unittest_results_to_xml',
     'get_logger',
     'BaseFixture',
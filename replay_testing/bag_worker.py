@@ -0,0 +1,302 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Bag playback and recording with rosbag2_py in long-lived helper processes.
+
+`ros2 bag play` and `ros2 bag record` subprocesses pay Python interpreter startup and rosbag2 plugin loading
+on every run. A helper process pays them once and then plays or records one bag after another.
+"""
+
+import asyncio
+import datetime
+import multiprocessing
+import os
+import signal
+import threading
+from pathlib import Path
+from typing import Any
+
+from launch.actions import OpaqueFunction, RegisterEventHandler
+from launch.event_handlers import OnShutdown
+from launch.events import Shutdown
+
+from .logging_config import get_logger
+
+_logger_ = get_logger()
+
+
+class BagWorkerError(RuntimeError):
+    pass
+
+
+def _set_options(options, values: dict[str, Any]):
+    """Set the fields of rosbag2_py options that exist in the installed ROS distribution."""
+    for name, value in values.items():
+        if hasattr(options, name):
+            setattr(options, name, value)
+        else:
+            _logger_.debug(f'{type(options).__name__} has no field {name}, ignoring it')
+    return options
+
+
+def _play_options(rosbag2_py, values: dict[str, Any]):
+    values = dict(values)
+    qos_overrides_path = values.pop('qos_overrides_path', None)
+    if qos_overrides_path is not None:
+        import yaml
+        from ros2bag.api import convert_yaml_to_qos_profile
+
+        with Path(qos_overrides_path).open() as f:
+            values['topic_qos_profile_overrides'] = convert_yaml_to_qos_profile(yaml.safe_load(f))
+    # The player runs without a terminal
+    values.setdefault('disable_keyboard_controls', True)
+    return _set_options(rosbag2_py.PlayOptions(), values)
+
+
+def _record_options(rosbag2_py):
+    options = rosbag2_py.RecordOptions()
+    # `all` was split into `all_topics` and `all_services` in Jazzy
+    return _set_options(
+        options,
+        {
+            'all_topics' if hasattr(options, 'all_topics') else 'all': True,
+            'rmw_serialization_format': 'cdr',
+            'topic_polling_interval': datetime.timedelta(milliseconds=100),
+        },
+    )
+
+
+def _set_environment(environment: dict[str, str]):
+    # The environment of the runner when the request was made, e.g. the ROS domain of the run
+    os.environ.clear()
+    os.environ.update(environment)
+
+
+def _serve(connection, runner_connection):
+    """Main loop of a helper process, playing or recording one bag per request."""
+    # The forked copy of the runner's end would keep the helper from seeing the runner close it
+    runner_connection.close()
+    # Runs are stopped through requests, not by the Ctrl-C of the launch service
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import rosbag2_py
+
+    recorder = None
+    record_thread = None
+    record_errors: list[BaseException] = []
+
+    def record(storage_options, record_options):
+        try:
+            recorder.record(storage_options, record_options)
+        except BaseException as e:
+            # Reported to the runner when recording stops
+            record_errors.append(e)
+
+    while True:
+        try:
+            command, *args = connection.recv()
+        except EOFError:
+            break
+        try:
+            if command == 'play':
+                environment, uri, play_options = args
+                _set_environment(environment)
+                rosbag2_py.Player().play(
+                    rosbag2_py.StorageOptions(uri=uri, storage_id='mcap'), _play_options(rosbag2_py, play_options)
+                )
+                connection.send(('done', None))
+            elif command == 'record':
+                environment, uri = args
+                _set_environment(environment)
+                record_errors.clear()
+                recorder = rosbag2_py.Recorder()
+                record_thread = threading.Thread(
+                    target=record,
+                    args=(rosbag2_py.StorageOptions(uri=uri, storage_id='mcap'), _record_options(rosbag2_py)),
+                    daemon=True,
+                )
+                record_thread.start()
+                connection.send(('done', None))
+            elif command == 'stop':
+                if record_thread is not None:
+                    if hasattr(recorder, 'cancel'):
+                        recorder.cancel()
+                    else:
+                        # Without Recorder.cancel, the recorder stops on the SIGINT handler of its rclcpp context
+                        signal.raise_signal(signal.SIGINT)
+                    record_thread.join()
+                    record_thread = None
+                    recorder = None
+                if record_errors:
+                    raise record_errors[0]
+                connection.send(('done', None))
+            else:
+                raise ValueError(f'Unknown bag worker command: {command}')
+        except Exception as e:
+            connection.send(('error', f'{type(e).__name__}: {e}'))
+
+
+class BagWorker:
+    """A helper process that plays or records bags with rosbag2_py, started on first use and then reused."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._process = None
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self._process is None or not self._process.is_alive():
+            # Fork rather than spawn, so the helper starts without importing this package again
+            context = multiprocessing.get_context('fork')
+            self._connection, child_connection = context.Pipe()
+            self._process = context.Process(
+                target=_serve, args=(child_connection, self._connection), name=self.name, daemon=True
+            )
+            self._process.start()
+            child_connection.close()
+
+    def start(self):
+        """Start the helper process unless it is running. Requests start it too, if it is not started before."""
+        with self._lock:
+            self._start()
+
+    def _request(self, *message) -> None:
+        with self._lock:
+            self._start()
+            connection = self._connection
+
+        connection.send(message)
+        try:
+            status, error = connection.recv()
+        except (EOFError, OSError) as e:
+            raise BagWorkerError(f'Bag {self.name} exited during {message[0]}') from e
+        if status == 'error':
+            raise BagWorkerError(f'Bag {self.name} failed to {message[0]}: {error}')
+
+    def play(self, uri: Path, play_options: dict[str, Any]):
+        """Play a bag, returning once playback finished.
+
+        Args:
+            uri: Path to the MCAP file to play
+            play_options: Fields of `rosbag2_py.PlayOptions`, plus 'qos_overrides_path' to a QoS overrides YAML
+        """
+        self._request('play', dict(os.environ), str(uri), play_options)
+
+    def start_recording(self, uri: Path):
+        """Start recording all topics to a bag, in the background until `stop_recording`."""
+        self._request('record', dict(os.environ), str(uri))
+
+    def stop_recording(self):
+        """Stop recording and close the bag."""
+        self._request('stop')
+
+    def terminate(self):
+        """Stop the helper process, e.g. to abort playback. The next request starts a new one."""
+        with self._lock:
+            if self._process is not None:
+                self._process.terminate()
+                self._process.join()
+                self._connection.close()
+            self._process = None
+            self._connection = None
+
+    def close(self):
+        with self._lock:
+            if self._process is not None:
+                self._connection.close()
+                self._process.join(timeout=5)
+                if self._process.is_alive():
+                    self._process.terminate()
+                    self._process.join()
+            self._process = None
+            self._connection = None
+
+
+class BagWorkers:
+    """A player and a recorder helper process, shared by the runs launched one after another from this process.
+
+    Helpers are only reused by runs launched in sequence. Runs launched concurrently, e.g. with `run_workers`
+    above 1, each run in a process of their own, which starts its own helpers.
+    """
+
+    def __init__(self):
+        self.player = BagWorker('bag_player')
+        self.recorder = BagWorker('bag_recorder')
+        self._used = False
+
+    def start(self):
+        """Start the helper processes if a launch description uses them, before it is launched.
+
+        Otherwise the first run starts them from a launch action, forking while the threads of launch run.
+        """
+        if self._used:
+            self.player.start()
+            self.recorder.start()
+
+    def close(self):
+        self.player.close()
+        self.recorder.close()
+
+    def launch_actions(
+        self,
+        filtered_path: Path,
+        run_path: Path,
+        play_options: dict[str, Any],
+        shutdown_on_playback_finish: bool = True,
+    ) -> list:
+        """Launch actions that record the run and play the filtered fixture with the helper processes.
+
+        Recording and playback start when the launch description is launched. Playback shuts down the launch
+        service when it finishes unless `shutdown_on_playback_finish` is False. Recording stops and the run
+        fixture is closed when the launch service shuts down.
+
+        Args:
+            filtered_path: Filtered fixture to play
+            run_path: Directory to record the run fixture to
+            play_options: Fields of `rosbag2_py.PlayOptions`, see `BagWorker.play`
+            shutdown_on_playback_finish: Shut down the launch service once playback finished
+        """
+        self._used = True
+        playback: dict[str, Any] = {'thread': None, 'stopping': False}
+
+        def play(context):
+            try:
+                self.player.play(filtered_path, play_options)
+                if not shutdown_on_playback_finish:
+                    return
+                reason = 'Playback finished'
+            except BagWorkerError as e:
+                if playback['stopping']:
+                    return
+                _logger_.error(str(e))
+                reason = 'Playback failed'
+            asyncio.run_coroutine_threadsafe(context.emit_event(Shutdown(reason=reason)), context.asyncio_loop)
+
+        def start(context):
+            self.recorder.start_recording(run_path)
+            playback['thread'] = threading.Thread(target=play, args=(context,), name='bag_playback', daemon=True)
+            playback['thread'].start()
+            return []
+
+        def stop(event, context):
+            playback['stopping'] = True
+            thread = playback['thread']
+            if thread is not None and thread.is_alive():
+                # Playback is still running, e.g. the nodes under test shut down first
+                self.player.terminate()
+                thread.join(timeout=5)
+            self.recorder.stop_recording()
+
+        return [OpaqueFunction(function=start), RegisterEventHandler(OnShutdown(on_shutdown=stop))]
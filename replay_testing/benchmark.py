@@ -0,0 +1,397 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Benchmarks for the fixture processing stages.
+
+Usage:
+    python3 -m replay_testing.benchmark filter INPUT_MCAP --exclude /topic [--exclude /other] [--repeat N]
+    python3 -m replay_testing.benchmark read INPUT_MCAP --topic /topic [--topic /other] [--repeat N]
+    python3 -m replay_testing.benchmark decode INPUT_MCAP --topic /topic [--repeat N]
+    python3 -m replay_testing.benchmark workers INPUT_MCAP --topic /topic [--workers N] [--batch-size N] [--repeat N]
+    python3 -m replay_testing.benchmark encoding INPUT_MCAP --exclude /topic [--setting lz4] [--setting zstd:19@4194304]
+        [--play-rate RATE]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import rosbag2_py
+from rclpy.serialization import deserialize_message
+
+from .cdr import CdrDecoder
+from .filter import filter_mcap, filter_mcap_rosbag2
+from .logging_config import get_logger
+from .mcap_io import read_summary
+from .models import FilterOptions
+from .reader import (
+    DEFAULT_DECODE_BATCH_SIZE,
+    get_message_type,
+    get_sequential_mcap_reader,
+    read_messages,
+    read_serialized_messages,
+)
+
+_logger_ = get_logger()
+
+
+def _time_filter(filter_fn: Callable, input: Path, output_topics: list[str], repeat: int) -> tuple[float, int]:
+    """Return the best wall time over `repeat` runs and the output size in bytes."""
+    best = float('inf')
+    size = 0
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            output = Path(scratch_dir) / 'filtered.mcap'
+            start = time.perf_counter()
+            filter_fn(input, output, output_topics)
+            best = min(best, time.perf_counter() - start)
+            size = output.stat().st_size
+    return best, size
+
+
+def benchmark_filter(input: Path, output_topics: list[str], repeat: int = 3) -> dict[str, dict[str, float]]:
+    """Compare ``filter_mcap`` against the rosbag2 deserialize/rewrite baseline.
+
+    Returns:
+        dict: Per-implementation seconds, throughput in MB/s and output size in bytes
+    """
+    input_size = Path(input).stat().st_size
+    results = {}
+    for name, filter_fn in (('rosbag2', filter_mcap_rosbag2), ('chunk_passthrough', filter_mcap)):
+        seconds, output_size = _time_filter(filter_fn, Path(input), output_topics, repeat)
+        results[name] = {
+            'seconds': seconds,
+            'throughput_mb_s': input_size / (1024 * 1024) / seconds if seconds > 0 else float('inf'),
+            'output_bytes': output_size,
+        }
+    return results
+
+
+def _read_topics(input: Path, topics: list[str], storage_filter: bool) -> int:
+    """Read the raw messages on `topics`, filtering in the storage layer or in Python. Returns the count."""
+    reader = get_sequential_mcap_reader(input)
+    topic_set = set(topics)
+    if storage_filter:
+        reader.set_filter(rosbag2_py.StorageFilter(topics=topics))
+    count = 0
+    while reader.has_next():
+        topic_name, _, _ = reader.read_next()
+        if topic_name in topic_set:
+            count += 1
+    return count
+
+
+def benchmark_read(input: Path, topics: list[str], repeat: int = 3) -> dict[str, dict[str, float]]:
+    """Compare reading a few topics with a rosbag2 StorageFilter against filtering every message in Python.
+
+    Returns:
+        dict: Per-method seconds, throughput in MB/s of the input file and number of messages read
+    """
+    input_size = Path(input).stat().st_size
+    results = {}
+    for name, storage_filter in (('python_filter', False), ('storage_filter', True)):
+        best = float('inf')
+        count = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = _read_topics(input, topics, storage_filter)
+            best = min(best, time.perf_counter() - start)
+        results[name] = {
+            'seconds': best,
+            'throughput_mb_s': input_size / (1024 * 1024) / best if best > 0 else float('inf'),
+            'messages': count,
+        }
+    return results
+
+
+def _schema_decoder(input: Path, topic: str) -> CdrDecoder:
+    """Create a CDR decoder for a topic from the message definition in the MCAP schema."""
+    with Path(input).open('rb') as stream:
+        summary = read_summary(stream)
+    if summary is None:
+        raise ValueError(f'{input} has no summary section to read the schema of {topic} from')
+    channel = next((channel for channel in summary.channels.values() if channel.topic == topic), None)
+    if channel is None:
+        raise ValueError(f'{topic} is not in {input}')
+    schema = summary.schemas[channel.schema_id]
+    return CdrDecoder.from_definition(schema.name, schema.data.decode('utf-8'))
+
+
+def benchmark_decode(input: Path, topic: str, repeat: int = 3) -> dict[str, dict[str, float]]:
+    """Compare decoding every message on a topic with rclpy's deserialize_message against the CDR decoder.
+
+    Messages are read into memory first, so only decoding is timed. The CDR decoder decodes all primitive
+    and string fields into columns, in batches of the whole topic.
+
+    Returns:
+        dict: Per-method seconds, messages per second and number of messages decoded
+    """
+    messages = [bytes(data) for _, data, _ in read_serialized_messages(get_sequential_mcap_reader(input), [topic])]
+    topic_types = {
+        topic_metadata.name: topic_metadata.type
+        for topic_metadata in get_sequential_mcap_reader(input).get_all_topics_and_types()
+    }
+    msg_type = get_message_type(topic_types[topic])
+    decoder = _schema_decoder(input, topic)
+
+    methods = {
+        'deserialize_message': lambda: [deserialize_message(data, msg_type) for data in messages],
+        'cdr_columns': lambda: decoder.decode_columns(messages),
+    }
+    results = {}
+    for name, decode in methods.items():
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            decode()
+            best = min(best, time.perf_counter() - start)
+        results[name] = {
+            'seconds': best,
+            'messages_per_s': len(messages) / best if best > 0 else float('inf'),
+            'messages': len(messages),
+        }
+    return results
+
+
+def benchmark_workers(
+    input: Path,
+    topics: list[str],
+    workers: int = 0,
+    batch_size: int = DEFAULT_DECODE_BATCH_SIZE,
+    repeat: int = 3,
+) -> dict[str, dict[str, float]]:
+    """Compare `read_messages` deserializing in this process against deserializing in a pool of `workers`.
+
+    Both read the topics from the file, so the times include reading. The pool is started and used once before
+    timing, as it is shared by all reads of a process.
+
+    Returns:
+        dict: Per-worker-count seconds, messages per second and number of messages read
+    """
+    workers = workers or os.cpu_count() or 1
+    for _ in read_messages(get_sequential_mcap_reader(input), topics, workers=workers, batch_size=batch_size):
+        pass
+
+    results = {}
+    for worker_count in sorted({1, workers}):
+        best = float('inf')
+        count = 0
+        for _ in range(repeat):
+            reader = get_sequential_mcap_reader(input)
+            start = time.perf_counter()
+            count = sum(1 for _ in read_messages(reader, topics, workers=worker_count, batch_size=batch_size))
+            best = min(best, time.perf_counter() - start)
+        results[f'workers={worker_count}'] = {
+            'seconds': best,
+            'messages_per_s': count / best if best > 0 else float('inf'),
+            'messages': count,
+        }
+    return results
+
+
+DEFAULT_ENCODING_SETTINGS = ['input', 'none', 'lz4', 'zstd']
+
+
+def parse_encoding_setting(setting: str) -> FilterOptions:
+    """Parse an encoding setting of the form ``COMPRESSION[:LEVEL][@CHUNK_SIZE]``.
+
+    ``input`` keeps the encoding of the input fixture, e.g. ``input@4194304`` only changes the chunk size.
+    """
+    setting, _, chunk_size = setting.partition('@')
+    compression, _, level = setting.partition(':')
+    return FilterOptions(
+        compression=None if compression == 'input' else compression,
+        compression_level=int(level) if level else None,
+        chunk_size=int(chunk_size) if chunk_size else None,
+    )
+
+
+def _read_cpu_seconds(path: Path) -> float:
+    """CPU time spent reading every message of an MCAP file through rosbag2, as `ros2 bag play` does."""
+    start = time.process_time()
+    reader = get_sequential_mcap_reader(path)
+    while reader.has_next():
+        reader.read_next()
+    return time.process_time() - start
+
+
+def _play_cpu_seconds(path: Path, rate: float) -> float:
+    """CPU time used by `ros2 bag play` to play an MCAP file at the given rate."""
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    subprocess.run(
+        ['ros2', 'bag', 'play', str(path), '-s', 'mcap', '-r', str(rate)],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+
+def benchmark_encoding(
+    input: Path,
+    output_topics: list[str],
+    settings: list[str],
+    repeat: int = 1,
+    play_rate: Optional[float] = None,
+) -> dict[str, dict[str, float]]:
+    """Compare filtered fixture encodings by filter throughput, output size and playback cost.
+
+    Args:
+        input: Path to the input mcap file
+        output_topics: Topics to filter out
+        settings: Encoding settings, see ``parse_encoding_setting``
+        repeat: Number of filter runs per setting, the best time is reported
+        play_rate: If set, also measure the CPU time of `ros2 bag play` at this rate
+
+    Returns:
+        dict: Per-setting filter seconds, throughput in MB/s, output size in bytes, CPU seconds to read the
+        output through rosbag2 and, with a play rate, CPU seconds of `ros2 bag play`
+    """
+    input_size = Path(input).stat().st_size
+    results = {}
+    for setting in settings:
+        options = parse_encoding_setting(setting)
+        best = float('inf')
+        with tempfile.TemporaryDirectory() as scratch_dir:
+            output = Path(scratch_dir) / 'filtered.mcap'
+            for _ in range(repeat):
+                output.unlink(missing_ok=True)
+                start = time.perf_counter()
+                filter_mcap(input, output, output_topics, options=options)
+                best = min(best, time.perf_counter() - start)
+
+            results[setting] = {
+                'seconds': best,
+                'throughput_mb_s': input_size / (1024 * 1024) / best if best > 0 else float('inf'),
+                'output_bytes': output.stat().st_size,
+                'read_cpu_s': _read_cpu_seconds(output),
+            }
+            if play_rate:
+                results[setting]['play_cpu_s'] = _play_cpu_seconds(output, play_rate)
+    return results
+
+
+def _log_results(title: str, results: dict[str, dict[str, float]]):
+    _logger_.info(title)
+    for name, result in results.items():
+        _logger_.info(
+            f'  {name:<20} {result["seconds"]:>9.3f} s  {result["throughput_mb_s"]:>9.1f} MB/s  '
+            f'{result["output_bytes"] / (1024 * 1024):>9.2f} MB'
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='replay_testing benchmarks.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    filter_parser = subparsers.add_parser('filter', help='Benchmark fixture filtering.')
+    filter_parser.add_argument('input', type=Path, help='Path to the input mcap file.')
+    filter_parser.add_argument(
+        '--exclude', action='append', default=[], help='Topic to filter out. May be given multiple times.'
+    )
+    filter_parser.add_argument('--repeat', type=int, default=3, help='Number of runs per implementation.')
+
+    read_parser = subparsers.add_parser('read', help='Benchmark reading a subset of topics.')
+    read_parser.add_argument('input', type=Path, help='Path to the input mcap file.')
+    read_parser.add_argument(
+        '--topic', action='append', required=True, help='Topic to read. May be given multiple times.'
+    )
+    read_parser.add_argument('--repeat', type=int, default=3, help='Number of runs per method.')
+
+    decode_parser = subparsers.add_parser('decode', help='Benchmark decoding the messages of a topic.')
+    decode_parser.add_argument('input', type=Path, help='Path to the input mcap file.')
+    decode_parser.add_argument('--topic', required=True, help='Topic to decode.')
+    decode_parser.add_argument('--repeat', type=int, default=3, help='Number of runs per method.')
+
+    workers_parser = subparsers.add_parser(
+        'workers', help='Benchmark deserializing messages in worker processes against a single process.'
+    )
+    workers_parser.add_argument('input', type=Path, help='Path to the input mcap file.')
+    workers_parser.add_argument(
+        '--topic', action='append', required=True, help='Topic to read. May be given multiple times.'
+    )
+    workers_parser.add_argument('--workers', type=int, default=0, help='Number of worker processes, 0 for one per CPU.')
+    workers_parser.add_argument(
+        '--batch-size', type=int, default=DEFAULT_DECODE_BATCH_SIZE, help='Number of messages per batch.'
+    )
+    workers_parser.add_argument('--repeat', type=int, default=3, help='Number of runs per worker count.')
+
+    encoding_parser = subparsers.add_parser('encoding', help='Benchmark filtered fixture compression and chunking.')
+    encoding_parser.add_argument('input', type=Path, help='Path to the input mcap file.')
+    encoding_parser.add_argument(
+        '--exclude', action='append', default=[], help='Topic to filter out. May be given multiple times.'
+    )
+    encoding_parser.add_argument(
+        '--setting',
+        action='append',
+        default=None,
+        help='Encoding as COMPRESSION[:LEVEL][@CHUNK_SIZE], e.g. lz4 or zstd:19@4194304. COMPRESSION is one of '
+        f'input, none, lz4 or zstd. May be given multiple times. Defaults to {DEFAULT_ENCODING_SETTINGS}.',
+    )
+    encoding_parser.add_argument('--repeat', type=int, default=1, help='Number of filter runs per setting.')
+    encoding_parser.add_argument(
+        '--play-rate', type=float, default=None, help='Also measure `ros2 bag play` CPU time at this playback rate.'
+    )
+
+    args = parser.parse_args()
+
+    if args.benchmark == 'filter':
+        results = benchmark_filter(args.input, args.exclude, args.repeat)
+        _log_results(f'Filtering {args.input} excluding {args.exclude}', results)
+    elif args.benchmark == 'read':
+        results = benchmark_read(args.input, args.topic, args.repeat)
+        _logger_.info(f'Reading {args.topic} from {args.input}')
+        for name, result in results.items():
+            _logger_.info(
+                f'  {name:<20} {result["seconds"]:>9.3f} s  {result["throughput_mb_s"]:>9.1f} MB/s  '
+                f'{result["messages"]:>9} messages'
+            )
+    elif args.benchmark == 'decode':
+        results = benchmark_decode(args.input, args.topic, args.repeat)
+        _logger_.info(f'Decoding {args.topic} from {args.input}')
+        for name, result in results.items():
+            _logger_.info(
+                f'  {name:<20} {result["seconds"]:>9.3f} s  {result["messages_per_s"]:>12.0f} messages/s  '
+                f'{result["messages"]:>9} messages'
+            )
+    elif args.benchmark == 'workers':
+        results = benchmark_workers(args.input, args.topic, args.workers, args.batch_size, args.repeat)
+        _logger_.info(f'Deserializing {args.topic} from {args.input}')
+        for name, result in results.items():
+            _logger_.info(
+                f'  {name:<20} {result["seconds"]:>9.3f} s  {result["messages_per_s"]:>12.0f} messages/s  '
+                f'{result["messages"]:>9} messages'
+            )
+        single, *parallel = results.values()
+        for result in parallel:
+            _logger_.info(f'  speedup {single["seconds"] / result["seconds"]:.2f}x over a single process')
+    elif args.benchmark == 'encoding':
+        results = benchmark_encoding(
+            args.input, args.exclude, args.setting or DEFAULT_ENCODING_SETTINGS, args.repeat, args.play_rate
+        )
+        _log_results(f'Encoding {args.input} excluding {args.exclude}', results)
+        for name, result in results.items():
+            play_cpu = f'  play {result["play_cpu_s"]:.3f} s CPU' if 'play_cpu_s' in result else ''
+            _logger_.info(f'  {name:<20} read {result["read_cpu_s"]:.3f} s CPU{play_cpu}')
+
+
+if __name__ == '__main__':
+    main()
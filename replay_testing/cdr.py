@@ -0,0 +1,442 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Pure Python/NumPy decoder for ROS 2 messages in little-endian CDR, the rosbag2 serialization format.
+
+Decoders are generated once per message type, either from the message definition stored in the MCAP schema
+(`CdrDecoder.from_definition`) or by introspecting the generated Python message class
+(`CdrDecoder.from_message_class`). Batches of messages sharing the same layout, which is every message of a
+topic for fixed-size types and all messages with equally long strings and sequences otherwise, are decoded
+into columns with a single `numpy.frombuffer` call, without creating a message object per message.
+"""
+
+import re
+import struct
+from types import SimpleNamespace
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Size of the encapsulation header in front of every serialized message
+ENCAPSULATION_SIZE = 4
+
+PRIMITIVE_TYPES = {
+    'bool': '?',
+    'boolean': '?',
+    'byte': 'u1',
+    'octet': 'u1',
+    'char': 'u1',
+    'int8': 'i1',
+    'uint8': 'u1',
+    'int16': '<i2',
+    'uint16': '<u2',
+    'int32': '<i4',
+    'uint32': '<u4',
+    'int64': '<i8',
+    'uint64': '<u8',
+    'float32': '<f4',
+    'float': '<f4',
+    'float64': '<f8',
+    'double': '<f8',
+}
+
+# Types converted to integer nanoseconds when requested as a column
+TIME_TYPES = ('builtin_interfaces/Time', 'builtin_interfaces/Duration')
+
+_U32 = struct.Struct('<I')
+_LENGTH_SUFFIX = '#len'
+
+
+class CdrError(ValueError):
+    """Raised when a message type or a serialized message cannot be decoded by the CDR decoder."""
+
+
+class Field(NamedTuple):
+    name: str
+    # Primitive type name, 'string', or a message type as 'package/Type'
+    type: str
+    # None for single values, the length of fixed size arrays, -1 for sequences
+    array: Optional[int] = None
+
+
+class _Leaf(NamedTuple):
+    offset: int
+    dtype: Optional[np.dtype]
+    shape: tuple
+
+
+def normalize_type_name(type_name: str) -> str:
+    """Normalize 'package/msg/Type' to 'package/Type'."""
+    parts = type_name.split('/')
+    if len(parts) == 3:
+        return f'{parts[0]}/{parts[2]}'
+    return type_name
+
+
+def _resolve_type(type_name: str, package: str) -> str:
+    if type_name in PRIMITIVE_TYPES or type_name in ('string', 'wstring'):
+        return type_name
+    if type_name == 'Header':
+        return 'std_msgs/Header'
+    if '/' not in type_name:
+        return f'{package}/{type_name}'
+    return normalize_type_name(type_name)
+
+
+_DEFINITION_FIELD = re.compile(r'(?P<type>[\w/]+)(?:<=\d+)?(?P<array>\[(?P<bounded><=)?(?P<size>\d*)\])?')
+
+
+def parse_definition(type_name: str, definition: str) -> dict[str, list[Field]]:
+    """Parse a ros2msg message definition, as stored in MCAP schemas, including its dependencies.
+
+    Returns:
+        dict[str, list[Field]]: Fields per message type, keyed by 'package/Type'
+    """
+    types = {}
+    for index, section in enumerate(re.split(r'^=+\s*$', definition, flags=re.MULTILINE)):
+        lines = section.strip().splitlines()
+        current = normalize_type_name(type_name)
+        if index > 0:
+            if not lines or not lines[0].startswith('MSG:'):
+                raise CdrError(f'Invalid message definition section for {type_name}')
+            current = normalize_type_name(lines[0][len('MSG:') :].strip())
+            lines = lines[1:]
+        package = current.split('/')[0]
+
+        fields = []
+        for line in lines:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            type_token, rest = line.split(None, 1)
+            if re.match(r'^\w+\s*=', rest):
+                # Constants are not serialized
+                continue
+            match = _DEFINITION_FIELD.fullmatch(type_token)
+            if match is None:
+                raise CdrError(f'Cannot parse field type {type_token!r} of {current}')
+            array = None
+            if match.group('array'):
+                array = -1 if match.group('bounded') or not match.group('size') else int(match.group('size'))
+            fields.append(Field(rest.split()[0], _resolve_type(match.group('type'), package), array))
+        types[current] = fields
+    return types
+
+
+def _parse_class_field_type(type_string: str) -> tuple[str, Optional[int]]:
+    match = re.fullmatch(r'sequence<(.+?)(?:,\s*\d+)?>', type_string)
+    if match:
+        base, array = match.group(1), -1
+    else:
+        match = re.fullmatch(r'(.+)\[(\d+)\]', type_string)
+        base, array = (match.group(1), int(match.group(2))) if match else (type_string, None)
+    return re.sub(r'<=?\d+>?$', '', base), array
+
+
+def _class_type_name(msg_class) -> str:
+    return f'{msg_class.__module__.split(".")[0]}/{msg_class.__name__}'
+
+
+def _fields_from_class(msg_class, types: dict[str, list[Field]]):
+    from rosidl_runtime_py.utilities import get_message
+
+    type_name = _class_type_name(msg_class)
+    if type_name in types:
+        return
+    fields = []
+    types[type_name] = fields
+    for field_name, type_string in msg_class.get_fields_and_field_types().items():
+        base, array = _parse_class_field_type(type_string)
+        field = Field(field_name, _resolve_type(base, type_name.split('/')[0]), array)
+        if field.type not in PRIMITIVE_TYPES and field.type not in ('string', 'wstring'):
+            package, name = field.type.split('/')
+            _fields_from_class(get_message(f'{package}/msg/{name}'), types)
+        fields.append(field)
+
+
+def _align(pos: int, size: int) -> int:
+    return pos + (-pos % size)
+
+
+def _set_path(root: SimpleNamespace, path: str, value):
+    *parents, name = path.split('.')
+    node = root
+    for parent in parents:
+        child = getattr(node, parent, None)
+        if child is None:
+            child = SimpleNamespace()
+            setattr(node, parent, child)
+        node = child
+    setattr(node, name, value)
+
+
+class CdrDecoder:
+    """Decoder for serialized messages of one ROS 2 message type."""
+
+    def __init__(self, type_name: str, types: dict[str, list[Field]]):
+        self.type_name = normalize_type_name(type_name)
+        self._types = types
+        self._dtypes: dict[tuple, np.dtype] = {}
+        # Whether messages contain arrays of strings or messages, whose layout can't be checked with NumPy
+        self._has_objects = False
+        self._check_type(self.type_name)
+
+    @classmethod
+    def from_definition(cls, type_name: str, definition: str) -> 'CdrDecoder':
+        """Create a decoder from a ros2msg definition, e.g. the data of an MCAP schema."""
+        return cls(type_name, parse_definition(type_name, definition))
+
+    @classmethod
+    def from_message_class(cls, msg_class) -> 'CdrDecoder':
+        """Create a decoder by introspecting a generated message class, e.g. from `get_message`."""
+        types: dict[str, list[Field]] = {}
+        _fields_from_class(msg_class, types)
+        return cls(_class_type_name(msg_class), types)
+
+    def _check_type(self, type_name: str):
+        if type_name not in self._types:
+            raise CdrError(f'No definition for message type {type_name}')
+        for field in self._types[type_name]:
+            if field.type == 'wstring':
+                raise CdrError(f'wstring fields are not supported: {type_name}.{field.name}')
+            if field.array is not None and field.type not in PRIMITIVE_TYPES:
+                self._has_objects = True
+            if field.type not in PRIMITIVE_TYPES and field.type != 'string':
+                self._check_type(field.type)
+
+    def _walk(self, buf, pos: int, type_name: str, path: str, leaves: dict, objects: dict) -> int:
+        """Walk a serialized message, recording where its primitive fields are. Positions exclude the header.
+
+        Primitives, fixed size arrays and sequences of primitives, and strings become leaves that can be read
+        with NumPy. Arrays of strings or messages are decoded into Python lists of `objects`.
+        """
+        for field in self._types[type_name]:
+            field_path = f'{path}{field.name}'
+            if field.type in PRIMITIVE_TYPES:
+                dtype = np.dtype(PRIMITIVE_TYPES[field.type])
+                count = 1 if field.array is None else field.array
+                if field.array == -1:
+                    pos = _align(pos, 4)
+                    leaves[field_path + _LENGTH_SUFFIX] = _Leaf(pos + ENCAPSULATION_SIZE, np.dtype('<u4'), ())
+                    (count,) = _U32.unpack_from(buf, pos + ENCAPSULATION_SIZE)
+                    pos += 4
+                # Like Fast CDR, empty arrays are not aligned
+                if count:
+                    pos = _align(pos, dtype.itemsize)
+                leaves[field_path] = _Leaf(pos + ENCAPSULATION_SIZE, dtype, () if field.array is None else (count,))
+                pos += dtype.itemsize * count
+            elif field.array is None and field.type == 'string':
+                pos = _align(pos, 4)
+                leaves[field_path + _LENGTH_SUFFIX] = _Leaf(pos + ENCAPSULATION_SIZE, np.dtype('<u4'), ())
+                (length,) = _U32.unpack_from(buf, pos + ENCAPSULATION_SIZE)
+                # The serialized length includes the NUL terminator, which NumPy strips from bytes values
+                dtype = np.dtype(f'S{length}') if length else None
+                leaves[field_path] = _Leaf(pos + ENCAPSULATION_SIZE + 4, dtype, ())
+                pos += 4 + length
+            elif field.array is None:
+                pos = self._walk(buf, pos, field.type, f'{field_path}.', leaves, objects)
+            else:
+                count = field.array
+                if count == -1:
+                    pos = _align(pos, 4)
+                    (count,) = _U32.unpack_from(buf, pos + ENCAPSULATION_SIZE)
+                    pos += 4
+                elements = []
+                for _ in range(count):
+                    if field.type == 'string':
+                        pos = _align(pos, 4)
+                        (length,) = _U32.unpack_from(buf, pos + ENCAPSULATION_SIZE)
+                        start = pos + ENCAPSULATION_SIZE + 4
+                        elements.append(bytes(buf[start : start + max(length - 1, 0)]).decode('utf-8'))
+                        pos += 4 + length
+                    else:
+                        element_leaves, element_objects = {}, {}
+                        pos = self._walk(buf, pos, field.type, '', element_leaves, element_objects)
+                        elements.append(_build(buf, element_leaves, element_objects))
+                objects[field_path] = elements
+        return pos
+
+    def _layout(self, buf) -> tuple[dict[str, _Leaf], dict[str, list]]:
+        if len(buf) < ENCAPSULATION_SIZE:
+            raise CdrError('Serialized message is shorter than the CDR encapsulation header')
+        if buf[1] != 1:
+            raise CdrError(f'Only little-endian CDR is supported, got encapsulation kind {buf[1]}')
+        leaves, objects = {}, {}
+        try:
+            end = self._walk(buf, 0, self.type_name, '', leaves, objects)
+        except struct.error as e:
+            raise CdrError(f'Serialized message is too short for {self.type_name}: {e}') from e
+        if end + ENCAPSULATION_SIZE > len(buf):
+            raise CdrError(f'Serialized message is too short for {self.type_name}')
+        return leaves, objects
+
+    def decode(self, data) -> SimpleNamespace:
+        """Decode a single message into nested namespaces with the attributes of the ROS message.
+
+        Arrays and sequences of primitives are NumPy views over `data` rather than copies.
+        """
+        leaves, objects = self._layout(data)
+        return _build(data, leaves, objects)
+
+    def fields(self, data) -> list[str]:
+        """Dotted paths of the fields of a message that `decode_columns` can return."""
+        leaves, _ = self._layout(data)
+        return [path for path in leaves if not path.endswith(_LENGTH_SUFFIX)]
+
+    def _column_leaves(self, columns: list[str], leaves: dict[str, _Leaf]) -> list[str]:
+        paths = []
+        for column in columns:
+            if column in leaves and not column.endswith(_LENGTH_SUFFIX):
+                paths.append(column)
+            elif self.field_type(column) in TIME_TYPES:
+                paths.extend((f'{column}.sec', f'{column}.nanosec'))
+            else:
+                raise CdrError(f'{column} is not a primitive, string or primitive sequence field of {self.type_name}')
+        return paths
+
+    def supports_column(self, path: str) -> bool:
+        """Whether `decode_columns` can decode the field at a dotted path."""
+        field_type = self.field_type(path)
+        if field_type is None:
+            return False
+        return (
+            field_type in TIME_TYPES
+            or field_type in ('string', *PRIMITIVE_TYPES)
+            or (field_type.endswith('[]') and field_type[:-2] in PRIMITIVE_TYPES)
+        )
+
+    def field_type(self, path: str) -> Optional[str]:
+        """Type of the field at a dotted path, or None if there is no such field."""
+        type_name = self.type_name
+        for name in path.split('.'):
+            field = next((field for field in self._types.get(type_name, []) if field.name == name), None)
+            if field is None:
+                return None
+            type_name = field.type if field.array is None else f'{field.type}[]'
+        return type_name
+
+    def _dtype(self, leaves: dict[str, _Leaf], paths: list[str], size: int) -> np.dtype:
+        key = (size, *((path, leaves[path]) for path in paths))
+        dtype = self._dtypes.get(key)
+        if dtype is None:
+            # Leaves without data, i.e. empty strings, are filled in afterwards
+            paths = [path for path in paths if leaves[path].dtype is not None]
+            dtype = np.dtype({
+                'names': paths,
+                'formats': [
+                    leaves[path].dtype if not leaves[path].shape else (leaves[path].dtype, leaves[path].shape)
+                    for path in paths
+                ],
+                'offsets': [leaves[path].offset for path in paths],
+                'itemsize': size,
+            })
+            self._dtypes[key] = dtype
+        return dtype
+
+    def decode_columns(self, messages: Sequence, columns: Optional[list[str]] = None) -> dict[str, np.ndarray]:
+        """Decode a batch of serialized messages into one NumPy array per field.
+
+        Messages are grouped by layout, and each group is decoded with a single `numpy.frombuffer` call.
+        Time and Duration fields are converted to integer nanoseconds and strings to NumPy unicode arrays.
+
+        Args:
+            messages: Serialized messages, e.g. the data returned by `SequentialReader.read_next`
+            columns: Dotted paths of the fields to decode, all primitive and string fields if None
+
+        Returns:
+            dict[str, np.ndarray]: One array per requested field, in the order of `messages`
+        """
+        if not messages:
+            return {column: np.empty(0) for column in columns or []}
+
+        groups = []
+        pending = list(range(len(messages)))
+        while pending:
+            first = messages[pending[0]]
+            leaves, _ = self._layout(first)
+            if columns is None:
+                columns = [path for path in leaves if not path.endswith(_LENGTH_SUFFIX)]
+            paths = self._column_leaves(columns, leaves)
+            length_paths = [path for path in leaves if path.endswith(_LENGTH_SUFFIX)]
+            size = len(first)
+
+            same_size = [index for index in pending if len(messages[index]) == size]
+            dtype = self._dtype(leaves, [*paths, *length_paths], size)
+            values = np.frombuffer(b''.join(bytes(messages[index]) for index in same_size), dtype=dtype)
+            # Strings and sequences of the same total size may still be split differently, or the
+            # encapsulation may differ, so check every length against the first message
+            matches = (
+                np.frombuffer(b''.join(bytes(messages[index][:2]) for index in same_size), dtype='<u2')
+                == (struct.unpack_from('<H', first)[0])
+            )
+            for path in length_paths:
+                matches &= values[path] == values[path][0]
+            if self._has_objects:
+                matches &= np.array([self._layout(messages[index])[0] == leaves for index in same_size])
+
+            matched = np.asarray(same_size)[matches]
+            groups.append((matched, leaves, values[matches]))
+            matched_set = set(matched.tolist())
+            pending = [index for index in pending if index not in matched_set]
+
+        return {column: self._column(column, groups, len(messages)) for column in columns}
+
+    def _column(self, column: str, groups: list, count: int) -> np.ndarray:
+        if self.field_type(column) in TIME_TYPES:
+            sec = self._column(f'{column}.sec', groups, count).astype(np.int64)
+            return sec * 1_000_000_000 + self._column(f'{column}.nanosec', groups, count)
+
+        parts = []
+        for indexes, leaves, values in groups:
+            leaf = leaves[column]
+            if leaf.dtype is None:
+                parts.append((indexes, np.full(len(indexes), b'', dtype='S1')))
+            else:
+                parts.append((indexes, values[column]))
+
+        shapes = {part.shape[1:] for _, part in parts}
+        if len(shapes) == 1:
+            result = np.empty((count, *shapes.pop()), dtype=np.result_type(*(part.dtype for _, part in parts)))
+            for indexes, part in parts:
+                result[indexes] = part
+        else:
+            # Sequences of different lengths can't form a regular array
+            result = np.empty(count, dtype=object)
+            for indexes, part in parts:
+                for index, row in zip(indexes, part):
+                    result[index] = row
+
+        if result.dtype.kind == 'S':
+            return np.char.decode(result, 'utf-8')
+        return result
+
+
+def _build(buf, leaves: dict[str, _Leaf], objects: dict[str, list]) -> SimpleNamespace:
+    msg = SimpleNamespace()
+    for path, leaf in leaves.items():
+        if path.endswith(_LENGTH_SUFFIX):
+            continue
+        if leaf.dtype is None:
+            value = ''
+        elif leaf.dtype.kind == 'S':
+            value = bytes(buf[leaf.offset : leaf.offset + leaf.dtype.itemsize - 1]).decode('utf-8')
+        elif leaf.shape:
+            value = np.frombuffer(buf, dtype=leaf.dtype, count=leaf.shape[0], offset=leaf.offset)
+        else:
+            value = np.frombuffer(buf, dtype=leaf.dtype, count=1, offset=leaf.offset)[0].item()
+        _set_path(msg, path, value)
+    for path, value in objects.items():
+        _set_path(msg, path, value)
+    return msg
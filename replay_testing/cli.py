@@ -103,6 +103,56 @@ def add_arguments(parser):
         help='Run ID of a previous run to only perform analysis on. Useful for re-analyzing a previous run while iterating on analyze logic.',
     )
 
+    parser.add_argument(
+        '--no-filter-cache',
+        action='store_true',
+        default=False,
+        help='Always filter input fixtures instead of reusing previously filtered fixtures from the cache.',
+    )
+
+    parser.add_argument(
+        '--stream-fixtures',
+        action='store_true',
+        default=False,
+        help='Filter remote fixtures while they are downloaded instead of after the download completes.',
+    )
+
+    parser.add_argument(
+        '--fixture-workers',
+        type=int,
+        default=1,
+        help='Number of fixtures to download, validate and filter concurrently. 0 uses one worker per CPU.',
+    )
+
+    parser.add_argument(
+        '--fixture-executor',
+        choices=['thread', 'process'],
+        default='thread',
+        help='Pool used to prepare fixtures when --fixture-workers is not 1. Processes also parallelize filtering.',
+    )
+
+    parser.add_argument(
+        '--run-workers',
+        type=int,
+        default=1,
+        help='Number of runs to launch concurrently, each in its own ROS domain. 0 uses one worker per CPU.',
+    )
+
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        default=False,
+        help='Prepare the next fixture and analyze the previous one while a fixture replays.',
+    )
+
+    parser.add_argument(
+        '--isolate-domain',
+        action='store_true',
+        default=False,
+        help='Launch runs in a ROS domain leased from all replay tests on this host instead of the current one. '
+        'Concurrent runs of --run-workers are always isolated.',
+    )
+
     parser.add_argument(
         '--junit-xml',
         action='store',
@@ -146,13 +196,25 @@ def run(parser, args):
 
     test_module = _load_python_file_as_module(args.package_name, args.replay_test_file.absolute())
 
-    runner = ReplayTestingRunner(test_module, run_id=args.analyze)
+    runner = ReplayTestingRunner(
+        test_module,
+        run_id=args.analyze,
+        use_filter_cache=not args.no_filter_cache,
+        stream_fixtures=args.stream_fixtures,
+        fixture_workers=args.fixture_workers,
+        fixture_executor=args.fixture_executor,
+        run_workers=args.run_workers,
+        isolate_domain=args.isolate_domain,
+    )
 
-    if not args.analyze:
+    if args.analyze:
+        exit_code, junit_xml_path = runner.analyze()
+    elif args.pipeline:
+        exit_code, junit_xml_path = runner.run_pipelined()
+    else:
         runner.filter_fixtures()
         runner.run()
-
-    exit_code, junit_xml_path = runner.analyze()
+        exit_code, junit_xml_path = runner.analyze()
 
     # Each individual test case should have its own xUnit report in the
     # corresponding /replay_testing directory.  However for systems like Gitlab
@@ -0,0 +1,187 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Arrow tables of run fixture topics, cached as Parquet next to the run fixture.
+
+Requires the optional `pyarrow` package.
+"""
+
+import re
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .cdr import CdrDecoder, CdrError
+from .logging_config import get_logger
+from .mcap_io import McapError, read_summary
+from .reader import DEFAULT_COLUMN_BATCH_SIZE, get_cdr_decoder, get_sequential_mcap_reader, read_serialized_messages
+
+_logger_ = get_logger()
+
+# Bump when the layout of cached tables changes, to invalidate existing caches
+COLUMNAR_CACHE_VERSION = '1'
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('Exporting topics to Arrow and Parquet requires pyarrow, e.g. `pip install pyarrow`') from e
+    return pyarrow
+
+
+def columns_dir(mcap_path: Path) -> Path:
+    """Directory the Parquet tables of a run fixture's topics are cached in, next to the run fixture."""
+    mcap_path = Path(mcap_path)
+    return mcap_path.parent / f'{mcap_path.stem}_columns'
+
+
+def _table_path(mcap_path: Path, topic: str) -> Path:
+    return columns_dir(mcap_path) / f'{re.sub(r"[^A-Za-z0-9_.-]", "_", topic.strip("/")) or "_"}.parquet'
+
+
+def _source_metadata(mcap_path: Path, topic: str) -> dict[bytes, bytes]:
+    stat = Path(mcap_path).stat()
+    return {
+        b'replay_testing.version': COLUMNAR_CACHE_VERSION.encode(),
+        b'replay_testing.topic': topic.encode(),
+        b'replay_testing.source_size': str(stat.st_size).encode(),
+        b'replay_testing.source_mtime_ns': str(stat.st_mtime_ns).encode(),
+    }
+
+
+def _topic_decoder(mcap_path: Path, topic: str) -> CdrDecoder:
+    """Create a decoder from the message definition in the MCAP schema, or from the installed message type."""
+    type_name = None
+    try:
+        with Path(mcap_path).open('rb') as stream:
+            summary = read_summary(stream)
+        if summary is not None:
+            channel = next((channel for channel in summary.channels.values() if channel.topic == topic), None)
+            schema = summary.schemas.get(channel.schema_id) if channel else None
+            if schema is not None:
+                type_name = schema.name
+                if schema.encoding == 'ros2msg' and schema.data:
+                    return CdrDecoder.from_definition(schema.name, bytes(schema.data).decode('utf-8'))
+    except (McapError, CdrError, UnicodeDecodeError) as e:
+        _logger_.debug(f'Cannot decode {topic} with its MCAP schema definition: {e}')
+
+    if type_name is None:
+        topic_types = {
+            topic_metadata.name: topic_metadata.type
+            for topic_metadata in get_sequential_mcap_reader(mcap_path).get_all_topics_and_types()
+        }
+        if topic not in topic_types:
+            raise ValueError(f'{topic} is not in {mcap_path}')
+        type_name = topic_types[topic]
+    decoder = get_cdr_decoder(type_name)
+    if decoder is None:
+        raise ValueError(f'Cannot decode {topic} ({type_name}) into columns')
+    return decoder
+
+
+def _to_arrow(column: np.ndarray):
+    pa = _pyarrow()
+    if column.dtype != object and column.ndim == 1:
+        return pa.array(column)
+
+    # Arrays and sequences become list columns, whether or not all messages have the same number of elements
+    rows = list(column) if column.dtype == object else column
+    lengths = np.fromiter((len(row) for row in rows), dtype=np.int32, count=len(rows))
+    offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+    if column.dtype == object:
+        values = np.concatenate(rows) if len(rows) else np.empty(0)
+    else:
+        values = column.reshape(-1)
+    return pa.ListArray.from_arrays(pa.array(offsets), pa.array(values))
+
+
+def export_topic(mcap_path: Path, topic: str, batch_size: int = DEFAULT_COLUMN_BATCH_SIZE):
+    """Flatten a topic of an MCAP file into an Arrow table and cache it as Parquet next to the file.
+
+    The table has a 'timestamp' column with the log time of every message, plus one column per primitive or
+    string field, named by its dotted path, e.g. 'header.stamp.sec' or 'twist.linear.x'. Arrays and sequences
+    of primitives become list columns. Arrays of strings or messages are left out.
+
+    Returns:
+        pyarrow.Table: The exported table
+    """
+    pa = _pyarrow()
+    decoder = _topic_decoder(mcap_path, topic)
+
+    batches = []
+    timestamps: list[int] = []
+    messages: list[bytes] = []
+
+    def flush():
+        columns = decoder.decode_columns(messages)
+        arrays = [pa.array(np.asarray(timestamps, dtype=np.int64))] + [_to_arrow(c) for c in columns.values()]
+        batches.append(pa.RecordBatch.from_arrays(arrays, names=['timestamp', *columns]))
+        timestamps.clear()
+        messages.clear()
+
+    for _, data, timestamp in read_serialized_messages(get_sequential_mcap_reader(mcap_path), [topic]):
+        messages.append(data)
+        timestamps.append(timestamp)
+        if len(messages) >= batch_size:
+            flush()
+    if messages:
+        flush()
+
+    if batches:
+        table = pa.Table.from_batches(batches)
+    else:
+        table = pa.table({'timestamp': pa.array([], type=pa.int64())})
+    table = table.replace_schema_metadata(_source_metadata(mcap_path, topic))
+
+    table_path = _table_path(mcap_path, topic)
+    table_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = table_path.with_name(f'.{table_path.name}.tmp')
+    pa.parquet.write_table(table, tmp_path, compression='zstd')
+    tmp_path.replace(table_path)
+    _logger_.info(f'Exported {topic} of {mcap_path} to {table_path}')
+    return table
+
+
+def load_topic_table(mcap_path: Path, topic: str, columns: Optional[list[str]] = None):
+    """Load a topic of an MCAP file as an Arrow table, from the Parquet cache if it is up to date.
+
+    The first call for a topic exports it with `export_topic`. Later calls, e.g. when iterating on analyze
+    logic with `--analyze <run_id>`, read the cached Parquet file instead of decoding the MCAP again.
+
+    Args:
+        mcap_path: Path to the MCAP file, e.g. a run fixture
+        topic: Topic to load
+        columns: Only load these columns, all columns if None
+
+    Returns:
+        pyarrow.Table: Table with a 'timestamp' column and one column per field, see `export_topic`
+    """
+    pa = _pyarrow()
+    table_path = _table_path(mcap_path, topic)
+    if table_path.exists():
+        try:
+            metadata = pa.parquet.read_schema(table_path).metadata or {}
+            if metadata == _source_metadata(mcap_path, topic):
+                return pa.parquet.read_table(table_path, columns=columns)
+            _logger_.info(f'Cached table {table_path} is out of date, exporting {topic} again')
+        except (OSError, pa.ArrowException) as e:
+            _logger_.warning(f'Failed to read cached table {table_path}, exporting {topic} again: {e}')
+
+    table = export_topic(mcap_path, topic)
+    return table.select(columns) if columns is not None else table
@@ -17,6 +17,34 @@ import unittest
 
 from ..models import ReplayTestingPhase
 
+TOPICS_ATTRIBUTE = 'replay_testing_topics'
+
+
+def declared_topics(cls) -> list[str]:
+    """Topics declared with `@analyze.topics` on an analyze class or on its test methods."""
+    topics = set(getattr(cls, TOPICS_ATTRIBUTE, []))
+    for name in dir(cls):
+        if name.startswith('test'):
+            topics.update(getattr(getattr(cls, name), TOPICS_ATTRIBUTE, []))
+    return sorted(topics)
+
+
+def topics(*topic_names: str):
+    """Declare the topics an analyze class or one of its test methods reads.
+
+    The runner reads the topics declared by the class and all test methods from the run fixture in a single
+    pass before the tests run, and `self.messages()` iterates over the declared topics of the running test.
+    Topics declared on a test method replace those declared on the class.
+    """
+    if not all(isinstance(topic, str) for topic in topic_names):
+        raise TypeError('Topics must be strings')
+
+    def decorator(target):
+        setattr(target, TOPICS_ATTRIBUTE, list(topic_names))
+        return target
+
+    return decorator
+
 
 def analyze(cls):
     # Create a wrapper class that inherits from unittest.TestCase
@@ -33,3 +61,6 @@ def analyze(cls):
     WrappedAnalyze.__annotations__['suite_name'] = cls.__name__
 
     return WrappedAnalyze
+
+
+analyze.topics = topics
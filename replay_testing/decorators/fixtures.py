@@ -13,9 +13,11 @@
 # limitations under the License.
 #
 
+from typing import Optional
+
 from ..fixtures import BaseFixture
 from ..logging_config import get_logger
-from ..models import Mcap, ReplayTestingPhase
+from ..models import FilterOptions, Mcap, ReplayTestingPhase, TimeWindow, TopicRequirement
 
 _logger_ = get_logger()
 
@@ -26,6 +28,7 @@ class fixtures:
     def __init__(self, *args, **kwargs):
         # If args/kwargs are provided, treat them as parameters
         self.fixture_list = kwargs.get('fixture_list', None)
+        self.time_window = kwargs.get('time_window', None)
 
     def validate_class_variable(self, cls, prop: str, deprecated_variable: str):
         if hasattr(cls, deprecated_variable):
@@ -41,14 +44,47 @@ class fixtures:
         if not all(isinstance(topic, str) for topic in getattr(cls, prop)):
             raise TypeError(f"Class {cls.__name} '{prop}' attribute must be a list of strings.")
 
+    def validate_topic_requirements(self, cls):
+        if not hasattr(cls, 'input_topic_requirements'):
+            return
+
+        requirements = cls.input_topic_requirements
+        if not isinstance(requirements, dict) or not all(
+            isinstance(requirement, TopicRequirement) for requirement in requirements.values()
+        ):
+            raise TypeError(
+                f"Class {cls.__name__} 'input_topic_requirements' attribute must map topics to TopicRequirement."
+            )
+
+        required_input_topics = getattr(cls, 'required_input_topics', getattr(cls, 'input_topics', []))
+        unknown_topics = set(requirements) - set(required_input_topics)
+        if unknown_topics:
+            raise TypeError(
+                f"Class {cls.__name__} 'input_topic_requirements' has topics that are not required input topics: "
+                f'{sorted(unknown_topics)}'
+            )
+
     def __call__(self, cls):
         self.validate_class_variable(cls, 'required_input_topics', 'input_topics')
         self.validate_class_variable(cls, 'expected_output_topics', 'output_topics')
+        self.validate_topic_requirements(cls)
+
+        if hasattr(cls, 'filter_options') and not isinstance(cls.filter_options, FilterOptions):
+            raise TypeError(f"Class {cls.__name__} 'filter_options' attribute must be a FilterOptions.")
 
         cls.fixture_list = self.fixture_list
+        if self.time_window is not None:
+            # Without a window of its own, the decorator keeps the one the class may define
+            cls.time_window = self.time_window
         cls.__annotations__['replay_testing_phase'] = ReplayTestingPhase.FIXTURES
         return cls
 
     @staticmethod
-    def parameterize(fixture_list: list[Mcap | BaseFixture]):
-        return fixtures(fixture_list=fixture_list)
+    def parameterize(fixture_list: list[Mcap | BaseFixture], time_window: Optional[TimeWindow] = None):
+        """Set the fixtures to replay.
+
+        Args:
+            fixture_list: Fixtures to replay
+            time_window: Default window to trim every fixture to. A fixture's own `time_window` takes priority.
+        """
+        return fixtures(fixture_list=fixture_list, time_window=time_window)
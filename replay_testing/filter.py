@@ -13,18 +13,487 @@
 # limitations under the License.
 #
 
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Hashable, Optional
+
 import rosbag2_py
 
+from .logging_config import get_logger
+from .mcap_io import (
+    MCAP_MAGIC,
+    Channel,
+    Chunk,
+    ChunkIndex,
+    McapError,
+    McapSummary,
+    McapWriter,
+    Opcode,
+    Schema,
+    compression_available,
+    decompress,
+    iter_records,
+    parse_attachment,
+    parse_channel,
+    parse_chunk,
+    parse_header,
+    parse_metadata,
+    parse_schema,
+    read_record,
+    read_summary,
+    record,
+)
+from .models import Downsample, FilterOptions, TimeWindow
+from .utils import find_mcap_files, link_or_copy
+
+_logger_ = get_logger()
 
-def filter_mcap(input, output, output_topics):
+
+def filter_mcap(
+    input,
+    output,
+    output_topics,
+    time_window: Optional[TimeWindow] = None,
+    options: Optional[FilterOptions] = None,
+) -> Path:
     """Filter out specified topics from an mcap file.
 
+    Works on MCAP records rather than deserialized messages: chunks that only contain kept topics are copied
+    as raw compressed bytes, chunks that only contain excluded topics are skipped without being read, and
+    only chunks mixing both are decompressed and rewritten. If none of the topics to exclude are present,
+    the input file is linked to the output as-is.
+
+    With a time window, the chunk index is used to seek straight to the chunks overlapping the window.
+    Chunks entirely inside it are copied as-is, and only the chunks on its boundaries are rewritten.
+
+    Topics downsampled by the filter options are thinned out in the same pass, so chunks containing them
+    are rewritten. Filter options that change the compression or chunk size of the output disable chunk
+    copying, and every kept chunk is re-encoded.
+
+    Files without a summary section, or whose summary section lacks the channels of some chunks, are filtered
+    sequentially like ``filter_mcap_stream``. Files that cannot be processed at the record level at all are
+    filtered through rosbag2.
+
+    Args:
+        input: Path to input mcap file
+        output: Path to output mcap file
+        output_topics: List of topic names to exclude from the output
+        time_window: Optional window of messages to keep, by log time
+        options: Optional downsampling, compression and chunking of the output
+
+    Returns:
+        Path to the output mcap file
+    """
+    input_path = Path(input)
+    output_path = Path(output)
+    topics_to_exclude = set(output_topics)
+
+    try:
+        with input_path.open('rb') as input_stream:
+            summary = read_summary(input_stream)
+            if summary is None or not summary.chunk_indexes:
+                if time_window is not None and not time_window.absolute:
+                    raise McapError('Relative time windows require a chunk index')
+                _logger_.debug(f'No chunk index in {input_path}, filtering sequentially')
+                input_stream.seek(0)
+                message_filter = _MessageFilter(
+                    topics_to_exclude, time_window.resolve() if time_window else None, options
+                )
+                with output_path.open('wb') as output_stream:
+                    _filter_sequential(input_stream, output_stream, message_filter, options)
+                return output_path
+
+            start_time = min(index.message_start_time for index in summary.chunk_indexes)
+            end_time = max(index.message_end_time for index in summary.chunk_indexes)
+            window = time_window.resolve(start_time) if time_window is not None else None
+            if window is not None and window[0] <= start_time and end_time <= window[1]:
+                window = None
+
+            message_filter = _MessageFilter(topics_to_exclude, window, options)
+            if not _summary_has_all_channels(summary):
+                _logger_.debug(f'Summary of {input_path} lacks channels of its chunks, filtering sequentially')
+                input_stream.seek(0)
+                with output_path.open('wb') as output_stream:
+                    _filter_sequential(input_stream, output_stream, message_filter, options)
+                return output_path
+
+            for channel in summary.channels.values():
+                message_filter.add_channel(channel)
+            if not message_filter.changes_messages and (options is None or not options.reencodes):
+                _logger_.debug(f'No topics to exclude in {input_path}, reusing input fixture')
+                link_or_copy(input_path, output_path)
+                return output_path
+
+            with output_path.open('wb') as output_stream:
+                _filter_indexed(input_stream, output_stream, summary, message_filter, options)
+    except McapError as e:
+        _logger_.info(f'Falling back to rosbag2 filtering for {input_path}: {e}')
+        output_path.unlink(missing_ok=True)
+        filter_mcap_rosbag2(input_path, output_path, output_topics, time_window, options)
+
+    return output_path
+
+
+def _make_writer(output_stream, options: Optional[FilterOptions]) -> McapWriter:
+    if options is None:
+        return McapWriter(output_stream)
+
+    writer_options = {'compression_level': options.compression_level}
+    if options.mcap_compression is not None:
+        if not compression_available(options.mcap_compression):
+            raise McapError(f"Output compression '{options.compression}' is not available")
+        writer_options['compression'] = options.mcap_compression
+    if options.chunk_size is not None:
+        writer_options['chunk_size'] = options.chunk_size
+    return McapWriter(output_stream, **writer_options)
+
+
+def _copies_chunk(compression: str, options: Optional[FilterOptions]) -> bool:
+    return options is None or options.copies_chunk(compression)
+
+
+class _Downsampler:
+    """Apply per-key downsampling rules to messages seen in order."""
+
+    def __init__(self, rules: dict[Hashable, Downsample]):
+        self.rules = rules
+        self._seen: dict[Hashable, int] = {}
+        self._last_kept: dict[Hashable, int] = {}
+
+    def keep(self, key: Hashable, log_time: int) -> bool:
+        rule = self.rules.get(key)
+        if rule is None:
+            return True
+
+        seen = self._seen.get(key, 0)
+        self._seen[key] = seen + 1
+        if rule.keep_every is not None and seen % rule.keep_every != 0:
+            return False
+
+        last_kept = self._last_kept.get(key)
+        if rule.max_rate is not None and last_kept is not None and log_time - last_kept < 1e9 / rule.max_rate:
+            return False
+
+        self._last_kept[key] = log_time
+        return True
+
+
+class _MessageFilter:
+    """Decide which messages of an MCAP file are kept, by channel, log time and downsampling rules."""
+
+    def __init__(
+        self, topics_to_exclude: set[str], window: Optional[tuple[int, int]], options: Optional[FilterOptions]
+    ):
+        self.topics_to_exclude = topics_to_exclude
+        self.window = window
+        self.excluded_channel_ids: set[int] = set()
+        self._downsample_rules = options.downsample if options is not None else {}
+        self._downsampler = _Downsampler({})
+
+    def add_channel(self, channel: Channel) -> bool:
+        """Register a channel. Returns False if all of its messages are dropped."""
+        if channel.topic in self.topics_to_exclude:
+            self.excluded_channel_ids.add(channel.id)
+            return False
+        if channel.topic in self._downsample_rules:
+            self._downsampler.rules[channel.id] = self._downsample_rules[channel.topic]
+        return True
+
+    @property
+    def changes_messages(self) -> bool:
+        """Whether any message of the registered channels may be dropped."""
+        return bool(self.excluded_channel_ids or self._downsampler.rules or self.window is not None)
+
+    def drops_chunk(self, channel_ids: set[int], start_time: int, end_time: int) -> bool:
+        """Whether a chunk can be skipped entirely. Chunks with unknown content are never skipped."""
+        if channel_ids and channel_ids <= self.excluded_channel_ids:
+            return True
+        return self.window is not None and (end_time < self.window[0] or start_time > self.window[1])
+
+    def keeps_chunk(self, channel_ids: set[int], start_time: int, end_time: int) -> bool:
+        """Whether every message of a chunk is kept, so the chunk can be copied as-is."""
+        return (
+            bool(channel_ids)
+            and channel_ids.isdisjoint(self.excluded_channel_ids)
+            and channel_ids.isdisjoint(self._downsampler.rules)
+            and _in_window(start_time, self.window)
+            and _in_window(end_time, self.window)
+        )
+
+    def keep(self, body) -> bool:
+        """Whether to keep a message, given its record body. Must be called on messages in file order."""
+        channel_id = int.from_bytes(body[:2], 'little')
+        if channel_id in self.excluded_channel_ids:
+            return False
+        log_time = int.from_bytes(body[6:14], 'little')
+        if not _in_window(log_time, self.window):
+            return False
+        return self._downsampler.keep(channel_id, log_time)
+
+
+def _in_window(log_time: int, window: Optional[tuple[int, int]]) -> bool:
+    return window is None or window[0] <= log_time <= window[1]
+
+
+def _summary_has_all_channels(summary: McapSummary) -> bool:
+    """Whether the summary section has the channel of every message in the chunks.
+
+    Rewritten chunks only keep message records, so the schema and channel records of the output are taken from
+    the summary. Summaries without channel records are allowed by the MCAP specification, and chunks without
+    message indexes may contain any channel.
+    """
+    return bool(summary.channels) and all(
+        index.message_index_offsets and index.message_index_offsets.keys() <= summary.channels.keys()
+        for index in summary.chunk_indexes
+    )
+
+
+def _filter_indexed(
+    input_stream,
+    output_stream,
+    summary: McapSummary,
+    message_filter: _MessageFilter,
+    options: Optional[FilterOptions] = None,
+):
+    """Filter an indexed MCAP file chunk by chunk using its summary section."""
+    writer = _make_writer(output_stream, options)
+    writer.start(summary.header)
+
+    for channel in summary.channels.values():
+        if channel.id in message_filter.excluded_channel_ids:
+            continue
+        if channel.schema_id in summary.schemas:
+            writer.add_schema(summary.schemas[channel.schema_id])
+        writer.add_channel(channel)
+
+    for index in summary.chunk_indexes:
+        chunk_channel_ids = set(index.message_index_offsets)
+        if message_filter.drops_chunk(chunk_channel_ids, index.message_start_time, index.message_end_time):
+            continue
+
+        input_stream.seek(index.chunk_start_offset)
+        chunk_record = input_stream.read(index.chunk_length)
+
+        if message_filter.keeps_chunk(
+            chunk_channel_ids, index.message_start_time, index.message_end_time
+        ) and _copies_chunk(index.compression, options):
+            message_index_block = input_stream.read(index.message_index_length)
+            writer.add_raw_chunk(chunk_record, message_index_block, index)
+            continue
+
+        if not compression_available(index.compression):
+            raise McapError(f"Chunk compression '{index.compression}' is not available")
+
+        chunk = parse_chunk(memoryview(chunk_record)[9:])
+        records = decompress(chunk.compression, chunk.records, chunk.uncompressed_size)
+        _rewrite_chunk(writer, chunk, records, message_filter, options)
+
+    for attachment_index in summary.attachment_indexes:
+        input_stream.seek(attachment_index.offset)
+        writer.add_raw_attachment(input_stream.read(attachment_index.length), attachment_index)
+
+    for metadata_index in summary.metadata_indexes:
+        input_stream.seek(metadata_index.offset)
+        writer.add_raw_metadata(input_stream.read(metadata_index.length), metadata_index)
+
+    writer.finish()
+
+
+def _rewrite_chunk(
+    writer: McapWriter,
+    chunk: Chunk,
+    records: bytes,
+    message_filter: _MessageFilter,
+    options: Optional[FilterOptions] = None,
+):
+    """Write the kept messages of a decompressed chunk as a new chunk.
+
+    Unless the options set a chunk size, the chunk boundaries of the input are kept, and so is its
+    compression unless the options set one.
+    """
+    for opcode, _, body in iter_records(records):
+        if opcode == Opcode.MESSAGE and message_filter.keep(body):
+            writer.add_message_record(body)
+    if options is None or options.chunk_size is None:
+        keep_compression = options is None or options.mcap_compression is None
+        writer.flush_chunk(compression=chunk.compression if keep_compression else None)
+
+
+def filter_mcap_stream(
+    input_stream,
+    output,
+    output_topics,
+    time_window: Optional[TimeWindow] = None,
+    options: Optional[FilterOptions] = None,
+) -> Path:
+    """Filter out specified topics from an mcap byte stream while it is being read.
+
+    The stream is consumed strictly sequentially, so this can run on data as it is downloaded. Chunks are
+    decompressed to discover the channels they define, but chunks that only contain kept topics are still
+    copied as raw compressed bytes. Reading stops at the end of the data section.
+
+    Args:
+        input_stream: Readable binary stream positioned at the start of an mcap file
+        output: Path to output mcap file
+        output_topics: List of topic names to exclude from the output
+        time_window: Optional absolute window of messages to keep, by log time
+        options: Optional downsampling, compression and chunking of the output
+
+    Returns:
+        Path to the output mcap file
+
+    Raises:
+        McapError: If the stream cannot be filtered at the record level, e.g. because of an unsupported
+            chunk compression or a time window relative to the start of the fixture, which is only known
+            once the whole stream has been read. Callers should fall back to ``filter_mcap`` on the
+            complete file.
+    """
+    if time_window is not None and not time_window.absolute:
+        raise McapError('Relative time windows cannot be applied while streaming')
+
+    output_path = Path(output)
+    message_filter = _MessageFilter(set(output_topics), time_window.resolve() if time_window else None, options)
+    with output_path.open('wb') as output_stream:
+        _filter_sequential(input_stream, output_stream, message_filter, options)
+    return output_path
+
+
+def _filter_sequential(
+    input_stream,
+    output_stream,
+    message_filter: _MessageFilter,
+    options: Optional[FilterOptions] = None,
+):
+    """Filter an MCAP stream record by record, without relying on its summary section."""
+    if input_stream.read(len(MCAP_MAGIC)) != MCAP_MAGIC:
+        raise McapError('Not an MCAP stream: bad magic')
+    header = read_record(input_stream)
+    if header is None or header[0] != Opcode.HEADER:
+        raise McapError('MCAP stream does not start with a header record')
+
+    writer = _make_writer(output_stream, options)
+    writer.start(parse_header(header[1]))
+
+    schemas: dict[int, Schema] = {}
+
+    def register(opcode: int, body):
+        if opcode == Opcode.SCHEMA:
+            schema = parse_schema(body)
+            schemas[schema.id] = schema
+        elif opcode == Opcode.CHANNEL:
+            channel = parse_channel(body)
+            if not message_filter.add_channel(channel):
+                return
+            if channel.schema_id in schemas:
+                writer.add_schema(schemas[channel.schema_id])
+            writer.add_channel(channel)
+
+    pending = read_record(input_stream)
+    while pending is not None:
+        opcode, body = pending
+        pending = read_record(input_stream)
+
+        if opcode == Opcode.CHUNK:
+            # Message index records directly follow the chunk they index
+            message_indexes = []
+            while pending is not None and pending[0] == Opcode.MESSAGE_INDEX:
+                message_indexes.append(pending[1])
+                pending = read_record(input_stream)
+            _filter_sequential_chunk(writer, body, message_indexes, register, message_filter, options)
+        elif opcode in (Opcode.SCHEMA, Opcode.CHANNEL):
+            register(opcode, body)
+        elif opcode == Opcode.MESSAGE:
+            if message_filter.keep(body):
+                writer.add_message_record(body)
+        elif opcode == Opcode.ATTACHMENT:
+            writer.add_raw_attachment(record(opcode, body), parse_attachment(body))
+        elif opcode == Opcode.METADATA:
+            writer.add_raw_metadata(record(opcode, body), parse_metadata(body))
+        elif opcode == Opcode.DATA_END:
+            break
+
+    writer.finish()
+
+
+def _filter_sequential_chunk(
+    writer: McapWriter,
+    body: bytes,
+    message_indexes: list[bytes],
+    register,
+    message_filter: _MessageFilter,
+    options: Optional[FilterOptions] = None,
+):
+    chunk = parse_chunk(body)
+    records = decompress(chunk.compression, chunk.records, chunk.uncompressed_size)
+
+    # Channels have to be known before the chunk can be classified, so scan it for definitions first
+    message_channel_ids = set()
+    for opcode, _, record_body in iter_records(records):
+        if opcode == Opcode.MESSAGE:
+            message_channel_ids.add(int.from_bytes(record_body[:2], 'little'))
+        elif opcode in (Opcode.SCHEMA, Opcode.CHANNEL):
+            register(opcode, record_body)
+
+    if not message_channel_ids or message_filter.drops_chunk(
+        message_channel_ids, chunk.message_start_time, chunk.message_end_time
+    ):
+        return
+
+    indexed_channel_ids = {int.from_bytes(index[:2], 'little') for index in message_indexes}
+    if (
+        message_filter.keeps_chunk(message_channel_ids, chunk.message_start_time, chunk.message_end_time)
+        and message_channel_ids <= indexed_channel_ids
+        and _copies_chunk(chunk.compression, options)
+    ):
+        chunk_record = record(Opcode.CHUNK, body)
+        message_index_block = bytearray()
+        message_index_offsets = {}
+        for index in message_indexes:
+            message_index_offsets[int.from_bytes(index[:2], 'little')] = len(chunk_record) + len(message_index_block)
+            message_index_block += record(Opcode.MESSAGE_INDEX, index)
+        writer.add_raw_chunk(
+            chunk_record,
+            bytes(message_index_block),
+            ChunkIndex(
+                message_start_time=chunk.message_start_time,
+                message_end_time=chunk.message_end_time,
+                chunk_start_offset=0,
+                chunk_length=len(chunk_record),
+                message_index_offsets=message_index_offsets,
+                message_index_length=len(message_index_block),
+                compression=chunk.compression,
+                compressed_size=len(chunk.records),
+                uncompressed_size=chunk.uncompressed_size,
+            ),
+        )
+        return
+
+    _rewrite_chunk(writer, chunk, records, message_filter, options)
+
+
+def filter_mcap_rosbag2(
+    input,
+    output,
+    output_topics,
+    time_window: Optional[TimeWindow] = None,
+    options: Optional[FilterOptions] = None,
+):
+    """Filter out specified topics from an mcap file by deserializing every record through rosbag2.
+
+    Slower than ``filter_mcap`` but accepts anything rosbag2 can read. Kept as a fallback and as the
+    baseline for ``replay_testing.benchmark``.
+
     Args:
         input: Path to input mcap file
         output: Path to output mcap file
         output_topics: List of topic names to exclude from the output
+        time_window: Optional window of messages to keep, by log time
+        options: Optional downsampling, compression and chunking of the output. The compression level is
+            not supported by the rosbag2 mcap storage plugin and is ignored.
     """
     topics_to_exclude = set(output_topics)
+    output_path = Path(output)
 
     reader = rosbag2_py.SequentialReader()
     reader.open(
@@ -32,19 +501,65 @@ def filter_mcap(input, output, output_topics):
         rosbag2_py.ConverterOptions(input_serialization_format='cdr', output_serialization_format='cdr'),
     )
 
-    writer = rosbag2_py.SequentialWriter()
-    writer.open(
-        rosbag2_py.StorageOptions(uri=output, storage_id='mcap'),
-        rosbag2_py.ConverterOptions(input_serialization_format='cdr', output_serialization_format='cdr'),
-    )
+    window = None
+    if time_window is not None:
+        # Messages are read in log time order, so the first one marks the start of the fixture
+        bag_start = None
+        if not time_window.absolute and reader.has_next():
+            bag_start = reader.read_next()[2]
+        window = time_window.resolve(bag_start if bag_start is not None else 0)
+        reader.seek(window[0])
+
+    # rosbag2 writes bags as directories, so write into a scratch directory and move the mcap file out
+    with tempfile.TemporaryDirectory(dir=output_path.parent) as scratch_dir:
+        bag_dir = Path(scratch_dir) / output_path.stem
+
+        storage_config_uri = ''
+        if options is not None and options.reencodes:
+            storage_config_path = Path(scratch_dir) / 'mcap_writer_options.yaml'
+            storage_config_path.write_text(_rosbag2_storage_config(options))
+            storage_config_uri = str(storage_config_path)
+
+        writer = rosbag2_py.SequentialWriter()
+        writer.open(
+            rosbag2_py.StorageOptions(uri=str(bag_dir), storage_id='mcap', storage_config_uri=storage_config_uri),
+            rosbag2_py.ConverterOptions(input_serialization_format='cdr', output_serialization_format='cdr'),
+        )
+
+        # Create topics in writer, excluding filtered ones
+        kept_topics = []
+        for topic_metadata in reader.get_all_topics_and_types():
+            if topic_metadata.name not in topics_to_exclude:
+                writer.create_topic(topic_metadata)
+                kept_topics.append(topic_metadata.name)
+
+        # Let the storage plugin skip excluded topics. An empty filter would match every topic.
+        if kept_topics:
+            reader.set_filter(rosbag2_py.StorageFilter(topics=kept_topics))
+
+        # Copy messages, excluding filtered topics
+        downsampler = _Downsampler(dict(options.downsample) if options is not None else {})
+        while reader.has_next():
+            topic_name, data, timestamp = reader.read_next()
+            if window is not None and timestamp > window[1]:
+                break
+            if topic_name not in topics_to_exclude and downsampler.keep(topic_name, timestamp):
+                writer.write(topic_name, data, timestamp)
+
+        # Close the writer so the mcap file is finalized before moving it
+        del writer
+        shutil.move(find_mcap_files(bag_dir)[0], output_path)
+
+
+_ROSBAG2_COMPRESSION = {'none': 'None', 'lz4': 'Lz4', 'zstd': 'Zstd'}
 
-    # Create topics in writer, excluding filtered ones
-    for topic_metadata in reader.get_all_topics_and_types():
-        if topic_metadata.name not in topics_to_exclude:
-            writer.create_topic(topic_metadata)
 
-    # Copy messages, excluding filtered topics
-    while reader.has_next():
-        topic_name, data, timestamp = reader.read_next()
-        if topic_name not in topics_to_exclude:
-            writer.write(topic_name, data, timestamp)
+def _rosbag2_storage_config(options: FilterOptions) -> str:
+    """Render the mcap storage plugin writer configuration for the given filter options."""
+    lines = []
+    if options.compression is not None:
+        lines.append(f'compression: "{_ROSBAG2_COMPRESSION[options.compression]}"')
+        lines.append('forceCompression: true')
+    if options.chunk_size is not None:
+        lines.append(f'chunkSize: {options.chunk_size}')
+    return '\n'.join(lines) + '\n'
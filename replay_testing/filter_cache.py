@@ -0,0 +1,209 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from .logging_config import get_logger
+from .mcap_io import McapError, read_summary
+from .utils import link_or_copy, make_read_only
+
+_logger_ = get_logger()
+
+CACHE_DIR = Path('/tmp/replay_testing/.cache') / 'filtered'
+
+# Bump whenever the filter output for a given input and options changes, to invalidate existing entries
+FILTER_CACHE_VERSION = 2
+
+DEFAULT_MAX_SIZE_BYTES = 50 * 1024**3
+
+_HASH_BLOCK_SIZE = 8 * 1024 * 1024
+_CHUNK_CRC_OFFSET = 9 + 24
+
+
+def mcap_checksum(path: Path) -> str:
+    """Compute a checksum identifying the content of an MCAP file.
+
+    For indexed files this hashes the file size, the summary section and the CRC stored in every chunk
+    record, which identifies the content without reading the whole file. Chunks without a CRC are hashed in
+    full, and so are files without a summary.
+
+    Returns:
+        str: Checksum string prefixed with the method used
+    """
+    path = Path(path)
+    digest = hashlib.sha256()
+    with path.open('rb') as stream:
+        try:
+            summary = read_summary(stream)
+        except McapError:
+            summary = None
+
+        if summary is not None and summary.chunk_indexes:
+            file_size = stream.seek(0, os.SEEK_END)
+            digest.update(struct.pack('<Q', file_size))
+            stream.seek(summary.summary_start)
+            digest.update(stream.read())
+            for index in summary.chunk_indexes:
+                stream.seek(index.chunk_start_offset + _CHUNK_CRC_OFFSET)
+                crc = stream.read(4)
+                digest.update(crc)
+                if crc == b'\0\0\0\0':
+                    # Writers may leave the CRC unset, then only the chunk itself identifies its content
+                    stream.seek(index.chunk_start_offset)
+                    remaining = index.chunk_length
+                    while remaining > 0 and (block := stream.read(min(_HASH_BLOCK_SIZE, remaining))):
+                        digest.update(block)
+                        remaining -= len(block)
+            return f'mcap-summary-sha256:{digest.hexdigest()}'
+
+        stream.seek(0)
+        while block := stream.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+        return f'sha256:{digest.hexdigest()}'
+
+
+class FilteredFixtureCache:
+    """Persistent cache of filtered fixtures, keyed on input content and filter configuration.
+
+    Entries are stored read-only as ``<key>.mcap`` with a ``<key>.meta`` JSON file next to them, which records
+    their size and checksum. On a hit the stored file is checked against them and linked into the run
+    directory. Least recently used entries are evicted once the cache grows beyond ``max_size_bytes``.
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_size_bytes: int = DEFAULT_MAX_SIZE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+
+    def key(self, input_path: Path, excluded_topics: list[str], options: Optional[dict] = None) -> str:
+        """Compute the cache key for filtering an input fixture."""
+        key_source = {
+            'version': FILTER_CACHE_VERSION,
+            'input_checksum': mcap_checksum(input_path),
+            'excluded_topics': sorted(set(excluded_topics)),
+            'options': options or {},
+        }
+        return hashlib.sha256(json.dumps(key_source, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _entry_paths(self, key: str) -> tuple[Path, Path]:
+        entry_dir = self.cache_dir / key[:2]
+        return entry_dir / f'{key}.mcap', entry_dir / f'{key}.meta'
+
+    def _is_intact(self, entry_path: Path, metadata_path: Path) -> bool:
+        """Check that an entry still has the size and checksum it was stored with."""
+        try:
+            with metadata_path.open() as f:
+                metadata = json.load(f)
+            return entry_path.stat().st_size == metadata['size'] and mcap_checksum(entry_path) == metadata['checksum']
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def fetch(self, key: str, destination: Path) -> bool:
+        """Link a cached filtered fixture to destination.
+
+        Returns:
+            bool: True on a cache hit, False otherwise
+        """
+        entry_path, metadata_path = self._entry_paths(key)
+        if not entry_path.exists() or not metadata_path.exists():
+            return False
+
+        if not self._is_intact(entry_path, metadata_path):
+            _logger_.warning(f'Discarding modified or incomplete cached filtered fixture {entry_path}')
+            metadata_path.unlink(missing_ok=True)
+            entry_path.unlink(missing_ok=True)
+            return False
+
+        try:
+            if make_read_only(entry_path):
+                link_or_copy(entry_path, destination)
+            else:
+                # A link would let the run change the entry for every later run
+                shutil.copyfile(entry_path, destination)
+            make_read_only(destination)
+        except OSError as e:
+            _logger_.warning(f'Failed to use cached filtered fixture {entry_path}: {e}')
+            return False
+
+        # Touch the metadata file to mark the entry as recently used
+        os.utime(metadata_path)
+        _logger_.info(f'Filtered fixture cache hit: {entry_path}')
+        return True
+
+    def store(self, key: str, filtered_path: Path, metadata: Optional[dict] = None):
+        """Add a filtered fixture to the cache and evict old entries if needed.
+
+        The entry is made read-only. If it is linked to `filtered_path`, so is the filtered fixture.
+        """
+        entry_path, metadata_path = self._entry_paths(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Link under a temporary name and rename, so concurrent runs never see a partial entry
+        tmp_path = entry_path.with_name(f'.{entry_path.name}.{uuid.uuid4().hex}')
+        try:
+            link_or_copy(Path(filtered_path), tmp_path)
+            # A filtered fixture may be linked to its input fixture and through it to the user's file. Only an entry
+            # shared with nothing but the filtered fixture is made read-only in place, others are copied.
+            if tmp_path.stat().st_nlink > 2 or not make_read_only(tmp_path):
+                tmp_path.unlink()
+                shutil.copyfile(filtered_path, tmp_path)
+                if not make_read_only(tmp_path):
+                    raise OSError(f'Cannot make {tmp_path} read-only')
+            entry_metadata = {'size': tmp_path.stat().st_size, 'checksum': mcap_checksum(tmp_path)}
+            tmp_path.replace(entry_path)
+            with metadata_path.open('w') as f:
+                json.dump({'created': time.time(), **(metadata or {}), **entry_metadata}, f, indent=2)
+        except OSError as e:
+            _logger_.warning(f'Failed to store filtered fixture in cache: {e}')
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path, Path]]:
+        """List (last used, size, entry path, metadata path) for all complete entries."""
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for metadata_path in self.cache_dir.glob('*/*.meta'):
+            entry_path = metadata_path.with_suffix('.mcap')
+            try:
+                entries.append((metadata_path.stat().st_mtime, entry_path.stat().st_size, entry_path, metadata_path))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_size_bytes."""
+        entries = sorted(self._entries())
+        total_size = sum(size for _, size, _, _ in entries)
+        for _, size, entry_path, metadata_path in entries:
+            if total_size <= self.max_size_bytes:
+                break
+            _logger_.info(f'Evicting filtered fixture from cache: {entry_path}')
+            metadata_path.unlink(missing_ok=True)
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -15,11 +15,15 @@
 
 import abc
 from pathlib import Path
+from typing import BinaryIO, Callable, Optional
 
-from ..models import Mcap
+from ..models import Mcap, TimeWindow
 
 
 class BaseFixture(abc.ABC):
+    # Window of the fixture to replay. Everything outside it is trimmed when the fixture is filtered.
+    time_window: Optional[TimeWindow] = None
+
     @property
     @abc.abstractmethod
     def fixture_key(self) -> str:
@@ -43,3 +47,17 @@ class BaseFixture(abc.ABC):
             to the downloaded files
         """
         pass
+
+    def download_streaming(self, destination: Path, on_stream: Callable[[BinaryIO], None]) -> Mcap:
+        """Download the fixture, passing the incoming bytes to `on_stream` while they are written.
+
+        Child classes that fetch fixtures over the network can override this so the fixture can be
+        processed during the download. `on_stream` is called at most once with a readable binary stream of
+        the fixture content; whatever it leaves unread is still downloaded. The default implementation
+        does not stream and never calls `on_stream`.
+
+        Returns:
+            Mcap: A Mcap object with paths
+            to the downloaded files
+        """
+        return self.download(destination)
@@ -11,16 +11,18 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import shutil
 from pathlib import Path
+from typing import Optional
 
-from ..models import Mcap
+from ..models import Mcap, TimeWindow
+from ..utils import materialize
 from .base_fixture import BaseFixture
 
 
 class LocalFixture(BaseFixture):
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, time_window: Optional[TimeWindow] = None):
         self.path = path
+        self.time_window = time_window
 
     @property
     def fixture_key(self) -> str:
@@ -28,5 +30,5 @@ class LocalFixture(BaseFixture):
 
     def download(self, destination: Path) -> Mcap:
         mcap_path = destination / self.path.name
-        shutil.copy(self.path, mcap_path)
+        materialize(self.path, mcap_path)
         return Mcap(path=str(mcap_path))
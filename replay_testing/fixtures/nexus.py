@@ -15,15 +15,15 @@
 
 import json
 import os
-import shutil
 import subprocess
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Callable, Optional
 
 import requests
 
 from ..logging_config import get_logger
-from ..models import Mcap
+from ..models import Mcap, TimeWindow
+from ..utils import TeeReader, materialize
 from .base_fixture import BaseFixture
 
 _logger_ = get_logger()
@@ -34,8 +34,9 @@ CACHE_DIR = Path('/tmp/replay_testing/.cache')
 class NexusFixture(BaseFixture):
     """Fixture provider that downloads MCAP files from Nexus repository."""
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, time_window: Optional[TimeWindow] = None):
         self.nexus_path = path
+        self.time_window = time_window
 
     @property
     def fixture_key(self) -> str:
@@ -229,12 +230,73 @@ class NexusFixture(BaseFixture):
 
         return True, http_code
 
+    def _stream_to_path(
+        self,
+        dest_path: Path,
+        on_stream: Callable[[BinaryIO], None],
+        server: str,
+        repo: str,
+        username: str,
+        password: str,
+        extra_headers: str,
+    ) -> tuple[bool, str]:
+        """Download the file from Nexus to the specified path, passing the body to `on_stream` as it arrives.
+
+        Returns:
+            tuple: (success, http_code)
+        """
+        headers = {}
+        if extra_headers:
+            for header in extra_headers.split(';'):
+                header = header.strip()
+                if header and ':' in header:
+                    key, value = header.split(':', 1)
+                    headers[key.strip()] = value.strip()
+
+        try:
+            with requests.get(
+                f'{server}/repository/{repo}/{self.nexus_path}',
+                auth=(username, password),
+                headers=headers,
+                stream=True,
+                timeout=30,
+            ) as response:
+                http_code = str(response.status_code)
+                if not response.ok:
+                    _logger_.error(f'Download failed for {self.nexus_path}')
+                    _logger_.error(f'HTTP status code: {http_code}')
+                    return False, http_code
+
+                response.raw.decode_content = True
+                with dest_path.open('wb') as dest_file:
+                    tee = TeeReader(response.raw, dest_file)
+                    on_stream(tee)
+                    tee.drain()
+        except requests.RequestException as e:
+            _logger_.error(f'Download failed for {self.nexus_path}: {e}')
+            return False, ''
+
+        return True, http_code
+
     def download(self, destination_folder: Path) -> Mcap:
         """Download fixtures from Nexus repository with caching support.
 
         Returns:
             Mcap: A Mcap object with paths to downloaded files
         """
+        return self._download(destination_folder)
+
+    def download_streaming(self, destination_folder: Path, on_stream: Callable[[BinaryIO], None]) -> Mcap:
+        """Download fixtures from Nexus, passing the file content to `on_stream` as it is written to the cache.
+
+        Cached files are not streamed.
+
+        Returns:
+            Mcap: A Mcap object with paths to downloaded files
+        """
+        return self._download(destination_folder, on_stream)
+
+    def _download(self, destination_folder: Path, on_stream: Optional[Callable[[BinaryIO], None]] = None) -> Mcap:
         # Read environment variables at runtime, not at class definition time
         username = os.getenv('NEXUS_USERNAME', '')
         password = os.getenv('NEXUS_PASSWORD', '')
@@ -261,16 +323,24 @@ class NexusFixture(BaseFixture):
         # Check if we have a valid cached version
         if self._is_cache_valid(cache_path, metadata_path, asset_metadata):
             _logger_.info(f'Using cached file from {cache_path}')
-            shutil.copy2(cache_path, local_path)
-            _logger_.info(f'Copied from cache to {local_path}')
+            # The cache entry is made read-only first, so the runs linked to it cannot change it
+            method = materialize(cache_path, local_path, owns_source=True)
+            _logger_.info(f'Materialized cached file at {local_path} via {method}')
             return Mcap(path=local_path)
 
         # Cache miss - need to download
         _logger_.info(f'Cache miss, downloading from Nexus: {self.nexus_path}')
 
-        # Download to cache first
+        # Download to cache first. Replace rather than overwrite a stale cached file, it may still be linked into
+        # earlier run directories
         _logger_.info(f'Downloading to cache: {cache_path}')
-        success, http_code = self._download_to_path(cache_path, server, repo, username, password, extra_headers)
+        cache_path.unlink(missing_ok=True)
+        if on_stream is None:
+            success, http_code = self._download_to_path(cache_path, server, repo, username, password, extra_headers)
+        else:
+            success, http_code = self._stream_to_path(
+                cache_path, on_stream, server, repo, username, password, extra_headers
+            )
 
         if not success:
             raise RuntimeError(f'Failed to download fixture from Nexus: {self.nexus_path} (HTTP {http_code})')
@@ -287,8 +357,9 @@ class NexusFixture(BaseFixture):
         # Write metadata for future cache validation
         self._write_metadata(metadata_path, repo, asset_metadata)
 
-        # Copy from cache to destination
-        shutil.copy2(cache_path, local_path)
+        # Materialize the cached file at the destination without copying it if possible. The cache entry is
+        # made read-only first, so the runs linked to it cannot change it
+        materialize(cache_path, local_path, owns_source=True)
 
         _logger_.info(f'Download successful: {local_path} (HTTP {http_code})')
         return Mcap(path=local_path)
@@ -15,15 +15,15 @@
 
 import json
 import os
-import shutil
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Callable, Optional
 
 import boto3
 from botocore.exceptions import ClientError, NoCredentialsError
 
 from ..logging_config import get_logger
-from ..models import Mcap
+from ..models import Mcap, TimeWindow
+from ..utils import TeeReader, materialize
 from .base_fixture import BaseFixture
 
 _logger_ = get_logger()
@@ -44,6 +44,7 @@ class S3Fixture(BaseFixture):
         aws_secret_access_key: Optional[str] = None,
         aws_session_token: Optional[str] = None,
         endpoint_url: Optional[str] = None,
+        time_window: Optional[TimeWindow] = None,
     ):
         """Initialize S3Fixture.
 
@@ -56,6 +57,7 @@ class S3Fixture(BaseFixture):
             aws_secret_access_key: AWS secret key (conflicts with environment variables if both are set)
             aws_session_token: AWS session token for temporary credentials (optional)
             endpoint_url: Custom S3 endpoint URL (e.g., for MinIO or other S3-compatible storage)
+            time_window: Only replay this window of the fixture
 
         Raises:
             ValueError: If both explicit credentials and environment variables are provided
@@ -69,6 +71,7 @@ class S3Fixture(BaseFixture):
         self.key = key
         self.bucket = bucket or os.getenv('AWS_BUCKET', '')
         self.s3_client = s3_client
+        self.time_window = time_window
 
         # Validate bucket name early
         if not self.bucket:
@@ -257,6 +260,26 @@ class S3Fixture(BaseFixture):
         Raises:
             RuntimeError: If download fails
         """
+        return self._download(destination_folder)
+
+    def download_streaming(self, destination_folder: Path, on_stream: Callable[[BinaryIO], None]) -> Mcap:
+        """Download fixture from S3, passing the object body to `on_stream` as it is written to the cache.
+
+        Cached objects are not streamed.
+
+        Args:
+            destination_folder: Local folder to download the file to
+            on_stream: Called with a readable stream of the object body on a cache miss
+
+        Returns:
+            Mcap: A Mcap object with path to the downloaded file
+
+        Raises:
+            RuntimeError: If download fails
+        """
+        return self._download(destination_folder, on_stream)
+
+    def _download(self, destination_folder: Path, on_stream: Optional[Callable[[BinaryIO], None]] = None) -> Mcap:
         # Extract filename from S3 key
         filename = Path(self.key).name
         if not filename:
@@ -280,9 +303,10 @@ class S3Fixture(BaseFixture):
             # Check if we have a valid cached version
             if self._is_cache_valid(cache_path, metadata_path, checksum):
                 _logger_.info(f'Using cached file from {cache_path}')
-                # Copy from cache to destination
-                shutil.copy2(cache_path, local_path)
-                _logger_.info(f'Copied from cache to {local_path}')
+                # Materialize the cached file at the destination without copying it if possible. The cache entry is
+                # made read-only first, so the runs linked to it cannot change it
+                method = materialize(cache_path, local_path, owns_source=True)
+                _logger_.info(f'Materialized cached file at {local_path} via {method}')
                 return Mcap(path=local_path)
 
             # Cache miss - need to download
@@ -299,19 +323,29 @@ class S3Fixture(BaseFixture):
                 else:
                     raise RuntimeError(f'Failed to get object metadata: {str(e)}')
 
-            # Download to cache first
+            # Download to cache first. Replace rather than overwrite a stale cached file, it may still be linked into
+            # earlier run directories
             _logger_.info(f'Downloading to cache: {cache_path}')
-            s3_client.download_file(
-                Bucket=self.bucket,
-                Key=self.key,
-                Filename=str(cache_path),
-            )
+            cache_path.unlink(missing_ok=True)
+            if on_stream is None:
+                s3_client.download_file(
+                    Bucket=self.bucket,
+                    Key=self.key,
+                    Filename=str(cache_path),
+                )
+            else:
+                body = s3_client.get_object(Bucket=self.bucket, Key=self.key)['Body']
+                with cache_path.open('wb') as cache_file:
+                    tee = TeeReader(body, cache_file)
+                    on_stream(tee)
+                    tee.drain()
 
             # Write metadata for future cache validation
             self._write_metadata(metadata_path, checksum)
 
-            # Copy from cache to destination
-            shutil.copy2(cache_path, local_path)
+            # Materialize the cached file at the destination without copying it if possible. The cache entry is
+            # made read-only first, so the runs linked to it cannot change it
+            materialize(cache_path, local_path, owns_source=True)
 
             _logger_.info(f'Download successful: {local_path}')
 
@@ -0,0 +1,140 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Streaming, time-aligned joins of input and output messages for latency analysis."""
+
+import heapq
+import operator
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator, NamedTuple, Optional
+
+import numpy as np
+
+from .logging_config import get_logger
+from .reader import _to_column_value
+
+_logger_ = get_logger()
+
+DEFAULT_JOIN_BUFFER = 10_000
+
+_INPUT = 0
+_OUTPUT = 1
+
+
+class JoinedMessage(NamedTuple):
+    input_topic: str
+    input_msg: Any
+    input_time: int
+    output_topic: str
+    output_msg: Any
+    output_time: int
+
+    @property
+    def latency(self) -> int:
+        """Time from the input to the output being logged, in nanoseconds."""
+        return self.output_time - self.input_time
+
+
+def merge_messages(*streams: Iterable[tuple[str, Any, int]]) -> Iterator[tuple[str, Any, int]]:
+    """Merge message streams that are each in log time order into a single stream in log time order.
+
+    Only the next message of every stream is held in memory, e.g. to merge `read_messages` of several bags.
+    """
+    return heapq.merge(*streams, key=operator.itemgetter(2))
+
+
+def _keyed(messages: Iterable[tuple[str, Any, int]], on: str, side: int):
+    if on == 'timestamp':
+        for topic_name, msg, timestamp in messages:
+            yield timestamp, side, topic_name, msg, timestamp
+    else:
+        getter = operator.attrgetter(on)
+        for topic_name, msg, timestamp in messages:
+            yield _to_column_value(getter(msg)), side, topic_name, msg, timestamp
+
+
+def join_messages(
+    inputs: Iterable[tuple[str, Any, int]],
+    outputs: Iterable[tuple[str, Any, int]],
+    on: str = 'timestamp',
+    max_latency: Optional[int] = None,
+    max_buffer: int = DEFAULT_JOIN_BUFFER,
+) -> Iterator[JoinedMessage]:
+    """Pair every output message with the input message it responds to, in a single streaming pass.
+
+    Both streams are merged by the join key, so they must each be in order of that key, as returned by
+    `read_messages`. With `on='timestamp'` every output is paired with the latest input logged at or before
+    it. With a field such as `on='header.stamp'` every output is paired with the input with the same value
+    of that field, e.g. the sensor message whose stamp a detection carries; only the last `max_buffer` inputs
+    are kept to look up, so memory use is bounded however long the bags are.
+
+    Latencies are differences of log times, so they are only meaningful when both streams were logged on the
+    same clock, e.g. both read from the run fixture, which also records the replayed inputs.
+
+    Args:
+        inputs: Input messages, as (topic_name, ros_msg, timestamp) tuples
+        outputs: Output messages, as (topic_name, ros_msg, timestamp) tuples
+        on: 'timestamp' to join on log time, or the dotted path of a field present in both streams
+        max_latency: Drop pairs with a latency above this, in nanoseconds
+        max_buffer: Number of inputs kept to look up when joining on a field
+
+    Yields:
+        JoinedMessage: An input and output pair, with its latency
+    """
+    merged = heapq.merge(_keyed(inputs, on, _INPUT), _keyed(outputs, on, _OUTPUT), key=operator.itemgetter(0, 1))
+
+    latest = None
+    buffer: OrderedDict = OrderedDict()
+    unmatched = 0
+    for key, side, topic_name, msg, timestamp in merged:
+        if side == _INPUT:
+            if on == 'timestamp':
+                latest = (topic_name, msg, timestamp)
+            else:
+                buffer[key] = (topic_name, msg, timestamp)
+                buffer.move_to_end(key)
+                if len(buffer) > max_buffer:
+                    buffer.popitem(last=False)
+            continue
+
+        match = latest if on == 'timestamp' else buffer.get(key)
+        if match is None:
+            unmatched += 1
+            continue
+        joined = JoinedMessage(*match, topic_name, msg, timestamp)
+        if max_latency is not None and joined.latency > max_latency:
+            unmatched += 1
+            continue
+        yield joined
+
+    if unmatched:
+        _logger_.debug(f'{unmatched} output messages have no matching input on {on}')
+
+
+def join_latencies(
+    inputs: Iterable[tuple[str, Any, int]],
+    outputs: Iterable[tuple[str, Any, int]],
+    on: str = 'timestamp',
+    max_latency: Optional[int] = None,
+    max_buffer: int = DEFAULT_JOIN_BUFFER,
+) -> np.ndarray:
+    """Latency of every input and output pair of `join_messages`, in nanoseconds.
+
+    Returns:
+        np.ndarray: int64 latencies in output order, e.g. to assert on `np.percentile(latencies, 99)`
+    """
+    return np.fromiter(
+        (joined.latency for joined in join_messages(inputs, outputs, on, max_latency, max_buffer)), dtype=np.int64
+    )
@@ -21,6 +21,7 @@ from xml.etree import ElementTree as ET
 from termcolor import colored
 
 from .logging_config import get_logger
+from .run_stats import run_stats_properties
 
 _logger_ = get_logger()
 
@@ -77,6 +78,15 @@ def unittest_results_to_xml(*, name='replay_test', test_results=dict) -> ET.Elem
             filter_fixture_prop = ET.SubElement(properties, 'property')
             filter_fixture_prop.set('name', 'filter_fixture')
             filter_fixture_prop.set('value', filtered_fixture_path)
+            if test_result.get('run_stats') is not None:
+                for prop_name, prop_value in run_stats_properties(test_result['run_stats']):
+                    stats_prop = ET.SubElement(properties, 'property')
+                    stats_prop.set('name', prop_name)
+                    stats_prop.set('value', prop_value)
+            if test_result.get('time_to_ready') is not None:
+                ready_prop = ET.SubElement(properties, 'property')
+                ready_prop.set('name', 'readiness.time_to_ready')
+                ready_prop.set('value', f'{test_result["time_to_ready"]:.6g}')
 
             total_tests += unittest_result.testsRun
             total_failures += len(unittest_result.failures)
@@ -0,0 +1,805 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Minimal MCAP record layer used for storage-level fixture processing.
+
+Only the parts of the MCAP specification (https://mcap.dev/spec) that replay_testing needs are implemented:
+parsing and serializing records, reading the summary section, and writing chunked, indexed files. Unlike
+rosbag2_py, this works on raw record bytes, so chunks can be copied without being decompressed.
+"""
+
+import struct
+import zlib
+from enum import IntEnum
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+MCAP_MAGIC = b'\x89MCAP0\r\n'
+
+_RECORD_HEADER = struct.Struct('<BQ')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_MESSAGE_HEAD = struct.Struct('<HIQQ')
+_MESSAGE_INDEX_ENTRY = struct.Struct('<QQ')
+_FOOTER = struct.Struct('<QQI')
+_FOOTER_RECORD_SIZE = _RECORD_HEADER.size + _FOOTER.size
+
+
+class Opcode(IntEnum):
+    HEADER = 0x01
+    FOOTER = 0x02
+    SCHEMA = 0x03
+    CHANNEL = 0x04
+    MESSAGE = 0x05
+    CHUNK = 0x06
+    MESSAGE_INDEX = 0x07
+    CHUNK_INDEX = 0x08
+    ATTACHMENT = 0x09
+    ATTACHMENT_INDEX = 0x0A
+    STATISTICS = 0x0B
+    METADATA = 0x0C
+    METADATA_INDEX = 0x0D
+    SUMMARY_OFFSET = 0x0E
+    DATA_END = 0x0F
+
+
+class McapError(RuntimeError):
+    """Raised when an MCAP file cannot be processed at the record level."""
+
+
+class Header(NamedTuple):
+    profile: str
+    library: str
+
+
+class Schema(NamedTuple):
+    id: int
+    name: str
+    encoding: str
+    data: bytes
+
+
+class Channel(NamedTuple):
+    id: int
+    schema_id: int
+    topic: str
+    message_encoding: str
+    metadata: dict[str, str]
+
+
+class Chunk(NamedTuple):
+    message_start_time: int
+    message_end_time: int
+    uncompressed_size: int
+    uncompressed_crc: int
+    compression: str
+    records: memoryview
+
+
+class ChunkIndex(NamedTuple):
+    message_start_time: int
+    message_end_time: int
+    chunk_start_offset: int
+    chunk_length: int
+    message_index_offsets: dict[int, int]
+    message_index_length: int
+    compression: str
+    compressed_size: int
+    uncompressed_size: int
+
+
+class AttachmentIndex(NamedTuple):
+    offset: int
+    length: int
+    log_time: int
+    create_time: int
+    data_size: int
+    name: str
+    media_type: str
+
+
+class MetadataIndex(NamedTuple):
+    offset: int
+    length: int
+    name: str
+
+
+class Statistics(NamedTuple):
+    message_count: int
+    schema_count: int
+    channel_count: int
+    attachment_count: int
+    metadata_count: int
+    chunk_count: int
+    message_start_time: int
+    message_end_time: int
+    channel_message_counts: dict[int, int]
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Primitive encoding
+# --------------------------------------------------------------------------------------------------------------------
+
+
+def _read_string(buf, offset: int) -> tuple[str, int]:
+    (length,) = _U32.unpack_from(buf, offset)
+    offset += 4
+    return bytes(buf[offset : offset + length]).decode('utf-8'), offset + length
+
+
+def _read_bytes(buf, offset: int) -> tuple[bytes, int]:
+    (length,) = _U32.unpack_from(buf, offset)
+    offset += 4
+    return bytes(buf[offset : offset + length]), offset + length
+
+
+def _read_string_map(buf, offset: int) -> tuple[dict[str, str], int]:
+    (length,) = _U32.unpack_from(buf, offset)
+    offset += 4
+    end = offset + length
+    result = {}
+    while offset < end:
+        key, offset = _read_string(buf, offset)
+        value, offset = _read_string(buf, offset)
+        result[key] = value
+    return result, end
+
+
+def _read_u16_u64_map(buf, offset: int) -> tuple[dict[int, int], int]:
+    (length,) = _U32.unpack_from(buf, offset)
+    offset += 4
+    end = offset + length
+    result = {}
+    while offset < end:
+        key, value = struct.unpack_from('<HQ', buf, offset)
+        result[key] = value
+        offset += 10
+    return result, end
+
+
+def _string(value: str) -> bytes:
+    encoded = value.encode('utf-8')
+    return _U32.pack(len(encoded)) + encoded
+
+
+def _bytes(value: bytes) -> bytes:
+    return _U32.pack(len(value)) + value
+
+
+def _string_map(values: dict[str, str]) -> bytes:
+    body = b''.join(_string(key) + _string(value) for key, value in values.items())
+    return _U32.pack(len(body)) + body
+
+
+def _u16_u64_map(values: dict[int, int]) -> bytes:
+    body = b''.join(struct.pack('<HQ', key, value) for key, value in values.items())
+    return _U32.pack(len(body)) + body
+
+
+def record(opcode: int, body: bytes) -> bytes:
+    """Serialize a record body with its opcode and length prefix."""
+    return _RECORD_HEADER.pack(opcode, len(body)) + body
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Record parsing
+# --------------------------------------------------------------------------------------------------------------------
+
+
+def parse_header(body) -> Header:
+    profile, offset = _read_string(body, 0)
+    library, _ = _read_string(body, offset)
+    return Header(profile=profile, library=library)
+
+
+def parse_schema(body) -> Schema:
+    (schema_id,) = _U16.unpack_from(body, 0)
+    name, offset = _read_string(body, 2)
+    encoding, offset = _read_string(body, offset)
+    data, _ = _read_bytes(body, offset)
+    return Schema(id=schema_id, name=name, encoding=encoding, data=data)
+
+
+def parse_channel(body) -> Channel:
+    channel_id, schema_id = struct.unpack_from('<HH', body, 0)
+    topic, offset = _read_string(body, 4)
+    message_encoding, offset = _read_string(body, offset)
+    metadata, _ = _read_string_map(body, offset)
+    return Channel(
+        id=channel_id, schema_id=schema_id, topic=topic, message_encoding=message_encoding, metadata=metadata
+    )
+
+
+def parse_message_head(body) -> tuple[int, int, int, int]:
+    """Return (channel_id, sequence, log_time, publish_time) of a message record body.
+
+    The message payload is everything after the first ``MESSAGE_HEAD_SIZE`` bytes of the body.
+    """
+    return _MESSAGE_HEAD.unpack_from(body, 0)
+
+
+MESSAGE_HEAD_SIZE = _MESSAGE_HEAD.size
+
+
+def parse_chunk(body) -> Chunk:
+    view = memoryview(body)
+    start, end, uncompressed_size, uncompressed_crc = struct.unpack_from('<QQQI', view, 0)
+    compression, offset = _read_string(view, 28)
+    (records_length,) = _U64.unpack_from(view, offset)
+    offset += 8
+    return Chunk(
+        message_start_time=start,
+        message_end_time=end,
+        uncompressed_size=uncompressed_size,
+        uncompressed_crc=uncompressed_crc,
+        compression=compression,
+        records=view[offset : offset + records_length],
+    )
+
+
+def parse_chunk_index(body) -> ChunkIndex:
+    start, end, chunk_start_offset, chunk_length = struct.unpack_from('<QQQQ', body, 0)
+    message_index_offsets, offset = _read_u16_u64_map(body, 32)
+    (message_index_length,) = _U64.unpack_from(body, offset)
+    compression, offset = _read_string(body, offset + 8)
+    compressed_size, uncompressed_size = struct.unpack_from('<QQ', body, offset)
+    return ChunkIndex(
+        message_start_time=start,
+        message_end_time=end,
+        chunk_start_offset=chunk_start_offset,
+        chunk_length=chunk_length,
+        message_index_offsets=message_index_offsets,
+        message_index_length=message_index_length,
+        compression=compression,
+        compressed_size=compressed_size,
+        uncompressed_size=uncompressed_size,
+    )
+
+
+def parse_message_index_count(body) -> tuple[int, int]:
+    """Return (channel_id, number of indexed messages) of a message index record body."""
+    channel_id, length = struct.unpack_from('<HI', body, 0)
+    return channel_id, length // _MESSAGE_INDEX_ENTRY.size
+
+
+def parse_message_index(body) -> tuple[int, list[tuple[int, int]]]:
+    """Return (channel_id, [(log_time, offset), ...]) of a message index record body."""
+    channel_id, length = struct.unpack_from('<HI', body, 0)
+    return channel_id, list(_MESSAGE_INDEX_ENTRY.iter_unpack(body[6 : 6 + length]))
+
+
+def parse_attachment(body) -> AttachmentIndex:
+    """Return an attachment index describing an attachment record body. Offset and length are left at 0."""
+    log_time, create_time = struct.unpack_from('<QQ', body, 0)
+    name, offset = _read_string(body, 16)
+    media_type, offset = _read_string(body, offset)
+    (data_size,) = _U64.unpack_from(body, offset)
+    return AttachmentIndex(
+        offset=0,
+        length=0,
+        log_time=log_time,
+        create_time=create_time,
+        data_size=data_size,
+        name=name,
+        media_type=media_type,
+    )
+
+
+def parse_metadata(body) -> MetadataIndex:
+    """Return a metadata index describing a metadata record body. Offset and length are left at 0."""
+    name, _ = _read_string(body, 0)
+    return MetadataIndex(offset=0, length=0, name=name)
+
+
+def parse_attachment_index(body) -> AttachmentIndex:
+    offset_, length, log_time, create_time, data_size = struct.unpack_from('<QQQQQ', body, 0)
+    name, offset = _read_string(body, 40)
+    media_type, _ = _read_string(body, offset)
+    return AttachmentIndex(
+        offset=offset_,
+        length=length,
+        log_time=log_time,
+        create_time=create_time,
+        data_size=data_size,
+        name=name,
+        media_type=media_type,
+    )
+
+
+def parse_metadata_index(body) -> MetadataIndex:
+    offset_, length = struct.unpack_from('<QQ', body, 0)
+    name, _ = _read_string(body, 16)
+    return MetadataIndex(offset=offset_, length=length, name=name)
+
+
+def parse_statistics(body) -> Statistics:
+    message_count, schema_count, channel_count, attachment_count, metadata_count, chunk_count, start, end = (
+        struct.unpack_from('<QHIIIIQQ', body, 0)
+    )
+    channel_message_counts, _ = _read_u16_u64_map(body, 42)
+    return Statistics(
+        message_count=message_count,
+        schema_count=schema_count,
+        channel_count=channel_count,
+        attachment_count=attachment_count,
+        metadata_count=metadata_count,
+        chunk_count=chunk_count,
+        message_start_time=start,
+        message_end_time=end,
+        channel_message_counts=channel_message_counts,
+    )
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Record serialization
+# --------------------------------------------------------------------------------------------------------------------
+
+
+def serialize_header(header: Header) -> bytes:
+    return record(Opcode.HEADER, _string(header.profile) + _string(header.library))
+
+
+def serialize_schema(schema: Schema) -> bytes:
+    return record(
+        Opcode.SCHEMA, _U16.pack(schema.id) + _string(schema.name) + _string(schema.encoding) + _bytes(schema.data)
+    )
+
+
+def serialize_channel(channel: Channel) -> bytes:
+    return record(
+        Opcode.CHANNEL,
+        struct.pack('<HH', channel.id, channel.schema_id)
+        + _string(channel.topic)
+        + _string(channel.message_encoding)
+        + _string_map(channel.metadata),
+    )
+
+
+def serialize_chunk_index(index: ChunkIndex) -> bytes:
+    return record(
+        Opcode.CHUNK_INDEX,
+        struct.pack(
+            '<QQQQ', index.message_start_time, index.message_end_time, index.chunk_start_offset, index.chunk_length
+        )
+        + _u16_u64_map(index.message_index_offsets)
+        + _U64.pack(index.message_index_length)
+        + _string(index.compression)
+        + struct.pack('<QQ', index.compressed_size, index.uncompressed_size),
+    )
+
+
+def serialize_attachment_index(index: AttachmentIndex) -> bytes:
+    return record(
+        Opcode.ATTACHMENT_INDEX,
+        struct.pack('<QQQQQ', index.offset, index.length, index.log_time, index.create_time, index.data_size)
+        + _string(index.name)
+        + _string(index.media_type),
+    )
+
+
+def serialize_metadata_index(index: MetadataIndex) -> bytes:
+    return record(Opcode.METADATA_INDEX, struct.pack('<QQ', index.offset, index.length) + _string(index.name))
+
+
+def serialize_statistics(statistics: Statistics) -> bytes:
+    return record(
+        Opcode.STATISTICS,
+        struct.pack(
+            '<QHIIIIQQ',
+            statistics.message_count,
+            statistics.schema_count,
+            statistics.channel_count,
+            statistics.attachment_count,
+            statistics.metadata_count,
+            statistics.chunk_count,
+            statistics.message_start_time,
+            statistics.message_end_time,
+        )
+        + _u16_u64_map(statistics.channel_message_counts),
+    )
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Compression
+# --------------------------------------------------------------------------------------------------------------------
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _lz4_frame():
+    try:
+        import lz4.frame
+    except ImportError:
+        return None
+    return lz4.frame
+
+
+def compression_available(compression: str) -> bool:
+    """Check whether chunks with the given compression can be (de)compressed in this environment."""
+    if compression == '':
+        return True
+    if compression == 'zstd':
+        return _zstd() is not None
+    if compression == 'lz4':
+        return _lz4_frame() is not None
+    return False
+
+
+def decompress(compression: str, data, uncompressed_size: int) -> bytes:
+    if compression == '':
+        return bytes(data)
+    if compression == 'zstd' and (zstd := _zstd()) is not None:
+        return zstd.ZstdDecompressor().decompress(data, max_output_size=uncompressed_size)
+    if compression == 'lz4' and (lz4_frame := _lz4_frame()) is not None:
+        return lz4_frame.decompress(data)
+    raise McapError(f"Unsupported or unavailable chunk compression: '{compression}'")
+
+
+def compress(compression: str, data: bytes, level: Optional[int] = None) -> bytes:
+    if compression == '':
+        return data
+    if compression == 'zstd' and (zstd := _zstd()) is not None:
+        return zstd.ZstdCompressor(level=3 if level is None else level).compress(data)
+    if compression == 'lz4' and (lz4_frame := _lz4_frame()) is not None:
+        return lz4_frame.compress(data, compression_level=0 if level is None else level)
+    raise McapError(f"Unsupported or unavailable chunk compression: '{compression}'")
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Reading
+# --------------------------------------------------------------------------------------------------------------------
+
+
+def iter_records(buf) -> Iterator[tuple[int, int, memoryview]]:
+    """Iterate over (opcode, record offset, body) of the records contained in a buffer, e.g. a chunk."""
+    view = memoryview(buf)
+    offset = 0
+    end = len(view)
+    header_size = _RECORD_HEADER.size
+    while offset + header_size <= end:
+        opcode, length = _RECORD_HEADER.unpack_from(view, offset)
+        body_start = offset + header_size
+        yield opcode, offset, view[body_start : body_start + length]
+        offset = body_start + length
+
+
+def read_record(stream: BinaryIO) -> Optional[tuple[int, bytes]]:
+    """Read the next (opcode, body) record from a stream. Returns None at end of stream."""
+    header = stream.read(_RECORD_HEADER.size)
+    if len(header) < _RECORD_HEADER.size:
+        return None
+    opcode, length = _RECORD_HEADER.unpack(header)
+    body = stream.read(length)
+    if len(body) < length:
+        raise McapError('Unexpected end of MCAP stream')
+    return opcode, body
+
+
+class McapSummary:
+    """Contents of the summary section of an MCAP file."""
+
+    def __init__(self, header: Header, summary_start: int = 0):
+        self.header = header
+        self.summary_start = summary_start
+        self.schemas: dict[int, Schema] = {}
+        self.channels: dict[int, Channel] = {}
+        self.chunk_indexes: list[ChunkIndex] = []
+        self.attachment_indexes: list[AttachmentIndex] = []
+        self.metadata_indexes: list[MetadataIndex] = []
+        self.statistics: Optional[Statistics] = None
+
+
+def read_summary(stream: BinaryIO) -> Optional[McapSummary]:
+    """Read the header and summary section of a seekable MCAP stream.
+
+    Returns:
+        McapSummary, or None if the file was written without a summary section.
+    """
+    stream.seek(0)
+    if stream.read(len(MCAP_MAGIC)) != MCAP_MAGIC:
+        raise McapError('Not an MCAP file: bad magic')
+    first = read_record(stream)
+    if first is None or first[0] != Opcode.HEADER:
+        raise McapError('MCAP file does not start with a header record')
+    header = parse_header(first[1])
+
+    stream.seek(-(_FOOTER_RECORD_SIZE + len(MCAP_MAGIC)), 2)
+    footer_start = stream.tell()
+    footer = stream.read(_FOOTER_RECORD_SIZE)
+    if stream.read(len(MCAP_MAGIC)) != MCAP_MAGIC:
+        raise McapError('MCAP file is truncated: missing trailing magic')
+    opcode, _ = _RECORD_HEADER.unpack_from(footer, 0)
+    if opcode != Opcode.FOOTER:
+        raise McapError('MCAP file is truncated: missing footer record')
+    summary_start, _, _ = _FOOTER.unpack_from(footer, _RECORD_HEADER.size)
+    if summary_start == 0:
+        return None
+
+    stream.seek(summary_start)
+    summary_bytes = stream.read(footer_start - summary_start)
+
+    summary = McapSummary(header, summary_start)
+    for opcode, _, body in iter_records(summary_bytes):
+        if opcode == Opcode.SCHEMA:
+            schema = parse_schema(body)
+            summary.schemas[schema.id] = schema
+        elif opcode == Opcode.CHANNEL:
+            channel = parse_channel(body)
+            summary.channels[channel.id] = channel
+        elif opcode == Opcode.CHUNK_INDEX:
+            summary.chunk_indexes.append(parse_chunk_index(body))
+        elif opcode == Opcode.ATTACHMENT_INDEX:
+            summary.attachment_indexes.append(parse_attachment_index(body))
+        elif opcode == Opcode.METADATA_INDEX:
+            summary.metadata_indexes.append(parse_metadata_index(body))
+        elif opcode == Opcode.STATISTICS:
+            summary.statistics = parse_statistics(body)
+    summary.chunk_indexes.sort(key=lambda index: index.chunk_start_offset)
+    return summary
+
+
+# --------------------------------------------------------------------------------------------------------------------
+# Writing
+# --------------------------------------------------------------------------------------------------------------------
+
+
+class McapWriter:
+    """Write a chunked, indexed MCAP file.
+
+    Messages are buffered into chunks which are compressed and indexed on flush. Chunks read from another
+    MCAP file can also be appended verbatim with ``add_raw_chunk``, in which case only their index records
+    are rewritten.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        *,
+        compression: str = 'zstd',
+        compression_level: Optional[int] = None,
+        chunk_size: int = 1024 * 1024,
+    ):
+        self._stream = stream
+        self._offset = 0
+        self.compression = compression if compression_available(compression) else ''
+        self.compression_level = compression_level
+        self.chunk_size = chunk_size
+
+        self._schemas: dict[int, Schema] = {}
+        self._channels: dict[int, Channel] = {}
+        self._chunk_indexes: list[ChunkIndex] = []
+        self._attachment_indexes: list[AttachmentIndex] = []
+        self._metadata_indexes: list[MetadataIndex] = []
+
+        self._message_count = 0
+        self._channel_message_counts: dict[int, int] = {}
+        self._message_start_time: Optional[int] = None
+        self._message_end_time = 0
+
+        self._chunk_buffer = bytearray()
+        self._chunk_message_indexes: dict[int, list[tuple[int, int]]] = {}
+        self._chunk_start_time: Optional[int] = None
+        self._chunk_end_time = 0
+
+    def _write(self, data) -> int:
+        offset = self._offset
+        self._stream.write(data)
+        self._offset += len(data)
+        return offset
+
+    def _update_time_range(self, start: int, end: int):
+        if self._message_start_time is None or start < self._message_start_time:
+            self._message_start_time = start
+        if end > self._message_end_time:
+            self._message_end_time = end
+
+    def start(self, header: Header):
+        self._write(MCAP_MAGIC)
+        self._write(serialize_header(header))
+
+    def add_schema(self, schema: Schema):
+        if schema.id in self._schemas:
+            return
+        self._schemas[schema.id] = schema
+        self._write(serialize_schema(schema))
+
+    def add_channel(self, channel: Channel):
+        if channel.id in self._channels:
+            return
+        self._channels[channel.id] = channel
+        self._write(serialize_channel(channel))
+
+    def add_message_record(self, body):
+        """Buffer a raw message record body into the current chunk."""
+        channel_id, _, log_time, _ = _MESSAGE_HEAD.unpack_from(body, 0)
+        offset = len(self._chunk_buffer)
+        self._chunk_buffer += _RECORD_HEADER.pack(Opcode.MESSAGE, len(body))
+        self._chunk_buffer += body
+        self._chunk_message_indexes.setdefault(channel_id, []).append((log_time, offset))
+        if self._chunk_start_time is None or log_time < self._chunk_start_time:
+            self._chunk_start_time = log_time
+        if log_time > self._chunk_end_time:
+            self._chunk_end_time = log_time
+        if len(self._chunk_buffer) >= self.chunk_size:
+            self.flush_chunk()
+
+    def add_message(self, channel_id: int, sequence: int, log_time: int, publish_time: int, data: bytes):
+        self.add_message_record(_MESSAGE_HEAD.pack(channel_id, sequence, log_time, publish_time) + data)
+
+    def flush_chunk(self, compression: Optional[str] = None):
+        """Compress and write the buffered messages as a chunk followed by its message indexes."""
+        if not self._chunk_message_indexes:
+            return
+        compression = self.compression if compression is None else compression
+        uncompressed = bytes(self._chunk_buffer)
+        compressed = compress(compression, uncompressed, self.compression_level)
+        start_time = self._chunk_start_time or 0
+        end_time = self._chunk_end_time
+
+        chunk_body = (
+            struct.pack('<QQQI', start_time, end_time, len(uncompressed), zlib.crc32(uncompressed))
+            + _string(compression)
+            + _U64.pack(len(compressed))
+        )
+        chunk_start_offset = self._write(_RECORD_HEADER.pack(Opcode.CHUNK, len(chunk_body) + len(compressed)))
+        self._write(chunk_body)
+        self._write(compressed)
+        chunk_length = self._offset - chunk_start_offset
+
+        message_index_start = self._offset
+        message_index_offsets = {}
+        channel_counts = {}
+        for channel_id, entries in self._chunk_message_indexes.items():
+            entries.sort()
+            entries_bytes = b''.join(_MESSAGE_INDEX_ENTRY.pack(*entry) for entry in entries)
+            message_index_offsets[channel_id] = self._write(
+                record(Opcode.MESSAGE_INDEX, _U16.pack(channel_id) + _U32.pack(len(entries_bytes)) + entries_bytes)
+            )
+            channel_counts[channel_id] = len(entries)
+
+        self._append_chunk_index(
+            ChunkIndex(
+                message_start_time=start_time,
+                message_end_time=end_time,
+                chunk_start_offset=chunk_start_offset,
+                chunk_length=chunk_length,
+                message_index_offsets=message_index_offsets,
+                message_index_length=self._offset - message_index_start,
+                compression=compression,
+                compressed_size=len(compressed),
+                uncompressed_size=len(uncompressed),
+            ),
+            channel_counts,
+        )
+
+        self._chunk_buffer = bytearray()
+        self._chunk_message_indexes = {}
+        self._chunk_start_time = None
+        self._chunk_end_time = 0
+
+    def add_raw_chunk(self, chunk_record: bytes, message_index_block: bytes, index: ChunkIndex):
+        """Append a chunk record and its message index records copied verbatim from another MCAP file.
+
+        Args:
+            chunk_record: The complete chunk record (opcode, length and body)
+            message_index_block: The message index records that followed the chunk in its source file
+            index: The chunk index of the chunk in its source file
+        """
+        self.flush_chunk()
+        chunk_start_offset = self._write(chunk_record)
+        message_index_start = self._write(message_index_block)
+
+        source_block_start = index.chunk_start_offset + index.chunk_length
+        message_index_offsets = {}
+        channel_counts = {}
+        for channel_id, source_offset in index.message_index_offsets.items():
+            relative = source_offset - source_block_start
+            message_index_offsets[channel_id] = message_index_start + relative
+            _, count = parse_message_index_count(
+                memoryview(message_index_block)[relative + _RECORD_HEADER.size : relative + _RECORD_HEADER.size + 6]
+            )
+            channel_counts[channel_id] = count
+
+        self._append_chunk_index(
+            index._replace(
+                chunk_start_offset=chunk_start_offset,
+                chunk_length=len(chunk_record),
+                message_index_offsets=message_index_offsets,
+                message_index_length=len(message_index_block),
+            ),
+            channel_counts,
+        )
+
+    def _append_chunk_index(self, index: ChunkIndex, channel_counts: dict[int, int]):
+        self._chunk_indexes.append(index)
+        count = sum(channel_counts.values())
+        if count:
+            self._message_count += count
+            for channel_id, channel_count in channel_counts.items():
+                self._channel_message_counts[channel_id] = (
+                    self._channel_message_counts.get(channel_id, 0) + channel_count
+                )
+            self._update_time_range(index.message_start_time, index.message_end_time)
+
+    def add_raw_attachment(self, attachment_record: bytes, index: AttachmentIndex):
+        """Append an attachment record copied verbatim from another MCAP file."""
+        self.flush_chunk()
+        offset = self._write(attachment_record)
+        self._attachment_indexes.append(index._replace(offset=offset, length=len(attachment_record)))
+
+    def add_raw_metadata(self, metadata_record: bytes, index: MetadataIndex):
+        """Append a metadata record copied verbatim from another MCAP file."""
+        self.flush_chunk()
+        offset = self._write(metadata_record)
+        self._metadata_indexes.append(index._replace(offset=offset, length=len(metadata_record)))
+
+    def finish(self):
+        """Flush pending messages and write the data end record, summary section and footer."""
+        self.flush_chunk()
+        self._write(record(Opcode.DATA_END, _U32.pack(0)))
+
+        summary_start = self._offset
+        summary = bytearray()
+        summary_offsets = []
+
+        def add_group(opcode: Opcode, records: list[bytes]):
+            if not records:
+                return
+            group_start = summary_start + len(summary)
+            for group_record in records:
+                summary.extend(group_record)
+            summary_offsets.append(
+                record(
+                    Opcode.SUMMARY_OFFSET,
+                    struct.pack('<BQQ', opcode, group_start, summary_start + len(summary) - group_start),
+                )
+            )
+
+        statistics = Statistics(
+            message_count=self._message_count,
+            schema_count=len(self._schemas),
+            channel_count=len(self._channels),
+            attachment_count=len(self._attachment_indexes),
+            metadata_count=len(self._metadata_indexes),
+            chunk_count=len(self._chunk_indexes),
+            message_start_time=self._message_start_time or 0,
+            message_end_time=self._message_end_time,
+            channel_message_counts=self._channel_message_counts,
+        )
+
+        add_group(Opcode.SCHEMA, [serialize_schema(schema) for schema in self._schemas.values()])
+        add_group(Opcode.CHANNEL, [serialize_channel(channel) for channel in self._channels.values()])
+        add_group(Opcode.STATISTICS, [serialize_statistics(statistics)])
+        add_group(Opcode.CHUNK_INDEX, [serialize_chunk_index(index) for index in self._chunk_indexes])
+        add_group(Opcode.ATTACHMENT_INDEX, [serialize_attachment_index(index) for index in self._attachment_indexes])
+        add_group(Opcode.METADATA_INDEX, [serialize_metadata_index(index) for index in self._metadata_indexes])
+
+        summary_offset_start = summary_start + len(summary)
+        for summary_offset in summary_offsets:
+            summary.extend(summary_offset)
+
+        footer_prefix = _RECORD_HEADER.pack(Opcode.FOOTER, _FOOTER.size) + _U64.pack(summary_start)
+        footer_prefix += _U64.pack(summary_offset_start)
+        summary_crc = zlib.crc32(footer_prefix, zlib.crc32(summary))
+
+        self._write(summary)
+        self._write(footer_prefix + _U32.pack(summary_crc))
+        self._write(MCAP_MAGIC)
@@ -0,0 +1,306 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import bisect
+import heapq
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple, Optional
+
+import rosbag2_py
+from rclpy.serialization import deserialize_message
+
+from .columnar import load_topic_table
+from .logging_config import get_logger
+from .reader import get_message_type, get_sequential_mcap_reader
+
+_logger_ = get_logger()
+
+DEFAULT_MAX_MEMORY_BYTES = 512 * 1024 * 1024
+
+
+class _SpilledMessage(NamedTuple):
+    offset: int
+    size: int
+
+
+class _TopicMessages:
+    """Messages of one topic in log time order. Each entry is serialized data in memory or spilled to disk."""
+
+    def __init__(self, msg_type):
+        self.msg_type = msg_type
+        self.timestamps: list[int] = []
+        self.sequence: list[int] = []
+        self.entries: list = []
+
+
+class MessageStore:
+    """Read-once store of the messages of a run fixture, shared by all analyze test methods.
+
+    Topics are read from the bag the first time any test asks for them, in a single pass for all topics
+    requested at once. Serialized messages are kept in memory up to `max_memory_bytes` and spilled to a
+    temporary file beyond that. Deserialized messages are cached in the remaining budget, counted at their
+    serialized size, and the least recently used ones are evicted to make room for more messages. Tests share
+    cached message objects and should not modify them.
+
+    Every call to `messages` or `reader` returns a new, independent iterator over the stored messages.
+    """
+
+    def __init__(
+        self,
+        mcap_path: Path,
+        max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+        spill_dir: Optional[Path] = None,
+    ):
+        self.mcap_path = Path(mcap_path)
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self.decoded_bytes = 0
+        self._decoded: OrderedDict[tuple[str, int], tuple[Any, int]] = OrderedDict()
+        self._spill_dir = spill_dir
+        self._spill_file = None
+        self._spill_size = 0
+        self._topics: dict[str, _TopicMessages] = {}
+        # Store-wide, so that (timestamp, sequence) orders the messages of topics read in different passes too
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+        reader = get_sequential_mcap_reader(self.mcap_path)
+        self._topic_metadata = reader.get_all_topics_and_types()
+        self._topic_types = {topic_metadata.name: topic_metadata.type for topic_metadata in self._topic_metadata}
+
+    @property
+    def spilled_bytes(self) -> int:
+        return self._spill_size
+
+    def get_all_topics_and_types(self) -> list:
+        return list(self._topic_metadata)
+
+    def messages(
+        self,
+        topics: Optional[list[str]] = None,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+    ) -> Iterator[tuple[str, Any, int]]:
+        """Iterate over deserialized messages of the given topics in log time order.
+
+        Args:
+            topics: Topics to read, all topics if empty or None
+            start_time: Only return messages logged at or after this time, in nanoseconds since the epoch
+            end_time: Only return messages logged at or before this time, in nanoseconds since the epoch
+
+        Yields:
+            Tuples of (topic_name, ros_msg, timestamp), like `read_messages`
+        """
+        for topic_name, index in self._iter_indexes(topics, start_time, end_time):
+            yield topic_name, self._deserialize(topic_name, index), self._topics[topic_name].timestamps[index]
+
+    def serialized_messages(
+        self,
+        topics: Optional[list[str]] = None,
+        start_time: Optional[int] = None,
+        end_time: Optional[int] = None,
+    ) -> Iterator[tuple[str, bytes, int]]:
+        """Iterate over serialized messages of the given topics in log time order, see `messages`.
+
+        Yields:
+            Tuples of (topic_name, data, timestamp), like `rosbag2_py.SequentialReader.read_next`
+        """
+        for topic_name, index in self._iter_indexes(topics, start_time, end_time):
+            topic_messages = self._topics[topic_name]
+            yield topic_name, self._data(topic_messages.entries[index]), topic_messages.timestamps[index]
+
+    def load(self, topics: list[str]):
+        """Read the given topics into the store in a single pass, if they have not been read yet."""
+        self._load(sorted(set(topics) & set(self._topic_types)))
+
+    def table(self, topic: str, columns: Optional[list[str]] = None):
+        """Load a topic as a pyarrow.Table, cached as Parquet next to the run fixture, see `load_topic_table`."""
+        return load_topic_table(self.mcap_path, topic, columns)
+
+    def reader(self) -> 'StoredMessageReader':
+        """Create a reader over the store with the interface of a rosbag2_py.SequentialReader."""
+        return StoredMessageReader(self)
+
+    def close(self):
+        """Release the spill file. The store cannot be used afterwards."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._topics.clear()
+        self._decoded.clear()
+        self.decoded_bytes = 0
+
+    def _iter_indexes(
+        self, topics: Optional[list[str]], start_time: Optional[int] = None, end_time: Optional[int] = None
+    ) -> Iterator[tuple[str, int]]:
+        for _, _, topic_name, index in self._iter_entries(topics, start_time, end_time):
+            yield topic_name, index
+
+    def _iter_entries(
+        self, topics: Optional[list[str]], start_time: Optional[int] = None, end_time: Optional[int] = None
+    ) -> Iterator[tuple[int, int, str, int]]:
+        """Iterate over (timestamp, sequence, topic_name, index) of the stored messages in log time order."""
+        topic_names = sorted(set(topics) & set(self._topic_types)) if topics else sorted(self._topic_types)
+        self._load(topic_names)
+
+        def indexes(topic_name: str):
+            topic_messages = self._topics[topic_name]
+            timestamps = topic_messages.timestamps
+            first = 0 if start_time is None else bisect.bisect_left(timestamps, start_time)
+            last = len(timestamps) if end_time is None else bisect.bisect_right(timestamps, end_time)
+            for index in range(first, last):
+                yield timestamps[index], topic_messages.sequence[index], topic_name, index
+
+        return heapq.merge(*(indexes(topic_name) for topic_name in topic_names))
+
+    def _load(self, topic_names: list[str]):
+        with self._lock:
+            missing_topics = [topic_name for topic_name in topic_names if topic_name not in self._topics]
+            if not missing_topics:
+                return
+
+            _logger_.debug(f'Reading {missing_topics} from {self.mcap_path} into the message store')
+            topics = {
+                topic_name: _TopicMessages(get_message_type(self._topic_types[topic_name]))
+                for topic_name in missing_topics
+            }
+            reader = get_sequential_mcap_reader(self.mcap_path)
+            reader.set_filter(rosbag2_py.StorageFilter(topics=missing_topics))
+            while reader.has_next():
+                topic_name, data, timestamp = reader.read_next()
+                topic_messages = topics.get(topic_name)
+                if topic_messages is None:
+                    continue
+                topic_messages.timestamps.append(timestamp)
+                topic_messages.sequence.append(self._sequence)
+                topic_messages.entries.append(self._keep(bytes(data)))
+                self._sequence += 1
+            self._topics.update(topics)
+
+    def _evict_decoded(self, size: int) -> bool:
+        """Evict least recently used decoded messages until `size` more bytes fit in the budget."""
+        while self._decoded and self.memory_bytes + self.decoded_bytes + size > self.max_memory_bytes:
+            _, (_, decoded_size) = self._decoded.popitem(last=False)
+            self.decoded_bytes -= decoded_size
+        return self.memory_bytes + self.decoded_bytes + size <= self.max_memory_bytes
+
+    def _keep(self, data: bytes):
+        # Serialized messages take precedence over cached decoded ones
+        if self._evict_decoded(len(data)):
+            self.memory_bytes += len(data)
+            return data
+
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix='message_store_', dir=self._spill_dir)
+            _logger_.info(f'Message store for {self.mcap_path} exceeds {self.max_memory_bytes} bytes, spilling to disk')
+        self._spill_file.write(data)
+        spilled = _SpilledMessage(self._spill_size, len(data))
+        self._spill_size += len(data)
+        return spilled
+
+    def _data(self, entry) -> bytes:
+        if not isinstance(entry, _SpilledMessage):
+            return entry
+        with self._lock:
+            self._spill_file.flush()
+        # pread does not move the file position, so concurrent iterators don't interfere
+        return os.pread(self._spill_file.fileno(), entry.size, entry.offset)
+
+    def _deserialize(self, topic_name: str, index: int):
+        topic_messages = self._topics[topic_name]
+        entry = topic_messages.entries[index]
+        if isinstance(entry, _SpilledMessage):
+            return deserialize_message(self._data(entry), topic_messages.msg_type)
+
+        key = (topic_name, index)
+        with self._lock:
+            cached = self._decoded.get(key)
+            if cached is not None:
+                self._decoded.move_to_end(key)
+                return cached[0]
+
+        msg = deserialize_message(entry, topic_messages.msg_type)
+        with self._lock:
+            if key not in self._decoded and self._evict_decoded(len(entry)):
+                self._decoded[key] = (msg, len(entry))
+                self.decoded_bytes += len(entry)
+        return msg
+
+
+class StoredMessageReader:
+    """Independent cursor over a MessageStore with the reading interface of a rosbag2_py.SequentialReader.
+
+    Like a SequentialReader, filters and seeks apply to the messages after the cursor, and `read_messages` on
+    this reader continues from the cursor. It reuses the messages already deserialized by the store.
+    """
+
+    def __init__(self, store: MessageStore):
+        self.store = store
+        self._topics: Optional[list[str]] = None
+        self._start_time: Optional[int] = None
+        # (timestamp, sequence) of the last message read, messages up to it are skipped
+        self._position: Optional[tuple[int, int]] = None
+        self._iterator = None
+        self._next = None
+
+    def get_all_topics_and_types(self) -> list:
+        return self.store.get_all_topics_and_types()
+
+    def get_metadata(self):
+        return get_sequential_mcap_reader(self.store.mcap_path).get_metadata()
+
+    def set_filter(self, storage_filter):
+        self._topics = list(storage_filter.topics) or None
+        self._iterator = None
+
+    def reset_filter(self):
+        self._topics = None
+        self._iterator = None
+
+    def seek(self, timestamp: int):
+        self._start_time = timestamp
+        self._position = None
+        self._iterator = None
+
+    def has_next(self) -> bool:
+        if self._iterator is None:
+            entries = self.store._iter_entries(self._topics, self._start_time)
+            if self._position is not None:
+                entries = (entry for entry in entries if entry[:2] > self._position)
+            self._iterator = entries
+            self._next = None
+        if self._next is None:
+            self._next = next(self._iterator, None)
+        return self._next is not None
+
+    def _advance(self) -> tuple[int, int, str, int]:
+        if not self.has_next():
+            raise StopIteration('No more messages')
+        entry, self._next = self._next, None
+        self._position = entry[:2]
+        return entry
+
+    def read_next(self) -> tuple[str, bytes, int]:
+        timestamp, _, topic_name, index = self._advance()
+        return topic_name, self.store._data(self.store._topics[topic_name].entries[index]), timestamp
+
+    def read_next_message(self) -> tuple[str, Any, int]:
+        """Read the next message deserialized, reusing the message object cached by the store."""
+        timestamp, _, topic_name, index = self._advance()
+        return topic_name, self.store._deserialize(topic_name, index), timestamp
@@ -0,0 +1,202 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Zero-copy NumPy views over serialized PointCloud2, Image and LaserScan messages.
+
+The helpers take the serialized message `data` as returned by `read_next()` or `read_serialized_messages` and
+return arrays that share memory with it, so the point, pixel and range payloads are never copied into a
+message object. The views are read-only, as the serialized data is immutable `bytes`.
+"""
+
+import functools
+import re
+from typing import NamedTuple
+
+import numpy as np
+
+from .cdr import CdrDecoder
+
+_HEADER_DEFINITION = """
+================================================================================
+MSG: std_msgs/Header
+builtin_interfaces/Time stamp
+string frame_id
+================================================================================
+MSG: builtin_interfaces/Time
+int32 sec
+uint32 nanosec
+"""
+
+# These definitions have been stable since ROS 2 Ardent, so the views don't need sensor_msgs to be installed
+_DEFINITIONS = {
+    'sensor_msgs/msg/PointCloud2': """
+std_msgs/Header header
+uint32 height
+uint32 width
+PointField[] fields
+bool is_bigendian
+uint32 point_step
+uint32 row_step
+uint8[] data
+bool is_dense
+================================================================================
+MSG: sensor_msgs/PointField
+string name
+uint32 offset
+uint8 datatype
+uint32 count
+"""
+    + _HEADER_DEFINITION,
+    'sensor_msgs/msg/Image': """
+std_msgs/Header header
+uint32 height
+uint32 width
+string encoding
+uint8 is_bigendian
+uint32 step
+uint8[] data
+"""
+    + _HEADER_DEFINITION,
+    'sensor_msgs/msg/LaserScan': """
+std_msgs/Header header
+float32 angle_min
+float32 angle_max
+float32 angle_increment
+float32 time_increment
+float32 scan_time
+float32 range_min
+float32 range_max
+float32[] ranges
+float32[] intensities
+"""
+    + _HEADER_DEFINITION,
+}
+
+# sensor_msgs/PointField datatype constants
+POINT_FIELD_DTYPES = {1: 'i1', 2: 'u1', 3: 'i2', 4: 'u2', 5: 'i4', 6: 'u4', 7: 'f4', 8: 'f8'}
+
+# Element type and channel count of sensor_msgs/Image encodings, see sensor_msgs/image_encodings.hpp
+IMAGE_ENCODINGS = {
+    'mono8': ('u1', 1),
+    'mono16': ('u2', 1),
+    'rgb8': ('u1', 3),
+    'bgr8': ('u1', 3),
+    'rgba8': ('u1', 4),
+    'bgra8': ('u1', 4),
+    'rgb16': ('u2', 3),
+    'bgr16': ('u2', 3),
+    'rgba16': ('u2', 4),
+    'bgra16': ('u2', 4),
+    'yuv422': ('u1', 2),
+    'yuv422_yuy2': ('u1', 2),
+    'uyvy': ('u1', 2),
+    'yuyv': ('u1', 2),
+}
+_OPENCV_ENCODING = re.compile(r'(8|16|32|64)([USF])C(\d+)')
+_OPENCV_KINDS = {'U': 'u', 'S': 'i', 'F': 'f'}
+_BAYER_ENCODING = re.compile(r'bayer_\w+(8|16)')
+
+
+class LaserScanArrays(NamedTuple):
+    # Angle of every range, in radians
+    angles: np.ndarray
+    ranges: np.ndarray
+    intensities: np.ndarray
+
+
+@functools.lru_cache(maxsize=None)
+def _decoder(type_name: str) -> CdrDecoder:
+    return CdrDecoder.from_definition(type_name, _DEFINITIONS[type_name])
+
+
+def pointcloud2_to_array(data) -> np.ndarray:
+    """View the points of a serialized sensor_msgs/PointCloud2 as a structured NumPy array.
+
+    The array has shape (height, width) and one field per point field, laid out as described by the message's
+    point fields, point step and row step, so padding between fields and rows is skipped without copying.
+
+    Args:
+        data: Serialized PointCloud2 message
+
+    Returns:
+        np.ndarray: Structured array, e.g. `points['x']`, sharing memory with `data`
+    """
+    msg = _decoder('sensor_msgs/msg/PointCloud2').decode(data)
+    byte_order = '>' if msg.is_bigendian else '<'
+    fields = [field for field in msg.fields if field.name]
+    for field in fields:
+        if field.datatype not in POINT_FIELD_DTYPES:
+            raise ValueError(f'Unknown PointField datatype {field.datatype} of field {field.name}')
+    dtype = np.dtype({
+        'names': [field.name for field in fields],
+        'formats': [
+            byte_order + POINT_FIELD_DTYPES[field.datatype]
+            if field.count <= 1
+            else (byte_order + POINT_FIELD_DTYPES[field.datatype], (field.count,))
+            for field in fields
+        ],
+        'offsets': [field.offset for field in fields],
+        'itemsize': msg.point_step,
+    })
+    return np.ndarray(
+        shape=(msg.height, msg.width), dtype=dtype, buffer=msg.data, strides=(msg.row_step, msg.point_step)
+    )
+
+
+def _image_layout(encoding: str) -> tuple[str, int]:
+    if encoding in IMAGE_ENCODINGS:
+        return IMAGE_ENCODINGS[encoding]
+    match = _OPENCV_ENCODING.fullmatch(encoding)
+    if match:
+        bits, kind, channels = match.groups()
+        return f'{_OPENCV_KINDS[kind]}{int(bits) // 8}', int(channels)
+    match = _BAYER_ENCODING.fullmatch(encoding)
+    if match:
+        return f'u{int(match.group(1)) // 8}', 1
+    raise ValueError(f'Unsupported image encoding {encoding!r}')
+
+
+def image_to_array(data) -> np.ndarray:
+    """View the pixels of a serialized sensor_msgs/Image as a NumPy array.
+
+    The array has shape (height, width) for single channel encodings and (height, width, channels) otherwise.
+    Row padding, i.e. a step larger than the row width, is skipped using strides rather than a copy.
+
+    Args:
+        data: Serialized Image message
+
+    Returns:
+        np.ndarray: Pixel array sharing memory with `data`
+    """
+    msg = _decoder('sensor_msgs/msg/Image').decode(data)
+    element, channels = _image_layout(msg.encoding)
+    dtype = np.dtype(element).newbyteorder('>' if msg.is_bigendian else '<')
+    shape = (msg.height, msg.width) if channels == 1 else (msg.height, msg.width, channels)
+    strides = (msg.step, channels * dtype.itemsize, dtype.itemsize)[: len(shape)]
+    return np.ndarray(shape=shape, dtype=dtype, buffer=msg.data, strides=strides)
+
+
+def laserscan_to_arrays(data) -> LaserScanArrays:
+    """View the ranges and intensities of a serialized sensor_msgs/LaserScan as NumPy arrays.
+
+    Args:
+        data: Serialized LaserScan message
+
+    Returns:
+        LaserScanArrays: Angles of the ranges, plus ranges and intensities sharing memory with `data`
+    """
+    msg = _decoder('sensor_msgs/msg/LaserScan').decode(data)
+    angles = msg.angle_min + np.arange(len(msg.ranges), dtype=np.float32) * np.float32(msg.angle_increment)
+    return LaserScanArrays(angles, msg.ranges, msg.intensities)
@@ -15,10 +15,10 @@
 
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 import rosbag2_py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ReplayTestingPhase(Enum):
@@ -27,9 +27,81 @@ class ReplayTestingPhase(Enum):
     ANALYZE = 'analyze'
 
 
+class Downsample(BaseModel):
+    """Downsampling of a topic in filtered fixtures.
+
+    `max_rate` keeps at most that many messages per second of log time, `keep_every` keeps every Nth message.
+    If both are set, a message has to pass both.
+    """
+
+    max_rate: Optional[float] = Field(default=None, gt=0)
+    keep_every: Optional[int] = Field(default=None, ge=1)
+
+
+class FilterOptions(BaseModel):
+    """How filtered fixtures are produced beyond removing the expected output topics.
+
+    `downsample` thins out high-rate topics, keyed by topic name. Chunks containing them are rewritten.
+
+    Left unset, chunks are copied from the input fixture with their original compression and size. Setting
+    `compression` or `chunk_size` re-encodes every chunk, which costs filter time but can make playback
+    cheaper: uncompressed or lz4 chunks are much faster to decode than zstd.
+    """
+
+    downsample: dict[str, Downsample] = {}
+    compression: Optional[Literal['none', 'lz4', 'zstd']] = None
+    compression_level: Optional[int] = None
+    chunk_size: Optional[int] = None
+
+    @property
+    def mcap_compression(self) -> Optional[str]:
+        """Compression as written in MCAP chunk records, or None to keep the input compression."""
+        if self.compression is None:
+            return None
+        return '' if self.compression == 'none' else self.compression
+
+    @property
+    def reencodes(self) -> bool:
+        return self.compression is not None or self.compression_level is not None or self.chunk_size is not None
+
+    def copies_chunk(self, compression: str) -> bool:
+        """Whether an input chunk with the given compression can be copied to the output unchanged."""
+        return (
+            self.chunk_size is None and self.compression_level is None and self.mcap_compression in (None, compression)
+        )
+
+
 class RunnerArgs(BaseModel):
     use_clock: bool = True
     playback_rate: float = 1.0
+    # Re-encode the filtered fixture for this run, e.g. to compare playback with different compressions
+    filter_options: Optional[FilterOptions] = None
+    # 'cli' launches `ros2 bag play` and `ros2 bag record` for every run. 'rosbag2_py' plays and records with
+    # rosbag2_py in helper processes that are started once and reused by every run.
+    bag_backend: Literal['cli', 'rosbag2_py'] = 'cli'
+    # Number of messages the player reads ahead of playback, the rosbag2 default if None
+    read_ahead_queue_size: Optional[int] = Field(default=None, ge=1)
+
+
+class ReadinessConditions(BaseModel):
+    """Conditions the run must meet before playback starts, checked on its ROS graph.
+
+    The player starts paused and resumes as soon as the recorder has subscribed to every topic of the
+    filtered fixture whose message type is installed (unless `wait_for_recorder` is False) and all conditions
+    hold.
+
+    `nodes` are fully qualified names of nodes that must be running, e.g. '/planner'. `subscribed_topics` must
+    each have a subscription from a node other than the recorder. `lifecycle_states` maps lifecycle nodes to
+    the state they must be in, e.g. {'/planner': 'active'}. The run fails if it is not ready within `timeout`
+    seconds.
+    """
+
+    wait_for_recorder: bool = True
+    nodes: list[str] = []
+    subscribed_topics: list[str] = []
+    lifecycle_states: dict[str, str] = {}
+    timeout: float = Field(default=60.0, gt=0)
+    poll_interval: float = Field(default=0.01, gt=0)
 
 
 class ReplayRunParams(BaseModel):
@@ -37,6 +109,48 @@ class ReplayRunParams(BaseModel):
     params: dict = {}
     runner_args: RunnerArgs = RunnerArgs()
     ignore_playback_finish: bool = False
+    # Start playback at once if None, e.g. ReadinessConditions() waits for the recorder first
+    readiness: Optional[ReadinessConditions] = None
+
+
+class TopicRequirement(BaseModel):
+    """Requirements an input fixture must meet for a topic, checked from its summary section."""
+
+    min_message_count: int = 0
+    min_duration: float = 0.0
+
+
+class TimeWindow(BaseModel):
+    """Part of a fixture to replay, in seconds.
+
+    By default `start` and `end` are offsets from the first message of the fixture. With `absolute=True` they
+    are Unix timestamps. Either bound can be left out to keep the fixture from its start or up to its end.
+    """
+
+    start: Optional[float] = None
+    end: Optional[float] = None
+    absolute: bool = False
+
+    def resolve(self, bag_start_ns: Optional[int] = None) -> tuple[int, int]:
+        """Convert the window to absolute nanosecond bounds, both inclusive.
+
+        Args:
+            bag_start_ns: Log time of the first message of the fixture, required for relative windows
+
+        Returns:
+            tuple[int, int]: Start and end log time in nanoseconds
+        """
+        offset_ns = 0
+        if not self.absolute:
+            if bag_start_ns is None:
+                raise ValueError('Resolving a relative time window requires the start time of the fixture')
+            offset_ns = bag_start_ns
+
+        start_ns = offset_ns + int(self.start * 1e9) if self.start is not None else 0
+        end_ns = offset_ns + int(self.end * 1e9) if self.end is not None else 2**64 - 1
+        if end_ns < start_ns:
+            raise ValueError(f'Time window ends before it starts: {self}')
+        return max(start_ns, 0), end_ns
 
 
 class Mcap(BaseModel):
@@ -12,12 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import collections
+import functools
+import multiprocessing
+import operator
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable, Optional
 
+import numpy as np
 import rosbag2_py
 from rclpy.serialization import deserialize_message
 from rosidl_runtime_py.utilities import get_message
 
+from .cdr import CdrDecoder
+from .logging_config import get_logger
+
+_logger_ = get_logger()
+
 
 def get_sequential_mcap_reader(mcap_path: Path):
     reader = rosbag2_py.SequentialReader()
@@ -28,30 +42,303 @@ def get_sequential_mcap_reader(mcap_path: Path):
     return reader
 
 
-def read_messages(reader: rosbag2_py.SequentialReader, topics: list[str]):
+@functools.lru_cache(maxsize=None)
+def get_message_type(type_name: str):
+    """Look up the message class of a type name, e.g. 'geometry_msgs/msg/Twist', once per process."""
+    return get_message(type_name)
+
+
+@functools.lru_cache(maxsize=None)
+def get_cdr_decoder(type_name: str) -> Optional[CdrDecoder]:
+    """Get the fast CDR decoder for a message type, or None if the type is not supported by it."""
+    try:
+        return CdrDecoder.from_message_class(get_message_type(type_name))
+    except (AttributeError, ImportError, ValueError) as e:
+        _logger_.debug(f'No fast CDR decoder for {type_name}, falling back to deserialize_message: {e}')
+        return None
+
+
+def _read_records(reader, topics: list[str], start_time: Optional[int], end_time: Optional[int], read_next):
+    topic_set = set(topics) if topics else None
+    if topic_set is not None:
+        reader.set_filter(rosbag2_py.StorageFilter(topics=sorted(topic_set)))
+    if start_time is not None:
+        reader.seek(start_time)
+
+    try:
+        while reader.has_next():
+            topic_name, data, timestamp = read_next()
+            if end_time is not None and timestamp > end_time:
+                break
+
+            # Filter by topic if topics list is provided
+            if topic_set is None or topic_name in topic_set:
+                yield (topic_name, data, timestamp)
+    finally:
+        if topic_set is not None:
+            reader.reset_filter()
+
+
+def read_serialized_messages(
+    reader: rosbag2_py.SequentialReader,
+    topics: list[str],
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+):
+    """
+    Read serialized messages from specific topics in an MCAP file, without deserializing them.
+
+    Takes the same arguments as `read_messages`.
+
+    Yields:
+        Tuples of (topic_name, data, timestamp) where data is the CDR serialized message
+    """
+    yield from _read_records(reader, topics, start_time, end_time, reader.read_next)
+
+
+DEFAULT_DECODE_BATCH_SIZE = 256
+
+
+def _deserialize_batch(batch: list[tuple[str, bytes, int]], topic_types: dict[str, str]) -> list[tuple]:
+    return [
+        (topic_name, deserialize_message(data, get_message_type(topic_types[topic_name])), timestamp)
+        for topic_name, data, timestamp in batch
+    ]
+
+
+_decode_executors: dict[int, ProcessPoolExecutor] = {}
+_decode_executors_pid = os.getpid()
+_decode_executors_lock = threading.Lock()
+
+
+def _get_decode_executor(workers: int) -> ProcessPoolExecutor:
+    """Process pool with `workers` processes, started on first use and shared by all later reads.
+
+    Workers are started by a forkserver rather than forked, so they never inherit the locks of threads that run
+    when the pool starts, e.g. those of a pipelined runner. Pools of a parent process are not used after a fork.
+    """
+    global _decode_executors_pid
+    with _decode_executors_lock:
+        if _decode_executors_pid != os.getpid():
+            _decode_executors.clear()
+            _decode_executors_pid = os.getpid()
+        if workers not in _decode_executors:
+            _decode_executors[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('forkserver')
+            )
+        return _decode_executors[workers]
+
+
+def _deserialize_in_pool(messages, topic_types: dict[str, str], workers: int, batch_size: int):
+    """Deserialize batches of messages in a process pool, yielding them in their original order.
+
+    At most two batches per worker are in flight, so memory use does not grow with the length of the bag.
+    """
+    executor = _get_decode_executor(workers)
+    pending = collections.deque()
+    try:
+        batch = []
+        for message in messages:
+            batch.append(message)
+            if len(batch) < batch_size:
+                continue
+            pending.append(executor.submit(_deserialize_batch, batch, topic_types))
+            batch = []
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        if batch:
+            pending.append(executor.submit(_deserialize_batch, batch, topic_types))
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        # The pool outlives this read, only drop the batches it no longer needs
+        for future in pending:
+            future.cancel()
+
+
+def read_messages(
+    reader: rosbag2_py.SequentialReader,
+    topics: list[str],
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    workers: int = 1,
+    batch_size: int = DEFAULT_DECODE_BATCH_SIZE,
+):
     """
     Read and deserialize messages from specific topics in an MCAP file.
 
+    The topics are passed to the storage layer as a rosbag2 StorageFilter, so messages on other topics are
+    skipped by the storage plugin without being returned to Python. Readers of a MessageStore, such as
+    `self.message_store.reader()` in @analyze test methods, reuse the messages the store has already read and
+    deserialized.
+
+    With a start time, the reader seeks to it first, which lets the MCAP storage plugin skip every chunk that
+    ends before it using the chunk index instead of reading the bag from the start. Reading stops at the first
+    message after the end time.
+
     Args:
         reader: SequentialReader instance from get_sequential_mcap_reader
         topics: List of topic names to read from
+        start_time: Only read messages logged at or after this time, in nanoseconds since the epoch
+        end_time: Only read messages logged at or before this time, in nanoseconds since the epoch
+        workers: Number of processes to deserialize messages in, for heavy topics. Messages are sent to them in
+            batches of `batch_size` and still yielded in log time order. 0 uses one worker per CPU.
+        batch_size: Number of messages per batch sent to a worker process
 
     Yields:
         Tuples of (topic_name, ros_msg, timestamp) where ros_msg is the deserialized ROS2 message
     """
-    topic_set = set(topics) if topics else None
+    from .message_store import StoredMessageReader
+
+    if isinstance(reader, StoredMessageReader):
+        # Continue from the reader's cursor, reusing the messages already deserialized by the store
+        yield from _read_records(reader, topics, start_time, end_time, reader.read_next_message)
+        return
+
+    topic_types = {
+        topic_metadata.name: topic_metadata.type
+        for topic_metadata in reader.get_all_topics_and_types()
+        if not topics or topic_metadata.name in topics
+    }
+    messages = read_serialized_messages(reader, topics, start_time, end_time)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        yield from _deserialize_in_pool(messages, topic_types, workers, batch_size)
+        return
+
+    # Look up the message type of each topic once, rather than for every message
+    msg_types = {topic_name: get_message_type(type_name) for topic_name, type_name in topic_types.items()}
+    for topic_name, data, timestamp in messages:
+        yield (topic_name, deserialize_message(data, msg_types[topic_name]), timestamp)
+
+
+DEFAULT_COLUMN_BATCH_SIZE = 4096
+
+
+def _to_column_value(value):
+    # builtin_interfaces/Time and Duration become integer nanoseconds, so stamps can be compared to timestamps
+    if hasattr(value, 'sec') and hasattr(value, 'nanosec'):
+        return value.sec * 1_000_000_000 + value.nanosec
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def _field_extractor(msg_type, fields: tuple[str, ...]) -> Callable:
+    """Build a function returning the values of the dotted fields of a message, once per message type."""
+    getters = [operator.attrgetter(field) for field in fields]
+    return lambda msg: [_to_column_value(getter(msg)) for getter in getters]
+
+
+def _to_array(values: list) -> np.ndarray:
+    try:
+        return np.asarray(values)
+    except ValueError:
+        # Variable length sequence fields can't form a regular array
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+
+
+def read_columns(
+    reader: rosbag2_py.SequentialReader,
+    topic: str,
+    fields: list[str],
+    start_time: Optional[int] = None,
+    end_time: Optional[int] = None,
+    batch_size: int = DEFAULT_COLUMN_BATCH_SIZE,
+) -> dict[str, np.ndarray]:
+    """
+    Read fields of all messages on a topic into NumPy arrays, for vectorized assertions.
+
+    Messages are read in batches of `batch_size`. When all fields are primitives, strings, sequences of
+    primitives or times, each batch is decoded straight from the serialized messages by the fast CDR decoder,
+    without deserializing every message. Otherwise messages are deserialized and the values collected with a
+    field extractor that is built once per message type. `builtin_interfaces` Time and Duration fields, such
+    as `header.stamp`, are converted to integer nanoseconds.
+
+    Args:
+        reader: SequentialReader instance from get_sequential_mcap_reader
+        topic: Topic to read
+        fields: Dotted field paths to read, e.g. ['header.stamp', 'twist.linear.x']
+        start_time: Only read messages logged at or after this time, in nanoseconds since the epoch
+        end_time: Only read messages logged at or before this time, in nanoseconds since the epoch
+        batch_size: Number of messages to collect before converting them to arrays
+
+    Returns:
+        dict[str, np.ndarray]: The log timestamps of the messages under 'timestamp' and one array per field
+    """
+    fields = tuple(fields)
+    topic_types = {topic_metadata.name: topic_metadata.type for topic_metadata in reader.get_all_topics_and_types()}
+    decoder = get_cdr_decoder(topic_types[topic]) if topic in topic_types else None
+    if decoder is not None and all(decoder.supports_column(field) for field in fields):
+        return _read_columns_cdr(reader, decoder, topic, fields, start_time, end_time, batch_size)
+
+    timestamp_batches = []
+    field_batches: list[list[np.ndarray]] = [[] for _ in fields]
+    timestamps: list[int] = []
+    rows: list[list] = []
+    extractor = None
+
+    def flush():
+        timestamp_batches.append(np.asarray(timestamps, dtype=np.int64))
+        for batch, values in zip(field_batches, zip(*rows)):
+            batch.append(_to_array(list(values)))
+        timestamps.clear()
+        rows.clear()
+
+    for _, msg, timestamp in read_messages(reader, [topic], start_time, end_time):
+        if extractor is None:
+            extractor = _field_extractor(type(msg), fields)
+        try:
+            rows.append(extractor(msg))
+        except AttributeError as e:
+            raise ValueError(f'Cannot read fields {list(fields)} from {topic} ({type(msg).__name__}): {e}') from e
+        timestamps.append(timestamp)
+        if len(rows) >= batch_size:
+            flush()
+    if rows:
+        flush()
+
+    columns = {'timestamp': np.concatenate(timestamp_batches) if timestamp_batches else np.empty(0, dtype=np.int64)}
+    for field, batches in zip(fields, field_batches):
+        columns[field] = np.concatenate(batches) if batches else np.empty(0)
+    return columns
+
+
+def _read_columns_cdr(
+    reader: rosbag2_py.SequentialReader,
+    decoder: CdrDecoder,
+    topic: str,
+    fields: tuple[str, ...],
+    start_time: Optional[int],
+    end_time: Optional[int],
+    batch_size: int,
+) -> dict[str, np.ndarray]:
+    batches: list[dict[str, np.ndarray]] = []
+    timestamps: list[int] = []
+    messages: list[bytes] = []
 
-    # Get topic type map
-    topic_types = {}
-    for topic_metadata in reader.get_all_topics_and_types():
-        topic_types[topic_metadata.name] = topic_metadata.type
+    def flush():
+        batch = decoder.decode_columns(messages, list(fields))
+        batch['timestamp'] = np.asarray(timestamps, dtype=np.int64)
+        batches.append(batch)
+        timestamps.clear()
+        messages.clear()
 
-    while reader.has_next():
-        topic_name, data, timestamp = reader.read_next()
+    for _, data, timestamp in read_serialized_messages(reader, [topic], start_time, end_time):
+        messages.append(data)
+        timestamps.append(timestamp)
+        if len(messages) >= batch_size:
+            flush()
+    if messages:
+        flush()
 
-        # Filter by topic if topics list is provided
-        if topic_set is None or topic_name in topic_set:
-            # Deserialize the message
-            msg_type = get_message(topic_types[topic_name])
-            msg = deserialize_message(data, msg_type)
-            yield (topic_name, msg, timestamp)
+    columns = {
+        'timestamp': np.concatenate([batch['timestamp'] for batch in batches])
+        if batches
+        else np.empty(0, dtype=np.int64)
+    }
+    for field in fields:
+        columns[field] = np.concatenate([batch[field] for batch in batches]) if batches else np.empty(0)
+    return columns
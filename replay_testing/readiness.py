@@ -0,0 +1,247 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Readiness-gated playback: the player starts paused and resumes once the run is ready to be replayed."""
+
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from launch.actions import OpaqueFunction, RegisterEventHandler
+from launch.event_handlers import OnShutdown
+from launch.events import Shutdown
+
+from .logging_config import get_logger
+from .models import ReadinessConditions
+from .reader import get_message_type
+
+_logger_ = get_logger()
+
+# Default node names of `ros2 bag record` / `ros2 bag play` and of rosbag2_py.Recorder / rosbag2_py.Player
+RECORDER_NODE_NAME = 'rosbag2_recorder'
+PLAYER_NODE_NAME = 'rosbag2_player'
+
+
+class NotReadyError(RuntimeError):
+    pass
+
+
+def _qualified_name(namespace: str, name: str) -> str:
+    return f'{namespace.rstrip("/")}/{name}'
+
+
+def _is_installed(type_name: str) -> bool:
+    """Whether the message type of a topic can be loaded, the player skips topics whose type can't."""
+    try:
+        get_message_type(type_name)
+    except (AttributeError, ImportError, ValueError):
+        return False
+    return True
+
+
+class _GraphProbe:
+    """Checks readiness conditions against the ROS graph of the run, from a node of its own."""
+
+    def __init__(self, node, conditions: ReadinessConditions, recorded_topics: dict[str, str]):
+        from lifecycle_msgs.srv import GetState
+        from rosbag2_interfaces.srv import Resume
+
+        self._node = node
+        self._conditions = conditions
+        # Every topic the player publishes is awaited, not only those whose publisher was discovered already
+        self._recorded_topics = (
+            [topic for topic, type_name in recorded_topics.items() if _is_installed(type_name)]
+            if conditions.wait_for_recorder
+            else []
+        )
+        self._resume_client = node.create_client(Resume, f'/{PLAYER_NODE_NAME}/resume')
+        self._state_clients = {
+            name: node.create_client(GetState, f'{name}/get_state') for name in conditions.lifecycle_states
+        }
+        self._state_requests: dict[str, object] = {}
+        self._state_labels: dict[str, str] = {}
+
+    def _publishers(self, topic: str) -> set[str]:
+        return {info.node_name for info in self._node.get_publishers_info_by_topic(topic)}
+
+    def _subscribers(self, topic: str) -> set[str]:
+        return {info.node_name for info in self._node.get_subscriptions_info_by_topic(topic)}
+
+    def _lifecycle_state(self, name: str) -> Optional[str]:
+        """Latest known lifecycle state of a node, requesting a new one whenever the last request finished."""
+        future = self._state_requests.get(name)
+        if future is not None and future.done():
+            result = future.result()
+            if result is not None:
+                self._state_labels[name] = result.current_state.label
+            future = None
+        if future is None and self._state_clients[name].service_is_ready():
+            from lifecycle_msgs.srv import GetState
+
+            self._state_requests[name] = self._state_clients[name].call_async(GetState.Request())
+        return self._state_labels.get(name)
+
+    def unmet(self) -> list[str]:
+        """Descriptions of the conditions that do not hold yet, empty once the run is ready."""
+        unmet = [
+            f'recorder subscribed to {topic}'
+            for topic in self._recorded_topics
+            if RECORDER_NODE_NAME not in self._subscribers(topic)
+        ]
+        if self._conditions.nodes:
+            running = {
+                _qualified_name(namespace, name) for name, namespace in self._node.get_node_names_and_namespaces()
+            }
+            unmet.extend(f'node {name} running' for name in self._conditions.nodes if name not in running)
+        unmet.extend(
+            f'{topic} subscribed'
+            for topic in self._conditions.subscribed_topics
+            if not self._subscribers(topic) - {RECORDER_NODE_NAME}
+        )
+        unmet.extend(
+            f'{name} {state}'
+            for name, state in self._conditions.lifecycle_states.items()
+            if self._lifecycle_state(name) != state
+        )
+        if not self._resume_client.service_is_ready():
+            unmet.append('player started')
+        return unmet
+
+    def resume_playback(self, executor, timeout: float):
+        from rosbag2_interfaces.srv import Resume
+
+        future = self._resume_client.call_async(Resume.Request())
+        executor.spin_until_future_complete(future, timeout_sec=timeout)
+        if not future.done():
+            raise NotReadyError(f'Player did not resume playback within {timeout} seconds')
+
+
+def wait_until_ready(
+    conditions: ReadinessConditions,
+    recorded_topics: dict[str, str],
+    before_playback: Optional[Callable[[], None]] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> float:
+    """Wait until the run is ready to be replayed, then resume the paused player.
+
+    The run is ready once the player is up, the recorder has subscribed to every recorded topic whose message
+    type is installed and the conditions hold. The ROS graph is polled every `conditions.poll_interval`, so playback resumes as soon as
+    they hold rather than after a fixed delay.
+
+    Args:
+        conditions: Readiness conditions of the run
+        recorded_topics: Message type names of the topics the player publishes, which the recorder must
+            subscribe to
+        before_playback: Called once the conditions hold, playback resumes when it returns
+        cancelled: Stop waiting once set, e.g. when the launch service shuts down
+
+    Returns:
+        float: Seconds from the call until playback resumed
+    """
+    import rclpy
+    from rclpy.executors import SingleThreadedExecutor
+    from rclpy.signals import SignalHandlerOptions
+
+    start = time.monotonic()
+    deadline = start + conditions.timeout
+    # A context of its own reads the ROS domain of the run from the environment, and leaves signals to launch
+    context = rclpy.Context()
+    rclpy.init(context=context, signal_handler_options=SignalHandlerOptions.NO)
+    try:
+        node = rclpy.create_node('replay_testing_readiness', context=context)
+        executor = SingleThreadedExecutor(context=context)
+        executor.add_node(node)
+        probe = _GraphProbe(node, conditions, recorded_topics)
+        while unmet := probe.unmet():
+            if cancelled is not None and cancelled.is_set():
+                raise NotReadyError('Launch shut down before the run was ready')
+            if time.monotonic() >= deadline:
+                raise NotReadyError(f'Run not ready after {conditions.timeout} seconds, waiting for: {unmet}')
+            executor.spin_once(timeout_sec=conditions.poll_interval)
+
+        if before_playback is not None:
+            before_playback()
+        probe.resume_playback(executor, timeout=max(deadline - time.monotonic(), conditions.poll_interval))
+        time_to_ready = time.monotonic() - start
+        _logger_.info(f'Run ready after {time_to_ready:.3f} seconds, playback started')
+        return time_to_ready
+    finally:
+        context.try_shutdown()
+
+
+def pending_readiness_path(run_dir: Path) -> Path:
+    """Path the readiness of a run is written to while its run fixture directory is being recorded."""
+    run_dir = Path(run_dir)
+    return run_dir.with_name(f'{run_dir.name}.readiness.json')
+
+
+def readiness_path(mcap_path: Path) -> Path:
+    """Path of the readiness sidecar of a run fixture, e.g. `run_0.readiness.json` next to `run_0.mcap`."""
+    mcap_path = Path(mcap_path)
+    return mcap_path.with_name(f'{mcap_path.stem}.readiness.json')
+
+
+def read_time_to_ready(mcap_path: Path) -> Optional[float]:
+    """Seconds the run of a run fixture took to be ready for playback, or None if it was not gated."""
+    try:
+        with readiness_path(mcap_path).open() as f:
+            return json.load(f)['time_to_ready']
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError) as e:
+        _logger_.warning(f'Ignoring invalid readiness sidecar of {mcap_path}: {e}')
+        return None
+
+
+def readiness_actions(
+    conditions: ReadinessConditions,
+    recorded_topics: dict[str, str],
+    run_dir: Path,
+    before_playback: Optional[Callable[[], None]] = None,
+) -> list:
+    """Launch actions that resume the paused player once the run is ready, see `wait_until_ready`.
+
+    The time to ready is written next to the run fixture directory. If the run is not ready in time or
+    `before_playback` raises, the launch service is shut down without playback.
+    """
+    cancelled = threading.Event()
+
+    def wait(context):
+        try:
+            time_to_ready = wait_until_ready(conditions, recorded_topics, before_playback, cancelled)
+        except Exception as e:
+            if cancelled.is_set():
+                return
+            _logger_.error(f'Not starting playback: {e}')
+            asyncio.run_coroutine_threadsafe(
+                context.emit_event(Shutdown(reason='Run not ready for playback')), context.asyncio_loop
+            )
+            return
+        path = pending_readiness_path(run_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('w') as f:
+            json.dump({'time_to_ready': time_to_ready}, f)
+
+    def start(context):
+        threading.Thread(target=wait, args=(context,), name='readiness', daemon=True).start()
+        return []
+
+    def stop(event, context):
+        cancelled.set()
+
+    return [OpaqueFunction(function=start), RegisterEventHandler(OnShutdown(on_shutdown=stop))]
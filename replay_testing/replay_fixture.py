@@ -13,16 +13,50 @@
 # limitations under the License.
 #
 
+import hashlib
+import json
 import shutil
 from enum import Enum
 from pathlib import Path
+from typing import BinaryIO, Callable, Optional
 
-from .filter import filter_mcap
+from .filter import filter_mcap, filter_mcap_stream
+from .filter_cache import FilteredFixtureCache
 from .fixtures import BaseFixture
-from .models import Mcap
+from .logging_config import get_logger
+from .mcap_io import McapError
+from .models import FilterOptions, Mcap, TimeWindow
 from .reader import get_sequential_mcap_reader
+from .readiness import pending_readiness_path, readiness_path
+from .run_stats import RunStatistics, write_run_stats
+from .topic_summary import FixtureSummary, read_fixture_summary
 from .utils import find_mcap_files
 
+_logger_ = get_logger()
+
+
+def _filter_options(time_window: Optional[TimeWindow], options: Optional[FilterOptions] = None) -> dict:
+    """Filter options that change the filtered fixture, for its cache key."""
+    key_options = {}
+    if time_window is not None:
+        key_options['time_window'] = {
+            'start': time_window.start,
+            'end': time_window.end,
+            'absolute': time_window.absolute,
+        }
+    if options is not None and options.downsample:
+        key_options['downsample'] = {
+            topic: {'max_rate': rule.max_rate, 'keep_every': rule.keep_every}
+            for topic, rule in sorted(options.downsample.items())
+        }
+    if options is not None and options.reencodes:
+        key_options['encoding'] = {
+            'compression': options.compression,
+            'compression_level': options.compression_level,
+            'chunk_size': options.chunk_size,
+        }
+    return key_options
+
 
 class FixtureType(Enum):
     INPUT = 1
@@ -55,33 +89,120 @@ class ReplayFixture:
     def path(self) -> Path:
         return self.replay_results_dir / self.fixture_key
 
-    def download_input(self, fixture: BaseFixture):
+    def download_input(self, fixture: BaseFixture, on_stream: Optional[Callable[[BinaryIO], None]] = None):
         """Download the input fixture to the base path."""
         if not isinstance(fixture, BaseFixture):
             raise TypeError('Fixture must be an instance of BaseFixture')
 
         try:
             self.path.mkdir(parents=True, exist_ok=True)
-            self.input_fixture = fixture.download(self.path)
+            if on_stream is None:
+                self.input_fixture = fixture.download(self.path)
+            else:
+                self.input_fixture = fixture.download_streaming(self.path, on_stream)
             if not self.input_fixture or not self.input_fixture.path or not Path(self.input_fixture.path).exists():
                 raise ValueError('Downloaded fixture is invalid or has no path')
 
         except Exception as e:
             raise RuntimeError(f'Failed to download input fixture: {e}')
 
-    def filter_input(self, expected_output_topics: list[str]):
+    def download_and_filter_input(
+        self,
+        fixture: BaseFixture,
+        expected_output_topics: list[str],
+        cache: Optional[FilteredFixtureCache] = None,
+        time_window: Optional[TimeWindow] = None,
+        options: Optional[FilterOptions] = None,
+    ):
+        """Download the input fixture and filter it while it is being downloaded.
+
+        Falls back to filtering the downloaded file when the fixture cannot be streamed, e.g. because it is
+        local or already cached, or when the stream cannot be filtered at the record level.
+        """
         filtered_mcap_path = self.path / FILTERED_FIXTURE_NAME
+        streamed = False
 
-        try:
-            filter_mcap(
-                self.input_fixture.path,
-                str(filtered_mcap_path),
+        def on_stream(stream: BinaryIO):
+            nonlocal streamed
+            try:
+                filter_mcap_stream(stream, filtered_mcap_path, expected_output_topics, time_window, options)
+                streamed = True
+            except McapError as e:
+                _logger_.info(f'Could not filter {self.name} while downloading, filtering after download: {e}')
+                filtered_mcap_path.unlink(missing_ok=True)
+
+        self.download_input(fixture, on_stream)
+
+        if not streamed:
+            self.filter_input(expected_output_topics, cache, time_window, options)
+            return
+
+        self.filtered_fixture = Mcap(path=filtered_mcap_path)
+        if cache is not None:
+            self._store_in_cache(
+                cache,
+                cache.key(self.input_fixture.path, expected_output_topics, _filter_options(time_window, options)),
                 expected_output_topics,
             )
+
+    def filter_input(
+        self,
+        expected_output_topics: list[str],
+        cache: Optional[FilteredFixtureCache] = None,
+        time_window: Optional[TimeWindow] = None,
+        options: Optional[FilterOptions] = None,
+    ):
+        """Filter the expected output topics out of the input fixture and trim it to the time window.
+
+        If a cache is given, a previously filtered fixture with the same input and filter configuration is
+        reused instead of filtering again.
+        """
+        filtered_mcap_path = self.path / FILTERED_FIXTURE_NAME
+
+        try:
+            cache_key = (
+                cache.key(self.input_fixture.path, expected_output_topics, _filter_options(time_window, options))
+                if cache
+                else None
+            )
+            if cache is None or not cache.fetch(cache_key, filtered_mcap_path):
+                filter_mcap(
+                    self.input_fixture.path,
+                    str(filtered_mcap_path),
+                    expected_output_topics,
+                    time_window,
+                    options,
+                )
+                if cache is not None:
+                    self._store_in_cache(cache, cache_key, expected_output_topics)
             self.filtered_fixture = Mcap(path=filtered_mcap_path)
         except Exception as e:
             raise RuntimeError(f'Failed to filter input fixture: {e}')
 
+    def _store_in_cache(self, cache: FilteredFixtureCache, cache_key: str, expected_output_topics: list[str]):
+        cache.store(
+            cache_key,
+            self.path / FILTERED_FIXTURE_NAME,
+            {'fixture_key': self.fixture_key, 'excluded_topics': sorted(expected_output_topics)},
+        )
+
+    def get_encoded_filtered_fixture(self, options: FilterOptions) -> Mcap:
+        """Return the filtered fixture re-encoded with different filter options, e.g. another compression.
+
+        The re-encoded fixture is written next to the filtered fixture once and reused by later runs.
+        """
+        if not options.reencodes and not options.downsample:
+            return self.filtered_fixture
+
+        options_key = json.dumps(_filter_options(None, options), sort_keys=True)
+        encoded_path = self.path / f'filtered_{hashlib.sha256(options_key.encode("utf-8")).hexdigest()[:12]}.mcap'
+        if not encoded_path.exists():
+            _logger_.info(f'Re-encoding filtered fixture {self.name} with {options}')
+            tmp_path = encoded_path.with_name(f'.{encoded_path.name}.tmp')
+            filter_mcap(self.filtered_fixture.path, tmp_path, [], options=options)
+            tmp_path.replace(encoded_path)
+        return Mcap(path=encoded_path)
+
     def get_reader(self, type: FixtureType = FixtureType.INPUT):
         """Get a sequential MCAP reader for the specified fixture type."""
         if type == FixtureType.INPUT:
@@ -91,6 +212,15 @@ class ReplayFixture:
         else:
             raise ValueError(f'Unsupported fixture type: {type}')
 
+    def get_summary(self, type: FixtureType = FixtureType.INPUT) -> FixtureSummary:
+        """Read the topic summary of the specified fixture type without opening a full reader."""
+        if type == FixtureType.INPUT:
+            return read_fixture_summary(self.input_fixture.path)
+        elif type == FixtureType.FILTERED:
+            return read_fixture_summary(self.filtered_fixture.path)
+        else:
+            raise ValueError(f'Unsupported fixture type: {type}')
+
     def generate_run_fixture(self, key) -> Mcap:
         """Add a run fixture to the list."""
         run_fixture = Mcap(path=self.path / 'runs' / f'run_{key}_{self.name}')
@@ -98,21 +228,27 @@ class ReplayFixture:
         return run_fixture
 
     def _get_previous_run_fixtures(self) -> list:
-        """Check for existing run fixtures in the runs directory. Returns empty list if none found."""
+        """Check for existing run fixtures in the runs directory. Returns empty list if none found.
+
+        Only MCAP files are run fixtures, the runs directory also holds their statistics sidecars and caches.
+        """
         run_fixtures = []
         runs_dir = self.path / 'runs'
         if runs_dir.exists() and runs_dir.is_dir():
-            for run_fixture in runs_dir.iterdir():
-                if run_fixture.is_file():
+            for run_fixture in sorted(runs_dir.iterdir()):
+                if run_fixture.is_file() and run_fixture.suffix == '.mcap':
                     run_fixtures.append(Mcap(path=run_fixture))
         return run_fixtures
 
-    def cleanup_run_fixtures(self):
+    def cleanup_run_fixtures(self, run_fixtures: Optional[list[Mcap]] = None):
         """
         Move the generated MCAP files from the run fixture directories to the parent directory
-        and remove the now-empty run fixture directories.
+        and remove the now-empty run fixture directories. Readiness sidecars are renamed after their MCAP file.
+
+        Args:
+            run_fixtures: Run fixtures to clean up, all run fixtures by default
         """
-        for run_fixture in self.run_fixtures:
+        for run_fixture in self.run_fixtures if run_fixtures is None else run_fixtures:
             mcap_folder = run_fixture.path
             mcap_files = find_mcap_files(mcap_folder)
             if len(mcap_files) == 0:
@@ -120,5 +256,16 @@ class ReplayFixture:
             mcap_file_path = mcap_files[0]
             new_path = Path(shutil.move(mcap_file_path, mcap_folder.parent))
             shutil.rmtree(mcap_folder)
+            if pending_readiness_path(mcap_folder).exists():
+                pending_readiness_path(mcap_folder).replace(readiness_path(new_path))
 
             run_fixture.path = new_path
+
+    def write_run_stats(self, run_fixtures: Optional[list[Mcap]] = None) -> dict[str, RunStatistics]:
+        """Compute the topic statistics of every run fixture and write them to a JSON sidecar next to it.
+
+        Args:
+            run_fixtures: Run fixtures to compute the statistics of, all run fixtures by default
+        """
+        run_fixtures = self.run_fixtures if run_fixtures is None else run_fixtures
+        return {str(run_fixture.path): write_run_stats(run_fixture.path) for run_fixture in run_fixtures}
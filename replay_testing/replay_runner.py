@@ -13,11 +13,16 @@
 # limitations under the License.
 #
 
+import contextlib
 import inspect
+import multiprocessing
+import multiprocessing.connection
 import os
+import sys
 import tempfile
 import unittest
 import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Optional
 
@@ -31,23 +36,228 @@ from launch.event_handlers import OnProcessExit
 from launch.events import Shutdown
 from termcolor import colored
 
+from .bag_worker import BagWorkers
+from .decorators.analyze import TOPICS_ATTRIBUTE, declared_topics
+from .filter_cache import FilteredFixtureCache
+from .fixtures import BaseFixture
 from .junit_to_xml import pretty_log_junit_xml, unittest_results_to_xml, write_xml_to_file
 from .logging_config import get_logger
-from .models import Mcap, ReplayRunParams, ReplayTestingPhase
+from .message_store import DEFAULT_MAX_MEMORY_BYTES, MessageStore
+from .models import (
+    FilterOptions,
+    Mcap,
+    ReadinessConditions,
+    ReplayRunParams,
+    ReplayTestingPhase,
+    TimeWindow,
+    TopicRequirement,
+)
 from .reader import get_sequential_mcap_reader
+from .readiness import read_time_to_ready, readiness_actions
 from .replay_fixture import FILTERED_FIXTURE_NAME, FixtureType, ReplayFixture
 from .replay_test_result import ReplayTestResult
+from .ros_domain import (
+    DOMAIN_LEASE_DIR_NAME,
+    MAX_DOMAIN_ID,
+    MIN_DOMAIN_ID,
+    DomainLease,
+    DomainLeaseAllocator,
+    isolated_environment,
+)
+from .run_stats import read_run_stats
+from .topic_summary import check_topic_requirements, read_fixture_summary
 
 _logger_ = get_logger()
 
+FIXTURE_EXECUTORS = ('thread', 'process')
+
+
+def _prepare_fixture(
+    replay_results_directory: Path,
+    fixture_item: BaseFixture,
+    required_input_topics: list[str],
+    input_topic_requirements: dict[str, TopicRequirement],
+    expected_output_topics: list[str],
+    time_window: Optional[TimeWindow],
+    filter_options: Optional[FilterOptions],
+    filter_cache: Optional[FilteredFixtureCache],
+    stream_fixtures: bool,
+) -> ReplayFixture:
+    """Download, validate and filter a single fixture.
+
+    Module level so it can run in a process pool.
+    """
+    replay_fixture = ReplayFixture(replay_results_directory, fixture_item.fixture_key)
+    if stream_fixtures:
+        # Filtering happens during the download, before the input topics are validated
+        replay_fixture.download_and_filter_input(
+            fixture_item, expected_output_topics, cache=filter_cache, time_window=time_window, options=filter_options
+        )
+    else:
+        replay_fixture.download_input(fixture_item)
+
+    # Input Topics Validation, from the summary section only
+    summary = replay_fixture.get_summary(FixtureType.INPUT)
+    errors = check_topic_requirements(summary, required_input_topics, input_topic_requirements)
+    if errors:
+        error_msg = f'Input topics do not match for fixture {fixture_item.fixture_key}:'
+        for error in errors:
+            error_msg += f'\n  {error}'
+
+        _logger_.error(error_msg)
+        raise AssertionError('Input topics do not match. Check logs for more information')
+
+    if not stream_fixtures:
+        replay_fixture.filter_input(
+            expected_output_topics, cache=filter_cache, time_window=time_window, options=filter_options
+        )
+
+    return replay_fixture
+
+
+@contextlib.contextmanager
+def _updated_environment(environment: dict[str, str]):
+    """Temporarily add variables to the environment of this process and the processes it launches."""
+    previous = {name: os.environ.get(name) for name in environment}
+    os.environ.update(environment)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _launch_isolated(ld: LaunchDescription, environment: dict[str, str], log_path: Path, bag_workers: BagWorkers):
+    """Run a launch description in a forked process, with its own environment, output log and bag helpers."""
+    os.environ.update(environment)
+    with log_path.open('ab') as log:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(log.fileno(), sys.stdout.fileno())
+        os.dup2(log.fileno(), sys.stderr.fileno())
+    bag_workers.start()
+    launch_service = launch.LaunchService()
+    launch_service.include_launch_description(ld)
+    # The exit code of the process is how the runner learns that the launch failed
+    sys.exit(launch_service.run())
+
+
+def _serve_runs(runner: 'ReplayTestingRunner', run, connection, runner_connection):
+    """Main loop of a run launcher process, running the runs of one replay fixture per request."""
+    # The forked copy of the runner's end would keep the launcher from seeing the runner close it
+    runner_connection.close()
+    with runner._sequential_lease() as lease:
+        try:
+            while True:
+                try:
+                    replay_fixture = connection.recv()
+                except EOFError:
+                    break
+                try:
+                    runner._run_fixtures(run, [replay_fixture], lease)
+                    connection.send(('done', replay_fixture))
+                except Exception as e:
+                    try:
+                        connection.send(('error', e))
+                    except Exception:
+                        connection.send(('error', RuntimeError(f'{type(e).__name__}: {e}')))
+        finally:
+            # Bag helpers run in the leased domain, so close them before another runner can lease it
+            runner._bag_workers.close()
+
+
+class _RunLauncher:
+    """A process that launches the runs of a pipelined run, forked before the pipeline starts any thread.
+
+    Runs fork processes of their own, e.g. concurrent runs and bag helpers. Forking while the prepare and
+    analysis threads run could copy a lock one of them holds into the child, so runs are launched from this
+    process instead. Replay fixtures are sent to it and sent back with their run fixtures.
+    """
+
+    def __init__(self, runner: 'ReplayTestingRunner', run):
+        # Fork rather than spawn, so the test module and launch descriptions don't need to be picklable
+        context = multiprocessing.get_context('fork')
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(
+            target=_serve_runs, args=(runner, run, child_connection, self._connection), name='run_launcher'
+        )
+        self._process.start()
+        child_connection.close()
+
+    def run(self, replay_fixture: ReplayFixture) -> ReplayFixture:
+        """Run all runs of a replay fixture, returning it with its run fixtures."""
+        self._connection.send(replay_fixture)
+        try:
+            status, result = self._connection.recv()
+        except EOFError as e:
+            raise RuntimeError(f'Run launcher exited while running fixture {replay_fixture.name}') from e
+        if status == 'error':
+            raise result
+        return result
+
+    def close(self):
+        self._connection.close()
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+
 
 class ReplayTestingRunner:
     _replay_results_directory: Path
     _replay_fixtures: list[ReplayFixture]
 
-    def __init__(self, test_module, *, run_id: Optional[str] = None):
+    def __init__(
+        self,
+        test_module,
+        *,
+        run_id: Optional[str] = None,
+        use_filter_cache: bool = True,
+        stream_fixtures: bool = False,
+        fixture_workers: int = 1,
+        fixture_executor: str = 'thread',
+        message_store_max_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+        run_workers: int = 1,
+        isolate_domain: bool = False,
+    ):
+        """Create a runner for a replay test module.
+
+        Args:
+            test_module: Module defining the @fixtures, @run and @analyze classes
+            run_id: ID of a previous run to load, e.g. to only re-run analysis
+            use_filter_cache: Reuse previously filtered fixtures from the filtered fixture cache
+            stream_fixtures: Filter remote fixtures while they are downloaded
+            fixture_workers: Number of fixtures to prepare concurrently. 0 uses one worker per CPU.
+            fixture_executor: Run fixture preparation in a 'thread' or 'process' pool. Threads suit
+                download-bound suites; processes also parallelize filtering but require picklable fixtures.
+            message_store_max_bytes: Memory budget for the messages of a run fixture shared by the analyze test
+                methods. Messages beyond it are spilled to disk.
+            run_workers: Number of runs to launch concurrently. 0 uses one worker per CPU. Concurrent runs each
+                get their own process, ROS domain with localhost-only discovery, and log directory under runs/logs.
+            isolate_domain: Also launch runs that run one after another in a ROS domain leased from all runners
+                on this host, with localhost-only discovery, so concurrent replay tests don't see each other's
+                topics. Off by default, so they run in the current ROS domain. Concurrent runs of `run_workers`
+                are always isolated.
+        """
+        if fixture_executor not in FIXTURE_EXECUTORS:
+            raise ValueError(f'fixture_executor must be one of {FIXTURE_EXECUTORS}, got {fixture_executor!r}')
+        if fixture_workers < 0:
+            raise ValueError(f'fixture_workers must not be negative, got {fixture_workers}')
+        if run_workers < 0:
+            raise ValueError(f'run_workers must not be negative, got {run_workers}')
+
         self._replay_fixtures = []
         self._test_module = test_module
+        self._filter_cache = FilteredFixtureCache() if use_filter_cache else None
+        self._stream_fixtures = stream_fixtures
+        self._fixture_workers = fixture_workers or os.cpu_count() or 1
+        self._fixture_executor = fixture_executor
+        self._message_store_max_bytes = message_store_max_bytes
+        # Every concurrent run needs a ROS domain of its own
+        self._run_workers = min(run_workers or os.cpu_count() or 1, MAX_DOMAIN_ID - MIN_DOMAIN_ID + 1)
 
         # Check if run_id is truthy (not None and not empty string)
         if run_id:
@@ -65,6 +275,11 @@ class ReplayTestingRunner:
             self._replay_directory = Path('test_results') / 'replay_testing'
 
         self._replay_results_directory = self._replay_directory / str(self._test_run_uuid)
+        self._isolate_domain = isolate_domain
+        # Shared by every runner using the same replay directory
+        self._domain_allocator = DomainLeaseAllocator(self._replay_directory / DOMAIN_LEASE_DIR_NAME)
+        # Helper processes of runs with the 'rosbag2_py' bag backend, started on first use
+        self._bag_workers = BagWorkers()
 
         # Only load previous run fixtures if run_id is truthy
         if run_id:
@@ -116,12 +331,21 @@ class ReplayTestingRunner:
     def _create_run_launch_description(
         self, filtered_fixture, run_fixture, test_ld: launch.LaunchDescription, run, params: ReplayRunParams
     ) -> launch.LaunchDescription:
+        gate_actions = self._create_readiness_actions(filtered_fixture, run_fixture, run, params)
+
+        if params.runner_args.bag_backend == 'rosbag2_py':
+            return self._create_in_process_launch_description(
+                filtered_fixture, run_fixture, test_ld, run, params, gate_actions
+            )
+
         # Define the process action for playing the MCAP file
         cmd = [
             'ros2',
             'bag',
             'play',
             filtered_fixture.path,
+            '-s',
+            'mcap',
             '-r',
             params.runner_args.playback_rate,
         ]
@@ -129,9 +353,15 @@ class ReplayTestingRunner:
         if params.runner_args is not None and params.runner_args.use_clock:
             cmd.extend(['--clock', '1000'])
 
+        if params.runner_args.read_ahead_queue_size is not None:
+            cmd.extend(['--read-ahead-queue-size', params.runner_args.read_ahead_queue_size])
+
         if hasattr(run, 'qos_overrides_yaml'):
             cmd.extend(['--qos-profile-overrides-path', run.qos_overrides_yaml])
 
+        if gate_actions:
+            cmd.append('--start-paused')
+
         player_action = ExecuteProcess(
             cmd=list(map(str, cmd)),
             name='ros2_bag_player',
@@ -147,6 +377,7 @@ class ReplayTestingRunner:
             ),
             test_ld,
             player_action,  # Add the MCAP playback action
+            *gate_actions,
         ])
 
         if not params.ignore_playback_finish:
@@ -163,14 +394,87 @@ class ReplayTestingRunner:
 
         return ld
 
+    def _create_readiness_actions(self, filtered_fixture, run_fixture, run, params: ReplayRunParams) -> list:
+        """Launch actions that start the paused player once the run is ready, none if playback is not gated."""
+        readiness = params.readiness
+        if readiness is None and hasattr(run, 'before_playback'):
+            # The hook alone gates playback
+            readiness = ReadinessConditions(wait_for_recorder=False)
+        if readiness is None:
+            return []
+
+        before_playback = None
+        if hasattr(run, 'before_playback'):
+
+            def before_playback():
+                run.before_playback(params)
+
+        recorded_topics = {
+            topic.name: topic.type for topic in read_fixture_summary(filtered_fixture.path).topics.values()
+        }
+        return readiness_actions(readiness, recorded_topics, run_fixture.path, before_playback)
+
+    def _create_in_process_launch_description(
+        self,
+        filtered_fixture,
+        run_fixture,
+        test_ld: launch.LaunchDescription,
+        run,
+        params: ReplayRunParams,
+        gate_actions: list,
+    ) -> launch.LaunchDescription:
+        """Play and record the run with the rosbag2_py helper processes rather than `ros2 bag` subprocesses."""
+        play_options: dict[str, Any] = {'rate': params.runner_args.playback_rate}
+        if params.runner_args.use_clock:
+            play_options['clock_publish_frequency'] = 1000.0
+        if params.runner_args.read_ahead_queue_size is not None:
+            play_options['read_ahead_queue_size'] = params.runner_args.read_ahead_queue_size
+        if hasattr(run, 'qos_overrides_yaml'):
+            play_options['qos_overrides_path'] = str(run.qos_overrides_yaml)
+        if gate_actions:
+            play_options['start_paused'] = True
+
+        return LaunchDescription([
+            *self._bag_workers.launch_actions(
+                filtered_fixture.path,
+                run_fixture.path,
+                play_options,
+                shutdown_on_playback_finish=not params.ignore_playback_finish,
+            ),
+            test_ld,
+            *gate_actions,
+        ])
+
     def filter_fixtures(self) -> list[ReplayFixture]:
         self._log_stage_start(ReplayTestingPhase.FIXTURES)
 
+        prepare_args = self._get_prepare_args()
+
+        workers = min(self._fixture_workers, len(prepare_args))
+        if workers <= 1:
+            for args in prepare_args:
+                self._replay_fixtures.append(_prepare_fixture(*args))
+        else:
+            self._replay_fixtures.extend(self._prepare_fixtures_in_pool(prepare_args, workers))
+
+        self._log_stage_end(ReplayTestingPhase.FIXTURES)
+
+        return self._replay_fixtures
+
+    def _get_prepare_args(self) -> list[tuple]:
+        """Arguments of `_prepare_fixture` for every fixture of the fixtures stage, in fixture list order."""
         fixture_cls = self._get_stage_class(ReplayTestingPhase.FIXTURES)
         fixture = fixture_cls()
 
         self._replay_results_directory.mkdir(parents=True, exist_ok=True)
 
+        required_input_topics = (
+            fixture.required_input_topics if hasattr(fixture, 'required_input_topics') else fixture.input_topics
+        )
+        expected_output_topics = (
+            fixture.expected_output_topics if hasattr(fixture, 'expected_output_topics') else fixture.output_topics
+        )
+
         # Check for duplicate fixture keys
         fixture_keys = set()
         for fixture_item in fixture_cls.fixture_list:
@@ -178,46 +482,50 @@ class ReplayTestingRunner:
                 raise ValueError(f'Duplicate fixture key found: {fixture_item.fixture_key}')
             fixture_keys.add(fixture_item.fixture_key)
 
-            replay_fixture = ReplayFixture(self._replay_results_directory, fixture_item.fixture_key)
-            replay_fixture.download_input(fixture_item)
-
-            # Input Topics Validation
-            reader = replay_fixture.get_reader(FixtureType.INPUT)
-
-            topic_types = reader.get_all_topics_and_types()
-
-            required_input_topics = (
-                fixture.required_input_topics if hasattr(fixture, 'required_input_topics') else fixture.input_topics
+        return [
+            (
+                self._replay_results_directory,
+                fixture_item,
+                required_input_topics,
+                getattr(fixture, 'input_topic_requirements', {}),
+                expected_output_topics,
+                getattr(fixture_item, 'time_window', None) or getattr(fixture_cls, 'time_window', None),
+                getattr(fixture, 'filter_options', None),
+                self._filter_cache,
+                self._stream_fixtures,
             )
-            expected_output_topics = (
-                fixture.expected_output_topics if hasattr(fixture, 'expected_output_topics') else fixture.output_topics
-            )
-
-            input_topics_present = []
-            for topic_type in topic_types:
-                if topic_type.name in required_input_topics:
-                    input_topics_present.append(topic_type.name)
-
-            if set(input_topics_present) != set(required_input_topics):
-                missing_topics = set(required_input_topics) - set(input_topics_present)
-                extra_topics = set(input_topics_present) - set(required_input_topics)
+            for fixture_item in fixture_cls.fixture_list
+        ]
 
-                error_msg = 'Input topics do not match:'
-                if missing_topics:
-                    error_msg += f'\n  Missing topics: {sorted(missing_topics)}'
-                if extra_topics:
-                    error_msg += f'\n  Extra topics: {sorted(extra_topics)}'
+    def _prepare_fixtures_in_pool(self, prepare_args: list[tuple], workers: int) -> list[ReplayFixture]:
+        """Prepare fixtures concurrently, returning them in fixture list order.
 
-                _logger_.error(error_msg)
-                raise AssertionError('Input topics do not match. Check logs for more information')
+        Every fixture is attempted even if others fail. Failures are then logged in fixture list order and
+        the first one is raised, so the outcome does not depend on scheduling.
+        """
+        executor_cls = ProcessPoolExecutor if self._fixture_executor == 'process' else ThreadPoolExecutor
+        _logger_.info(f'Preparing {len(prepare_args)} fixtures with {workers} {self._fixture_executor} workers')
 
-            replay_fixture.filter_input(expected_output_topics)
+        with executor_cls(max_workers=workers) as executor:
+            futures = [executor.submit(_prepare_fixture, *args) for args in prepare_args]
 
-            self._replay_fixtures.append(replay_fixture)
+        replay_fixtures = []
+        failures = []
+        for args, future in zip(prepare_args, futures):
+            fixture_key = args[1].fixture_key
+            error = future.exception()
+            if error is None:
+                replay_fixtures.append(future.result())
+            else:
+                _logger_.error(f'Failed to prepare fixture {fixture_key}: {error}')
+                failures.append((fixture_key, error))
 
-        self._log_stage_end(ReplayTestingPhase.FIXTURES)
+        if failures:
+            if len(failures) > 1:
+                _logger_.error(f'{len(failures)} fixtures failed: {[fixture_key for fixture_key, _ in failures]}')
+            raise failures[0][1]
 
-        return self._replay_fixtures
+        return replay_fixtures
 
     def run(self):
         self._log_stage_start(ReplayTestingPhase.RUN)
@@ -225,57 +533,310 @@ class ReplayTestingRunner:
         run_cls = self._get_stage_class(ReplayTestingPhase.RUN)
         run = run_cls()
 
-        for replay_fixture in self._replay_fixtures:
-            if len(run.parameters) == 0:
-                raise ValueError('No parameters found for run')
-
-            if len(replay_fixture.run_fixtures) > 0:
-                raise ValueError('Run fixtures already exist')
-
-            _logger_.info(f'Running tests for fixture: {replay_fixture.name}')
-            for param in run.parameters:
-                run_fixture = replay_fixture.generate_run_fixture(param.name)
-                test_launch_description = run.generate_launch_description(param)
-
-                ld = self._create_run_launch_description(
-                    replay_fixture.filtered_fixture, run_fixture, test_launch_description, run, param
-                )
-                launch_service = launch.LaunchService()
-                launch_service.include_launch_description(ld)
-                launch_service.run()
-                _logger_.info('Launch service complete')
-
-            replay_fixture.cleanup_run_fixtures()
-            self._log_stage_end(ReplayTestingPhase.RUN)
+        with self._sequential_lease() as lease:
+            try:
+                self._run_fixtures(run, self._replay_fixtures, lease)
+            finally:
+                # Bag helpers run in the leased domain, so close them before another runner can lease it
+                self._bag_workers.close()
+        self._log_stage_end(ReplayTestingPhase.RUN)
         return self._replay_fixtures
 
+    @contextlib.contextmanager
+    def _sequential_lease(self):
+        """Lease a ROS domain for runs launched in this process, if they are launched in sequence and isolated."""
+        lease = self._domain_allocator.acquire() if self._isolate_domain and self._run_workers <= 1 else None
+        try:
+            if lease is not None:
+                _logger_.info(f'Running in ROS domain {lease.domain_id}')
+            yield lease
+        finally:
+            if lease is not None:
+                lease.release()
+
+    def _run_fixtures(self, run, replay_fixtures: list[ReplayFixture], lease: Optional[DomainLease]):
+        if self._run_workers > 1:
+            self._run_in_parallel(run, replay_fixtures)
+        else:
+            self._run_in_sequence(run, replay_fixtures, lease)
+
+    def _run_in_sequence(self, run, replay_fixtures: list[ReplayFixture], lease: Optional[DomainLease]):
+        """Launch runs one after another in this process, in the leased ROS domain if there is one.
+
+        Like running them in parallel, every run is attempted even if others fail, see `_finish_runs`.
+        """
+        environment = isolated_environment(lease.domain_id) if lease is not None else {}
+
+        runs: list[tuple[ReplayFixture, Mcap, LaunchDescription]] = []
+        exit_codes: dict[int, Optional[int]] = {}
+        try:
+            for replay_fixture in replay_fixtures:
+                _logger_.info(f'Running tests for fixture: {replay_fixture.name}')
+                for run_fixture, ld in self._generate_runs(replay_fixture, run):
+                    runs.append((replay_fixture, run_fixture, ld))
+                    with _updated_environment(environment):
+                        self._bag_workers.start()
+                        launch_service = launch.LaunchService()
+                        launch_service.include_launch_description(ld)
+                        exit_codes[len(runs) - 1] = launch_service.run()
+                    _logger_.info(f'Launch service complete with exit code {exit_codes[len(runs) - 1]}')
+        finally:
+            self._finish_runs(runs, exit_codes)
+
+        self._raise_failed_runs(runs, exit_codes)
+
+    def _generate_runs(self, replay_fixture: ReplayFixture, run) -> list[tuple[Mcap, LaunchDescription]]:
+        """Create the run fixture and launch description of every run parameter of a replay fixture."""
+        if len(run.parameters) == 0:
+            raise ValueError('No parameters found for run')
+
+        if len(replay_fixture.run_fixtures) > 0:
+            raise ValueError('Run fixtures already exist')
+
+        runs = []
+        for param in run.parameters:
+            run_fixture = replay_fixture.generate_run_fixture(param.name)
+            test_launch_description = run.generate_launch_description(param)
+
+            filtered_fixture = replay_fixture.filtered_fixture
+            if param.runner_args.filter_options is not None:
+                filtered_fixture = replay_fixture.get_encoded_filtered_fixture(param.runner_args.filter_options)
+
+            ld = self._create_run_launch_description(filtered_fixture, run_fixture, test_launch_description, run, param)
+            runs.append((run_fixture, ld))
+        return runs
+
+    def _run_in_parallel(self, run, replay_fixtures: list[ReplayFixture]):
+        """Launch up to `run_workers` runs at once, each in its own process, ROS domain and log directory.
+
+        Every run is attempted even if others fail, see `_finish_runs`.
+        """
+        runs = [
+            (replay_fixture, run_fixture, ld)
+            for replay_fixture in replay_fixtures
+            for run_fixture, ld in self._generate_runs(replay_fixture, run)
+        ]
+        workers = min(self._run_workers, len(runs))
+        _logger_.info(f'Running {len(runs)} runs with {workers} workers')
+
+        # Fork rather than spawn, so launch descriptions don't need to be picklable
+        context = multiprocessing.get_context('fork')
+        pending = list(enumerate(runs))
+        active: dict[Any, tuple[int, Any, DomainLease]] = {}
+        exit_codes: dict[int, Optional[int]] = {}
+        try:
+            while pending or active:
+                while pending and len(active) < workers:
+                    # Other runners on this host may hold domains, only wait for one if nothing else is running
+                    lease = self._domain_allocator.acquire() if not active else self._domain_allocator.try_acquire()
+                    if lease is None:
+                        break
+                    index, (replay_fixture, run_fixture, ld) = pending.pop(0)
+                    log_dir = Path(run_fixture.path).parent / 'logs' / Path(run_fixture.path).name
+                    log_dir.mkdir(parents=True, exist_ok=True)
+                    _logger_.info(
+                        f'Running {Path(run_fixture.path).name} in ROS domain {lease.domain_id}, logging to {log_dir}'
+                    )
+                    process = context.Process(
+                        target=_launch_isolated,
+                        args=(
+                            ld,
+                            isolated_environment(lease.domain_id, log_dir),
+                            log_dir / 'launch.log',
+                            self._bag_workers,
+                        ),
+                        name=Path(run_fixture.path).name,
+                    )
+                    process.start()
+                    active[process.sentinel] = (index, process, lease)
+
+                # Wake up periodically to retry leasing a domain when fewer runs are active than workers
+                timeout = self._domain_allocator.poll_interval if pending and len(active) < workers else None
+                for sentinel in multiprocessing.connection.wait(list(active), timeout=timeout):
+                    index, process, lease = active.pop(sentinel)
+                    process.join()
+                    lease.release()
+                    exit_codes[index] = process.exitcode
+                    _logger_.info(f'Launch service of {process.name} complete with exit code {process.exitcode}')
+        finally:
+            for _, process, lease in active.values():
+                process.terminate()
+                process.join()
+                lease.release()
+            self._finish_runs(runs, exit_codes)
+
+        self._raise_failed_runs(runs, exit_codes)
+
+    def _finish_runs(self, runs: list[tuple[ReplayFixture, Mcap, Any]], exit_codes: dict[int, Optional[int]]):
+        """Move the recordings of the runs that succeeded out of their run directories and write their statistics.
+
+        This also happens when other runs failed or running was interrupted, so the runs that succeeded can be
+        analyzed. Failed runs are left in their run directories for inspection.
+        """
+        for index, (replay_fixture, run_fixture, _) in enumerate(runs):
+            if exit_codes.get(index) == 0:
+                replay_fixture.cleanup_run_fixtures([run_fixture])
+                replay_fixture.write_run_stats([run_fixture])
+
+    def _raise_failed_runs(self, runs: list[tuple[ReplayFixture, Mcap, Any]], exit_codes: dict[int, Optional[int]]):
+        """Log the runs that failed in run order and raise if there are any."""
+        failures = []
+        for index, (replay_fixture, run_fixture, _) in enumerate(runs):
+            if exit_codes.get(index) != 0:
+                _logger_.error(f'Run {Path(run_fixture.path).name} of fixture {replay_fixture.name} failed')
+                failures.append(Path(run_fixture.path).name)
+        if failures:
+            raise RuntimeError(f'{len(failures)} runs failed: {failures}. Check the launch output for details')
+
+    def run_pipelined(self, *, write_junit: bool = True) -> tuple[int, Path]:
+        """Filter, run and analyze all fixtures, overlapping the stages of consecutive fixtures.
+
+        Fixtures are prepared in the background while earlier fixtures replay, and the runs of a fixture
+        are analyzed in the background while the next fixture replays. Fixtures are still run and analyzed
+        in fixture list order, so the JUnit report and exit code are the same as running `filter_fixtures`,
+        `run` and `analyze` one after another. Runs are launched from a process forked before the background
+        threads start, so concurrent runs and bag helpers are never forked while they run.
+
+        If a fixture fails to prepare or run, later fixtures are not run. The fixtures run before it are still
+        analyzed and reported, then the error is raised.
+
+        Returns:
+            tuple[int, Path]: Exit code and JUnit XML path, like `analyze`
+        """
+        _logger_.info('Running fixtures, runs and analysis pipelined across fixtures')
+        prepare_args = self._get_prepare_args()
+        run = self._get_stage_class(ReplayTestingPhase.RUN)()
+        analyze_cls: type[Any] = self._get_stage_class(ReplayTestingPhase.ANALYZE)
+
+        # Forked before the prepare and analysis threads start, see _RunLauncher
+        launcher = _RunLauncher(self, run)
+        # At least one worker prepares fixtures in the background while another fixture replays
+        prepare_executor_cls = ProcessPoolExecutor if self._fixture_executor == 'process' else ThreadPoolExecutor
+        prepare_executor = prepare_executor_cls(max_workers=max(1, min(self._fixture_workers, len(prepare_args))))
+        # A single analysis worker keeps the analysis of different fixtures from competing with each other
+        analyze_executor = ThreadPoolExecutor(max_workers=1)
+        analysis = []
+        error = None
+        try:
+            prepare_futures = [prepare_executor.submit(_prepare_fixture, *args) for args in prepare_args]
+            for prepare_future in prepare_futures:
+                try:
+                    replay_fixture = launcher.run(prepare_future.result())
+                except Exception as e:
+                    _logger_.error(f'Not running the remaining fixtures: {e}')
+                    error = e
+                    break
+                self._replay_fixtures.append(replay_fixture)
+                analysis.append((
+                    replay_fixture.name,
+                    analyze_executor.submit(self._analyze_fixture, replay_fixture, analyze_cls),
+                ))
+
+            results: dict[str, list] = {}
+            for fixture_name, analyze_future in analysis:
+                results[fixture_name] = analyze_future.result()
+        finally:
+            prepare_executor.shutdown(wait=True, cancel_futures=True)
+            analyze_executor.shutdown(wait=True, cancel_futures=True)
+            launcher.close()
+
+        report = self._report(results, write_junit)
+        if error is not None:
+            raise error
+        return report
+
     def analyze(self, *, write_junit: bool = True) -> tuple[int, Path]:
         self._log_stage_start(ReplayTestingPhase.ANALYZE)
+        analyze_cls: type[Any] = self._get_stage_class(ReplayTestingPhase.ANALYZE)
         results: dict[str, list] = {}
         for replay_fixture in self._replay_fixtures:
-            results[replay_fixture.name] = []
-            analyze_cls: type[Any] = self._get_stage_class(ReplayTestingPhase.ANALYZE)
-
-            for run_fixture in replay_fixture.run_fixtures:
-                reader = get_sequential_mcap_reader(run_fixture.path)
+            results[replay_fixture.name] = self._analyze_fixture(replay_fixture, analyze_cls)
 
-                class AnalyzeWithReader(analyze_cls):
-                    def setUp(inner_self):
-                        super().setUp()  # Call original setUp if it exists
-                        inner_self.reader = reader
-                        inner_self.suite_classname = analyze_cls.__name__
+        exit_code, junit_xml_path = self._report(results, write_junit)
 
-                suite = unittest.TestLoader().loadTestsFromTestCase(AnalyzeWithReader)
-                # TODO: Wrap in error handler?
-                result = unittest.TextTestRunner(verbosity=2, resultclass=ReplayTestResult).run(suite)
-                results[replay_fixture.name].append({
-                    'result': result,
-                    'run_fixture_path': str(run_fixture.path),
-                    'filtered_fixture_path': str(replay_fixture.filtered_fixture.path),
-                })
+        self._log_stage_end(ReplayTestingPhase.ANALYZE)
+        return (exit_code, junit_xml_path)
 
-            # TODO: Maybe return the test class here? Or the results?
+    def _analyze_fixture(self, replay_fixture: ReplayFixture, analyze_cls: type[Any]) -> list[dict]:
+        """Run the analyze tests against every run fixture of a replay fixture."""
+        fixture_results: list[dict] = []
+        for run_fixture in replay_fixture.run_fixtures:
+            # Read the run fixture once for all test methods, each of which gets its own reader over it
+            store = MessageStore(
+                run_fixture.path,
+                max_memory_bytes=self._message_store_max_bytes,
+                spill_dir=Path(run_fixture.path).parent,
+            )
 
+            run_stats = read_run_stats(run_fixture.path)
+            time_to_ready = read_time_to_ready(run_fixture.path)
+
+            class AnalyzeWithReader(analyze_cls):
+                @property
+                def reader(inner_self):
+                    """SequentialReader over the run fixture, opened when the test first uses it."""
+                    if getattr(inner_self, '_run_reader', None) is None:
+                        inner_self._run_reader = get_sequential_mcap_reader(run_fixture.path)
+                    return inner_self._run_reader
+
+                @reader.setter
+                def reader(inner_self, reader):
+                    inner_self._run_reader = reader
+
+                @property
+                def filtered_reader(inner_self):
+                    """SequentialReader over the filtered fixture, opened when the test first uses it."""
+                    if getattr(inner_self, '_filtered_reader', None) is None:
+                        inner_self._filtered_reader = get_sequential_mcap_reader(replay_fixture.filtered_fixture.path)
+                    return inner_self._filtered_reader
+
+                @filtered_reader.setter
+                def filtered_reader(inner_self, reader):
+                    inner_self._filtered_reader = reader
+
+                def setUp(inner_self):
+                    super().setUp()  # Call original setUp if it exists
+                    inner_self.message_store = store
+                    inner_self.run_fixture = run_fixture
+                    inner_self.filtered_fixture = replay_fixture.filtered_fixture
+                    inner_self.run_stats = run_stats
+                    inner_self.time_to_ready = time_to_ready
+                    inner_self.suite_classname = analyze_cls.__name__
+
+                def tearDown(inner_self):
+                    # Close the readers the test opened rather than keeping them open until the suite is collected
+                    for name in ('_run_reader', '_filtered_reader'):
+                        reader = getattr(inner_self, name, None)
+                        if reader is not None and hasattr(reader, 'close'):
+                            reader.close()
+                        setattr(inner_self, name, None)
+                    super().tearDown()
+
+                def messages(inner_self, start_time: Optional[int] = None, end_time: Optional[int] = None):
+                    """Iterate over the deserialized messages of the topics declared for the running test."""
+                    test_method = getattr(inner_self, inner_self._testMethodName)
+                    topics = getattr(test_method, TOPICS_ATTRIBUTE, getattr(analyze_cls, TOPICS_ATTRIBUTE, []))
+                    return store.messages(topics, start_time, end_time)
+
+            suite = unittest.TestLoader().loadTestsFromTestCase(AnalyzeWithReader)
+            # TODO: Wrap in error handler?
+            try:
+                # Read the topics declared by all test methods in one pass, rather than one pass per test
+                store.load(declared_topics(analyze_cls))
+                result = unittest.TextTestRunner(verbosity=2, resultclass=ReplayTestResult).run(suite)
+            finally:
+                store.close()
+            fixture_results.append({
+                'result': result,
+                'run_fixture_path': str(run_fixture.path),
+                'filtered_fixture_path': str(replay_fixture.filtered_fixture.path),
+                'run_stats': run_stats,
+                'time_to_ready': time_to_ready,
+            })
+        return fixture_results
+
+    def _report(self, results: dict[str, list], write_junit: bool) -> tuple[int, Path]:
+        """Log the results of all analyze tests as JUnit XML, optionally write it, and return the exit code."""
         junit_xml_path = self._replay_results_directory / 'results.xml'
         xml_tree = unittest_results_to_xml(
             test_results=results,
@@ -287,8 +848,6 @@ class ReplayTestingRunner:
             write_xml_to_file(xml_tree, junit_xml_path)
 
         exit_code = 0 if self._was_successful(results) else 1
-
-        self._log_stage_end(ReplayTestingPhase.ANALYZE)
         return (exit_code, junit_xml_path)
 
     def _was_successful(self, results: dict[str, list]) -> bool:
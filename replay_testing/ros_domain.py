@@ -0,0 +1,142 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""ROS domain isolation of concurrent runs, on this host and across processes."""
+
+import fcntl
+import os
+import random
+import time
+from pathlib import Path
+from typing import Optional
+
+from .logging_config import get_logger
+
+_logger_ = get_logger()
+
+# Domain IDs that map to valid DDS ports on every platform, see
+# https://docs.ros.org/en/rolling/Concepts/Intermediate/About-Domain-ID.html
+MIN_DOMAIN_ID = 1
+MAX_DOMAIN_ID = 101
+
+DOMAIN_LEASE_DIR_NAME = 'domain_leases'
+
+# Distributions that predate ROS_AUTOMATIC_DISCOVERY_RANGE
+_LOCALHOST_ONLY_DISTROS = ('foxy', 'galactic', 'humble')
+
+
+def isolated_environment(domain_id: int, log_dir: Optional[Path] = None) -> dict[str, str]:
+    """Environment variables that confine the nodes of a run to a ROS domain on this host.
+
+    Args:
+        domain_id: ROS domain of the run
+        log_dir: Directory for the ROS logs of the run, the default ROS log directory if None
+
+    Returns:
+        dict[str, str]: Variables to add to the environment of the run's processes
+    """
+    if not MIN_DOMAIN_ID <= domain_id <= MAX_DOMAIN_ID:
+        raise ValueError(f'ROS domain ID must be between {MIN_DOMAIN_ID} and {MAX_DOMAIN_ID}, got {domain_id}')
+
+    environment = {'ROS_DOMAIN_ID': str(domain_id)}
+    if os.environ.get('ROS_DISTRO') in _LOCALHOST_ONLY_DISTROS:
+        environment['ROS_LOCALHOST_ONLY'] = '1'
+    else:
+        environment['ROS_AUTOMATIC_DISCOVERY_RANGE'] = 'LOCALHOST'
+    if log_dir is not None:
+        environment['ROS_LOG_DIR'] = str(log_dir)
+    return environment
+
+
+class DomainLease:
+    """Exclusive use of a ROS domain on this host, held until released or until the holding process exits."""
+
+    def __init__(self, domain_id: int, lock_file):
+        self.domain_id = domain_id
+        self._lock_file = lock_file
+
+    def release(self):
+        if self._lock_file is None:
+            return
+        # Unlock explicitly, forked processes may still hold a copy of the file descriptor
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
+        self._lock_file = None
+
+    def __enter__(self) -> 'DomainLease':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class DomainLeaseAllocator:
+    """Hands out ROS domain IDs that no other process on this host has leased.
+
+    Every domain ID has a lock file in `lease_dir`, and a lease is an exclusive `flock` on it. The kernel
+    drops the lock when the process holding it exits, so leases of crashed processes are reclaimed without
+    any cleanup. Every runner using the same lease directory, e.g. `ctest -j` running many replay tests, gets
+    a domain of its own.
+    """
+
+    def __init__(
+        self,
+        lease_dir: Path,
+        min_domain_id: int = MIN_DOMAIN_ID,
+        max_domain_id: int = MAX_DOMAIN_ID,
+        poll_interval: float = 0.5,
+    ):
+        self.lease_dir = Path(lease_dir)
+        self.domain_ids = range(min_domain_id, max_domain_id + 1)
+        self.poll_interval = poll_interval
+
+    def try_acquire(self) -> Optional[DomainLease]:
+        """Lease a free domain, or return None if all domains are leased."""
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        # Start at a random domain, so concurrent processes don't all contend for the lowest free one
+        start = random.randrange(len(self.domain_ids))
+        for domain_id in (self.domain_ids[(start + i) % len(self.domain_ids)] for i in range(len(self.domain_ids))):
+            lock_file = (self.lease_dir / f'domain_{domain_id}.lock').open('a+')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                continue
+            lock_file.truncate(0)
+            lock_file.write(f'{os.getpid()}\n')
+            lock_file.flush()
+            _logger_.debug(f'Leased ROS domain {domain_id}')
+            return DomainLease(domain_id, lock_file)
+        return None
+
+    def acquire(self, timeout: Optional[float] = None) -> DomainLease:
+        """Lease a free domain, waiting for one to be released if all are leased.
+
+        Args:
+            timeout: Seconds to wait for a free domain, forever if None
+
+        Returns:
+            DomainLease: The lease, to release once the domain is no longer used
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        logged = False
+        while (lease := self.try_acquire()) is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f'No free ROS domain in {self.lease_dir} after {timeout} seconds')
+            if not logged:
+                _logger_.info(f'All ROS domains in {self.lease_dir} are leased, waiting for one to be released')
+                logged = True
+            time.sleep(self.poll_interval)
+        return lease
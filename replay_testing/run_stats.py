@@ -0,0 +1,262 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+from array import array
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .logging_config import get_logger
+from .mcap_io import (
+    MCAP_MAGIC,
+    MESSAGE_HEAD_SIZE,
+    McapError,
+    Opcode,
+    decompress,
+    iter_records,
+    parse_channel,
+    parse_chunk,
+    parse_message_head,
+    parse_schema,
+    read_record,
+)
+from .reader import get_sequential_mcap_reader
+
+_logger_ = get_logger()
+
+# Bump when the fields of the sidecar change, to invalidate existing sidecars
+RUN_STATS_VERSION = 1
+
+
+class TopicStatistics(NamedTuple):
+    name: str
+    type: str
+    message_count: int
+    # Total size of the serialized messages
+    bytes: int
+    first_time: Optional[int]
+    last_time: Optional[int]
+    # Mean rate over the topic's time range, and percentiles of the rate between consecutive messages
+    rate_hz: Optional[float]
+    rate_p5_hz: Optional[float]
+    rate_p50_hz: Optional[float]
+    rate_p95_hz: Optional[float]
+    # Standard deviation and maximum of the time between consecutive messages
+    jitter_ns: Optional[float]
+    max_interval_ns: Optional[int]
+
+
+class RunStatistics(NamedTuple):
+    topics: dict[str, TopicStatistics]
+    message_count: int
+    bytes: int
+    start_time: Optional[int]
+    end_time: Optional[int]
+
+    def to_dict(self) -> dict:
+        return {
+            'version': RUN_STATS_VERSION,
+            'message_count': self.message_count,
+            'bytes': self.bytes,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'topics': {name: stats._asdict() for name, stats in self.topics.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RunStatistics':
+        return cls(
+            topics={name: TopicStatistics(**stats) for name, stats in data['topics'].items()},
+            message_count=data['message_count'],
+            bytes=data['bytes'],
+            start_time=data['start_time'],
+            end_time=data['end_time'],
+        )
+
+
+class _TopicAccumulator:
+    def __init__(self, name: str, type: str):
+        self.name = name
+        self.type = type
+        self.log_times = array('q')
+        self.bytes = 0
+
+    def add(self, log_time: int, size: int):
+        self.log_times.append(log_time)
+        self.bytes += size
+
+    def statistics(self) -> TopicStatistics:
+        log_times = np.sort(np.frombuffer(self.log_times, dtype=np.int64))
+        count = len(log_times)
+        first_time = int(log_times[0]) if count else None
+        last_time = int(log_times[-1]) if count else None
+        rate_hz = rate_p5_hz = rate_p50_hz = rate_p95_hz = jitter_ns = max_interval_ns = None
+        if count >= 2:
+            intervals = np.diff(log_times)
+            if last_time > first_time:
+                rate_hz = (count - 1) * 1e9 / (last_time - first_time)
+            # A slow rate is a long interval, so the 5th rate percentile is the 95th interval percentile
+            interval_p95, interval_p50, interval_p5 = np.percentile(intervals, [95, 50, 5])
+            rate_p5_hz, rate_p50_hz, rate_p95_hz = (
+                1e9 / interval if interval > 0 else None for interval in (interval_p95, interval_p50, interval_p5)
+            )
+            jitter_ns = float(np.std(intervals))
+            max_interval_ns = int(intervals.max())
+        return TopicStatistics(
+            name=self.name,
+            type=self.type,
+            message_count=count,
+            bytes=self.bytes,
+            first_time=first_time,
+            last_time=last_time,
+            rate_hz=rate_hz,
+            rate_p5_hz=rate_p5_hz,
+            rate_p50_hz=rate_p50_hz,
+            rate_p95_hz=rate_p95_hz,
+            jitter_ns=jitter_ns,
+            max_interval_ns=max_interval_ns,
+        )
+
+
+def compute_run_stats(path: Path) -> RunStatistics:
+    """Compute per-topic statistics of an MCAP file in a single streaming pass over its records.
+
+    Only the log time and size of every message are kept, so no message is deserialized.
+
+    Returns:
+        RunStatistics: Per-topic message counts, byte volume, time range, rate and jitter
+    """
+    path = Path(path)
+    try:
+        with path.open('rb') as stream:
+            topics = _accumulate_from_scan(stream)
+    except McapError as e:
+        _logger_.debug(f'Falling back to rosbag2 to compute the statistics of {path}: {e}')
+        topics = _accumulate_from_rosbag2(path)
+
+    topic_stats = {name: accumulator.statistics() for name, accumulator in topics.items()}
+    first_times = [stats.first_time for stats in topic_stats.values() if stats.first_time is not None]
+    last_times = [stats.last_time for stats in topic_stats.values() if stats.last_time is not None]
+    return RunStatistics(
+        topics=topic_stats,
+        message_count=sum(stats.message_count for stats in topic_stats.values()),
+        bytes=sum(stats.bytes for stats in topic_stats.values()),
+        start_time=min(first_times) if first_times else None,
+        end_time=max(last_times) if last_times else None,
+    )
+
+
+def _accumulate_from_scan(stream) -> dict[str, _TopicAccumulator]:
+    if stream.read(len(MCAP_MAGIC)) != MCAP_MAGIC:
+        raise McapError('Not an MCAP file: bad magic')
+
+    schema_names: dict[int, str] = {}
+    channel_topics: dict[int, _TopicAccumulator] = {}
+    topics: dict[str, _TopicAccumulator] = {}
+
+    def handle(opcode: int, body):
+        if opcode == Opcode.SCHEMA:
+            schema = parse_schema(body)
+            schema_names[schema.id] = schema.name
+        elif opcode == Opcode.CHANNEL:
+            channel = parse_channel(body)
+            channel_topics[channel.id] = topics.setdefault(
+                channel.topic, _TopicAccumulator(channel.topic, schema_names.get(channel.schema_id, ''))
+            )
+        elif opcode == Opcode.MESSAGE:
+            channel_id, _, log_time, _ = parse_message_head(body)
+            if channel_id not in channel_topics:
+                raise McapError(f'Message on undeclared channel {channel_id}')
+            channel_topics[channel_id].add(log_time, len(body) - MESSAGE_HEAD_SIZE)
+
+    while (next_record := read_record(stream)) is not None:
+        opcode, body = next_record
+        if opcode == Opcode.CHUNK:
+            chunk = parse_chunk(body)
+            for chunk_opcode, _, chunk_body in iter_records(
+                decompress(chunk.compression, chunk.records, chunk.uncompressed_size)
+            ):
+                handle(chunk_opcode, chunk_body)
+        elif opcode == Opcode.DATA_END:
+            break
+        else:
+            handle(opcode, body)
+    return topics
+
+
+def _accumulate_from_rosbag2(path: Path) -> dict[str, _TopicAccumulator]:
+    reader = get_sequential_mcap_reader(path)
+    topics = {
+        topic_metadata.name: _TopicAccumulator(topic_metadata.name, topic_metadata.type)
+        for topic_metadata in reader.get_all_topics_and_types()
+    }
+    while reader.has_next():
+        topic_name, data, timestamp = reader.read_next()
+        topics[topic_name].add(timestamp, len(data))
+    return topics
+
+
+def run_stats_path(mcap_path: Path) -> Path:
+    """Path of the statistics sidecar of an MCAP file, e.g. `run_0.stats.json` next to `run_0.mcap`."""
+    mcap_path = Path(mcap_path)
+    return mcap_path.with_name(f'{mcap_path.stem}.stats.json')
+
+
+def _source(mcap_path: Path) -> dict:
+    stat = Path(mcap_path).stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def write_run_stats(mcap_path: Path) -> RunStatistics:
+    """Compute the statistics of an MCAP file and write them to its JSON sidecar."""
+    stats = compute_run_stats(mcap_path)
+    sidecar_path = run_stats_path(mcap_path)
+    tmp_path = sidecar_path.with_name(f'.{sidecar_path.name}.tmp')
+    with tmp_path.open('w') as f:
+        json.dump({**stats.to_dict(), 'source': _source(mcap_path)}, f, indent=2)
+    tmp_path.replace(sidecar_path)
+    _logger_.debug(f'Wrote topic statistics of {mcap_path} to {sidecar_path}')
+    return stats
+
+
+def read_run_stats(mcap_path: Path) -> RunStatistics:
+    """Read the statistics of an MCAP file from its JSON sidecar.
+
+    The sidecar is written first if it is missing or was written for a different version of the file.
+    """
+    sidecar_path = run_stats_path(mcap_path)
+    try:
+        with sidecar_path.open() as f:
+            data = json.load(f)
+        if data.get('version') == RUN_STATS_VERSION and data.get('source') == _source(mcap_path):
+            return RunStatistics.from_dict(data)
+    except FileNotFoundError:
+        pass
+    except (ValueError, KeyError, TypeError) as e:
+        _logger_.warning(f'Ignoring invalid topic statistics {sidecar_path}: {e}')
+    return write_run_stats(mcap_path)
+
+
+def run_stats_properties(stats: RunStatistics) -> list[tuple[str, str]]:
+    """Flatten run statistics into (name, value) pairs, e.g. for JUnit properties."""
+    properties = [('stats.message_count', str(stats.message_count)), ('stats.bytes', str(stats.bytes))]
+    for name, topic_stats in sorted(stats.topics.items()):
+        for field, value in topic_stats._asdict().items():
+            if field in ('name', 'type') or value is None:
+                continue
+            properties.append((f'stats.{name}.{field}', f'{value:.6g}' if isinstance(value, float) else str(value)))
+    return properties
@@ -0,0 +1,272 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from .logging_config import get_logger
+from .mcap_io import (
+    MCAP_MAGIC,
+    ChunkIndex,
+    McapError,
+    McapSummary,
+    Opcode,
+    decompress,
+    iter_records,
+    parse_channel,
+    parse_chunk,
+    parse_message_head,
+    parse_message_index,
+    parse_schema,
+    read_record,
+    read_summary,
+)
+from .models import TopicRequirement
+from .reader import get_sequential_mcap_reader
+
+_logger_ = get_logger()
+
+
+class TopicSummary(NamedTuple):
+    name: str
+    type: str
+    message_count: int
+    start_time: Optional[int]
+    end_time: Optional[int]
+
+    @property
+    def duration(self) -> float:
+        """Time between the first and last message on the topic, in seconds."""
+        if self.start_time is None or self.end_time is None:
+            return 0.0
+        return (self.end_time - self.start_time) / 1e9
+
+
+class FixtureSummary(NamedTuple):
+    topics: dict[str, TopicSummary]
+    message_count: int
+    start_time: Optional[int]
+    end_time: Optional[int]
+
+    @property
+    def duration(self) -> float:
+        """Time between the first and last message of the fixture, in seconds."""
+        if self.start_time is None or self.end_time is None:
+            return 0.0
+        return (self.end_time - self.start_time) / 1e9
+
+
+class _TopicStats:
+    def __init__(self, name: str, type: str):
+        self.name = name
+        self.type = type
+        self.message_count = 0
+        self.start_time: Optional[int] = None
+        self.end_time: Optional[int] = None
+
+    def add_times(self, start_time: int, end_time: int):
+        if self.start_time is None or start_time < self.start_time:
+            self.start_time = start_time
+        if self.end_time is None or end_time > self.end_time:
+            self.end_time = end_time
+
+
+def read_fixture_summary(path: Path) -> FixtureSummary:
+    """Read the topics, per-topic message counts and time ranges of an MCAP file.
+
+    For indexed files this only reads the summary section, plus the message indexes of the first and last
+    chunks of each topic to find its exact time range. Files without a usable index are scanned instead.
+
+    Returns:
+        FixtureSummary: Per-topic and overall message counts and log time ranges
+    """
+    path = Path(path)
+    try:
+        with path.open('rb') as stream:
+            summary = read_summary(stream)
+            if summary is not None and _has_message_indexes(summary):
+                return _summary_from_index(stream, summary)
+            _logger_.debug(f'No message index in {path}, scanning it for a summary')
+            stream.seek(0)
+            return _summary_from_scan(stream)
+    except McapError as e:
+        _logger_.debug(f'Falling back to rosbag2 to summarize {path}: {e}')
+        return _summary_from_rosbag2(path)
+
+
+def _has_message_indexes(summary: McapSummary) -> bool:
+    return bool(summary.chunk_indexes) and all(index.message_index_offsets for index in summary.chunk_indexes)
+
+
+def _read_message_index_times(stream, index: ChunkIndex, channel_id: int) -> tuple[int, int]:
+    stream.seek(index.message_index_offsets[channel_id])
+    record = read_record(stream)
+    if record is None or record[0] != Opcode.MESSAGE_INDEX:
+        raise McapError('Chunk index points to an invalid message index record')
+    _, entries = parse_message_index(record[1])
+    if not entries:
+        return index.message_start_time, index.message_end_time
+    log_times = [log_time for log_time, _ in entries]
+    return min(log_times), max(log_times)
+
+
+def _channel_time_range(stream, chunk_indexes: list[ChunkIndex], channel_id: int) -> tuple[int, int]:
+    """Find the exact log time range of a channel, reading as few message indexes as possible."""
+    start_time = None
+    for index in sorted(chunk_indexes, key=lambda index: index.message_start_time):
+        if start_time is not None and index.message_start_time >= start_time:
+            break
+        chunk_start, _ = _read_message_index_times(stream, index, channel_id)
+        start_time = chunk_start if start_time is None else min(start_time, chunk_start)
+
+    end_time = None
+    for index in sorted(chunk_indexes, key=lambda index: index.message_end_time, reverse=True):
+        if end_time is not None and index.message_end_time <= end_time:
+            break
+        _, chunk_end = _read_message_index_times(stream, index, channel_id)
+        end_time = chunk_end if end_time is None else max(end_time, chunk_end)
+
+    return start_time, end_time
+
+
+def _summary_from_index(stream, summary: McapSummary) -> FixtureSummary:
+    chunks_by_channel: dict[int, list[ChunkIndex]] = {}
+    for index in summary.chunk_indexes:
+        for channel_id in index.message_index_offsets:
+            chunks_by_channel.setdefault(channel_id, []).append(index)
+
+    channel_counts = summary.statistics.channel_message_counts if summary.statistics else None
+    if channel_counts is None:
+        channel_counts = {}
+        for index in summary.chunk_indexes:
+            for channel_id, offset in index.message_index_offsets.items():
+                stream.seek(offset)
+                _, entries = parse_message_index(read_record(stream)[1])
+                channel_counts[channel_id] = channel_counts.get(channel_id, 0) + len(entries)
+
+    topics: dict[str, _TopicStats] = {}
+    for channel in summary.channels.values():
+        schema = summary.schemas.get(channel.schema_id)
+        stats = topics.setdefault(channel.topic, _TopicStats(channel.topic, schema.name if schema else ''))
+        stats.message_count += channel_counts.get(channel.id, 0)
+        if chunks_by_channel.get(channel.id):
+            stats.add_times(*_channel_time_range(stream, chunks_by_channel[channel.id], channel.id))
+
+    return _fixture_summary(topics)
+
+
+def _summary_from_scan(stream) -> FixtureSummary:
+    if stream.read(len(MCAP_MAGIC)) != MCAP_MAGIC:
+        raise McapError('Not an MCAP file: bad magic')
+
+    schema_names: dict[int, str] = {}
+    channel_topics: dict[int, _TopicStats] = {}
+    topics: dict[str, _TopicStats] = {}
+
+    def handle(opcode: int, body):
+        if opcode == Opcode.SCHEMA:
+            schema = parse_schema(body)
+            schema_names[schema.id] = schema.name
+        elif opcode == Opcode.CHANNEL:
+            channel = parse_channel(body)
+            channel_topics[channel.id] = topics.setdefault(
+                channel.topic, _TopicStats(channel.topic, schema_names.get(channel.schema_id, ''))
+            )
+        elif opcode == Opcode.MESSAGE:
+            channel_id, _, log_time, _ = parse_message_head(body)
+            if channel_id not in channel_topics:
+                raise McapError(f'Message on undeclared channel {channel_id}')
+            stats = channel_topics[channel_id]
+            stats.message_count += 1
+            stats.add_times(log_time, log_time)
+
+    while (next_record := read_record(stream)) is not None:
+        opcode, body = next_record
+        if opcode == Opcode.CHUNK:
+            chunk = parse_chunk(body)
+            for chunk_opcode, _, chunk_body in iter_records(
+                decompress(chunk.compression, chunk.records, chunk.uncompressed_size)
+            ):
+                handle(chunk_opcode, chunk_body)
+        elif opcode == Opcode.DATA_END:
+            break
+        else:
+            handle(opcode, body)
+
+    return _fixture_summary(topics)
+
+
+def _summary_from_rosbag2(path: Path) -> FixtureSummary:
+    reader = get_sequential_mcap_reader(path)
+    topics = {
+        topic_metadata.name: _TopicStats(topic_metadata.name, topic_metadata.type)
+        for topic_metadata in reader.get_all_topics_and_types()
+    }
+    while reader.has_next():
+        topic_name, _, timestamp = reader.read_next()
+        topics[topic_name].message_count += 1
+        topics[topic_name].add_times(timestamp, timestamp)
+    return _fixture_summary(topics)
+
+
+def _fixture_summary(topics: dict[str, _TopicStats]) -> FixtureSummary:
+    start_times = [stats.start_time for stats in topics.values() if stats.start_time is not None]
+    end_times = [stats.end_time for stats in topics.values() if stats.end_time is not None]
+    return FixtureSummary(
+        topics={
+            name: TopicSummary(stats.name, stats.type, stats.message_count, stats.start_time, stats.end_time)
+            for name, stats in topics.items()
+        },
+        message_count=sum(stats.message_count for stats in topics.values()),
+        start_time=min(start_times) if start_times else None,
+        end_time=max(end_times) if end_times else None,
+    )
+
+
+def check_topic_requirements(
+    summary: FixtureSummary,
+    required_topics: list[str],
+    requirements: Optional[dict[str, TopicRequirement]] = None,
+) -> list[str]:
+    """Check a fixture summary against required topics and per-topic requirements.
+
+    Args:
+        summary: Summary of the fixture to check
+        required_topics: Topics that must be present
+        requirements: Optional minimum message count and duration per topic
+
+    Returns:
+        list[str]: A description of every unmet requirement, empty if all are met
+    """
+    errors = []
+    missing_topics = set(required_topics) - set(summary.topics)
+    if missing_topics:
+        errors.append(f'Missing topics: {sorted(missing_topics)}')
+
+    for topic, requirement in sorted((requirements or {}).items()):
+        topic_summary = summary.topics.get(topic)
+        if topic_summary is None:
+            if topic not in missing_topics:
+                errors.append(f'Missing topic: {topic}')
+            continue
+        if topic_summary.message_count < requirement.min_message_count:
+            errors.append(
+                f'{topic} has {topic_summary.message_count} messages, expected at least {requirement.min_message_count}'
+            )
+        if topic_summary.duration < requirement.min_duration:
+            errors.append(
+                f'{topic} spans {topic_summary.duration:.3f} s, expected at least {requirement.min_duration:.3f} s'
+            )
+    return errors
@@ -14,8 +14,17 @@
 #
 
 import os
+import shutil
+import stat
 from pathlib import Path
 
+from .logging_config import get_logger
+
+_logger_ = get_logger()
+
+# ioctl request to share the extents of one file with another, see ioctl_ficlone(2)
+FICLONE = 0x40049409
+
 
 def find_mcap_files(input_dir: Path) -> list[Path]:
     """Recursively find all .mcap files in the input directory."""
@@ -26,3 +35,118 @@ def find_mcap_files(input_dir: Path) -> list[Path]:
             if file.endswith('.mcap'):
                 mcap_files.append(Path(root) / file)
     return mcap_files
+
+
+def link_or_copy(source: Path, destination: Path):
+    """Hardlink source to destination, copying when the filesystem does not allow it."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def _reflink(source: Path, destination: Path):
+    import fcntl
+
+    with source.open('rb') as source_file, destination.open('wb') as destination_file:
+        try:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+        except OSError:
+            destination.unlink(missing_ok=True)
+            raise
+
+
+_WRITE_PERMISSIONS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+def make_read_only(path: Path) -> bool:
+    """Remove the write permissions of a file, returning whether it is read-only now."""
+    path = Path(path)
+    try:
+        mode = path.stat().st_mode
+        if mode & _WRITE_PERMISSIONS:
+            path.chmod(mode & ~_WRITE_PERMISSIONS)
+    except OSError as e:
+        _logger_.debug(f'Could not make {path} read-only: {e}')
+        return False
+    return True
+
+
+def materialize(source: Path, destination: Path, read_only: bool = True, owns_source: bool = False) -> str:
+    """Make the contents of source available at destination without copying them if possible.
+
+    Tries a reflink (copy-on-write clone) first, then a hardlink, then a symlink, and only copies the file when
+    the filesystem supports none of them. Any existing file at destination is replaced.
+
+    Args:
+        source: File to materialize
+        destination: Path to materialize the file at
+        read_only: Remove write permissions from reflinks and copies, so tests cannot modify the file.
+            Hardlinks and symlinks share their permissions with source, which is only changed if it is owned.
+        owns_source: Source belongs to this package, e.g. a download cache entry, and is made read-only too, so
+            hardlinks and symlinks to it are read-only. If it cannot be, only a reflink or a copy is made.
+
+    Returns:
+        str: The method used, one of 'reflink', 'hardlink', 'symlink' or 'copy'
+    """
+    source = Path(source)
+    destination = Path(destination)
+    destination.unlink(missing_ok=True)
+
+    candidates = [('reflink', _reflink)]
+    if not (read_only and owns_source) or make_read_only(source):
+        candidates += [
+            ('hardlink', os.link),
+            ('symlink', lambda source, destination: destination.symlink_to(source.resolve())),
+        ]
+
+    method = 'copy'
+    for candidate, make in candidates:
+        try:
+            make(source, destination)
+            method = candidate
+            break
+        except (OSError, ImportError):
+            continue
+    else:
+        shutil.copyfile(source, destination)
+
+    # A chmod of a hardlink or symlink would change the permissions of source too
+    if read_only and method in ('reflink', 'copy'):
+        make_read_only(destination)
+
+    _logger_.debug(f'Materialized {source} at {destination} via {method}')
+    return method
+
+
+class TeeReader:
+    """Readable stream wrapper that copies everything read from `source` into `sink`."""
+
+    def __init__(self, source, sink, block_size: int = 1024 * 1024):
+        self._source = source
+        self._sink = sink
+        self._block_size = block_size
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            chunks = []
+            while chunk := self.read(self._block_size):
+                chunks.append(chunk)
+            return b''.join(chunks)
+
+        # Sources like sockets may return short reads, so keep reading until size bytes or end of stream
+        data = self._source.read(size)
+        while data and len(data) < size:
+            more = self._source.read(size - len(data))
+            if not more:
+                break
+            data += more
+        self._sink.write(data)
+        self.bytes_read += len(data)
+        return data
+
+    def drain(self):
+        """Read the rest of the source, so the sink receives the complete stream."""
+        while self.read(self._block_size):
+            pass
@@ -0,0 +1,72 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+import sys
+import types
+from pathlib import Path
+
+from replay_testing.bag_worker import BagWorker
+
+
+class _StorageOptions:
+    def __init__(self, uri: str, storage_id: str):
+        self.uri = uri
+        self.storage_id = storage_id
+
+
+class _PlayOptions:
+    pass
+
+
+class _Player:
+    """Writes the environment it was created in to the bag path, where a rosbag2 Player reads its ROS domain."""
+
+    def __init__(self):
+        self._environment = dict(os.environ)
+
+    def play(self, storage_options, play_options):
+        Path(storage_options.uri).write_text(json.dumps({'pid': os.getpid(), 'environment': self._environment}))
+
+
+def test_helper_plays_in_environment_of_request(monkeypatch, tmp_path):
+    """Test that a reused helper creates every player in the ROS domain of the runner at the time of the request."""
+    rosbag2_py = types.ModuleType('rosbag2_py')
+    rosbag2_py.StorageOptions = _StorageOptions
+    rosbag2_py.PlayOptions = _PlayOptions
+    rosbag2_py.Player = _Player
+    # The helper is forked, so it imports the fake module too
+    monkeypatch.setitem(sys.modules, 'rosbag2_py', rosbag2_py)
+    monkeypatch.delenv('ROS_AUTOMATIC_DISCOVERY_RANGE', raising=False)
+
+    worker = BagWorker('bag_player')
+    try:
+        monkeypatch.setenv('ROS_DOMAIN_ID', '3')
+        monkeypatch.setenv('ROS_AUTOMATIC_DISCOVERY_RANGE', 'LOCALHOST')
+        worker.play(tmp_path / 'first', {})
+        monkeypatch.setenv('ROS_DOMAIN_ID', '4')
+        monkeypatch.delenv('ROS_AUTOMATIC_DISCOVERY_RANGE')
+        worker.play(tmp_path / 'second', {})
+    finally:
+        worker.close()
+
+    first = json.loads((tmp_path / 'first').read_text())
+    second = json.loads((tmp_path / 'second').read_text())
+    assert first['pid'] == second['pid'] != os.getpid()
+    assert first['environment']['ROS_DOMAIN_ID'] == '3'
+    assert first['environment']['ROS_AUTOMATIC_DISCOVERY_RANGE'] == 'LOCALHOST'
+    assert second['environment']['ROS_DOMAIN_ID'] == '4'
+    # Variables removed from the environment of the runner are removed from the helper too
+    assert 'ROS_AUTOMATIC_DISCOVERY_RANGE' not in second['environment']
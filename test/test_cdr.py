@@ -0,0 +1,94 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from replay_testing import get_sequential_mcap_reader, read_columns, read_messages
+from replay_testing.cdr import CdrDecoder
+from replay_testing.mcap_io import read_summary
+from replay_testing.reader import read_serialized_messages
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+CMD_VEL_2_MCAP = FIXTURES_DIR / 'cmd_vel_only_2.mcap'
+
+
+def _schema_decoder(path: Path) -> CdrDecoder:
+    with path.open('rb') as stream:
+        schema = next(iter(read_summary(stream).schemas.values()))
+    return CdrDecoder.from_definition(schema.name, schema.data.decode('utf-8'))
+
+
+def _serialized_messages(path: Path, topic: str) -> list[bytes]:
+    return [bytes(data) for _, data, _ in read_serialized_messages(get_sequential_mcap_reader(path), [topic])]
+
+
+def _twist_stamped(sec: int, frame_id: str, linear_x: float) -> bytes:
+    data = b'\x00\x01\x00\x00' + struct.pack('<iII', sec, 0, len(frame_id) + 1) + frame_id.encode() + b'\x00'
+    data += b'\x00' * (-(len(data) - 4) % 8)
+    return data + struct.pack('<6d', linear_x, 0, 0, 0, 0, 0)
+
+
+def test_decode_matches_deserialize_message():
+    """Test that the CDR decoder decodes the same values as rclpy, per message and in columns."""
+    decoder = _schema_decoder(CMD_VEL_2_MCAP)
+    msgs = list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=['/vehicle/cmd_vel']))
+    serialized = _serialized_messages(CMD_VEL_2_MCAP, '/vehicle/cmd_vel')
+
+    decoded = decoder.decode(serialized[0])
+    assert decoded.header.stamp.sec == msgs[0][1].header.stamp.sec
+    assert decoded.header.frame_id == msgs[0][1].header.frame_id
+    assert decoded.twist.linear.x == msgs[0][1].twist.linear.x
+
+    columns = decoder.decode_columns(serialized, ['header.stamp', 'header.frame_id', 'twist.angular.z'])
+    assert columns['header.stamp'].tolist() == [
+        msg.header.stamp.sec * 1_000_000_000 + msg.header.stamp.nanosec for _, msg, _ in msgs
+    ]
+    assert columns['header.frame_id'].tolist() == [msg.header.frame_id for _, msg, _ in msgs]
+    assert columns['twist.angular.z'].tolist() == [msg.twist.angular.z for _, msg, _ in msgs]
+
+
+def test_decode_columns_with_different_layouts():
+    """Test that messages with different string lengths are decoded correctly and in order."""
+    decoder = _schema_decoder(CMD_VEL_2_MCAP)
+    messages = [
+        _twist_stamped(1, 'map', 1.0),
+        _twist_stamped(2, 'odom', 2.0),
+        _twist_stamped(3, '', 3.0),
+        _twist_stamped(4, 'map', 4.0),
+    ]
+
+    columns = decoder.decode_columns(messages, ['header.stamp.sec', 'header.frame_id', 'twist.linear.x'])
+
+    assert columns['header.stamp.sec'].tolist() == [1, 2, 3, 4]
+    assert columns['header.frame_id'].tolist() == ['map', 'odom', '', 'map']
+    assert columns['twist.linear.x'].tolist() == [1.0, 2.0, 3.0, 4.0]
+
+
+def test_read_columns_decodes_cdr(monkeypatch):
+    """Test that read_columns returns the same values when decoding batches with the CDR decoder."""
+    monkeypatch.setattr('replay_testing.reader.get_cdr_decoder', lambda type_name: _schema_decoder(CMD_VEL_2_MCAP))
+    msgs = list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=['/vehicle/cmd_vel']))
+
+    columns = read_columns(
+        get_sequential_mcap_reader(CMD_VEL_2_MCAP), '/vehicle/cmd_vel', ['header.stamp', 'twist.linear.x'], batch_size=7
+    )
+
+    assert columns['timestamp'].dtype == np.int64
+    assert columns['timestamp'].tolist() == [timestamp for _, _, timestamp in msgs]
+    assert columns['twist.linear.x'].tolist() == [msg.twist.linear.x for _, msg, _ in msgs]
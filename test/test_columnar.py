@@ -0,0 +1,62 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from replay_testing import export_topic, get_sequential_mcap_reader, load_topic_table, read_columns
+from replay_testing.columnar import columns_dir
+
+pa = pytest.importorskip('pyarrow')
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+CMD_VEL_2_MCAP = FIXTURES_DIR / 'cmd_vel_only_2.mcap'
+
+
+def test_load_topic_table_caches_parquet(tmp_path):
+    """Test that a topic is exported to Parquet next to the MCAP once and loaded from the cache afterwards."""
+    mcap_path = tmp_path / 'run_0.mcap'
+    shutil.copyfile(CMD_VEL_2_MCAP, mcap_path)
+
+    table = load_topic_table(mcap_path, '/vehicle/cmd_vel')
+    expected = read_columns(get_sequential_mcap_reader(mcap_path), '/vehicle/cmd_vel', ['twist.linear.x'])
+    assert table.num_rows == 50
+    np.testing.assert_array_equal(table.column('timestamp').to_numpy(), expected['timestamp'])
+    np.testing.assert_array_equal(table.column('twist.linear.x').to_numpy(), expected['twist.linear.x'])
+    assert 'header.frame_id' in table.column_names
+
+    parquet_path = columns_dir(mcap_path) / 'vehicle_cmd_vel.parquet'
+    assert parquet_path.exists()
+    mtime_ns = parquet_path.stat().st_mtime_ns
+    cached = load_topic_table(mcap_path, '/vehicle/cmd_vel', columns=['timestamp', 'twist.linear.x'])
+    assert parquet_path.stat().st_mtime_ns == mtime_ns
+    assert cached.column_names == ['timestamp', 'twist.linear.x']
+    assert cached.equals(table.select(['timestamp', 'twist.linear.x']))
+
+
+def test_load_topic_table_exports_again_when_mcap_changes(tmp_path):
+    """Test that a cached table is not used once the MCAP it was exported from changes."""
+    mcap_path = tmp_path / 'run_0.mcap'
+    shutil.copyfile(CMD_VEL_2_MCAP, mcap_path)
+    export_topic(mcap_path, '/vehicle/cmd_vel')
+
+    shutil.copyfile(FIXTURES_DIR / 'cmd_vel_only.mcap', mcap_path)
+    reader = get_sequential_mcap_reader(mcap_path)
+    count = 0
+    while reader.has_next():
+        count += reader.read_next()[0] == '/vehicle/cmd_vel'
+    assert load_topic_table(mcap_path, '/vehicle/cmd_vel').num_rows == count
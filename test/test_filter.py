@@ -13,14 +13,19 @@
 # limitations under the License.
 #
 
+import struct
 from pathlib import Path
 
 import rosbag2_py
 
-from replay_testing.filter import filter_mcap
+from replay_testing.filter import filter_mcap, filter_mcap_rosbag2, filter_mcap_stream
+from replay_testing.mcap_io import MCAP_MAGIC, Opcode, read_summary, record, serialize_channel, serialize_chunk_index
+from replay_testing.models import Downsample, FilterOptions, TimeWindow
+from replay_testing.utils import TeeReader
 
 FIXTURES_DIR = Path(__file__).parent / 'fixtures'
 CMD_VEL_MCAP = FIXTURES_DIR / 'cmd_vel_only.mcap'
+CMD_VEL_2_MCAP = FIXTURES_DIR / 'cmd_vel_only_2.mcap'
 
 
 def get_mcap_topics(mcap_path: Path) -> list[str]:
@@ -73,3 +78,164 @@ def test_filter_mcap_empty_topics_creates_empty_mcap(tmp_path):
     assert output_path.exists()
     topics = get_mcap_topics(output_path)
     assert '/vehicle/cmd_vel' in topics
+
+
+def read_all_messages(mcap_path: Path) -> list[tuple[str, bytes, int]]:
+    """Read all raw messages from an mcap file."""
+    reader = rosbag2_py.SequentialReader()
+    reader.open(
+        rosbag2_py.StorageOptions(uri=str(mcap_path), storage_id='mcap'),
+        rosbag2_py.ConverterOptions(input_serialization_format='cdr', output_serialization_format='cdr'),
+    )
+    messages = []
+    while reader.has_next():
+        topic_name, data, timestamp = reader.read_next()
+        messages.append((topic_name, bytes(data), timestamp))
+    return messages
+
+
+def test_filter_mcap_reuses_input_when_nothing_to_exclude(tmp_path):
+    """Test that filter_mcap reuses the input file when no excluded topic is present."""
+    input_path = tmp_path / 'input.mcap'
+    input_path.write_bytes(CMD_VEL_MCAP.read_bytes())
+    output_path = tmp_path / 'filtered.mcap'
+
+    filter_mcap(input=str(input_path), output=str(output_path), output_topics=['/nonexistent/topic'])
+
+    assert output_path.is_file()
+    assert output_path.read_bytes() == input_path.read_bytes()
+
+
+def test_filter_mcap_mixed_chunk(tmp_path):
+    """Test that filter_mcap rewrites chunks containing both kept and excluded topics."""
+    output_path = tmp_path / 'filtered.mcap'
+
+    filter_mcap(
+        input=str(CMD_VEL_2_MCAP),
+        output=str(output_path),
+        output_topics=['/scaled/cmd_vel'],
+    )
+
+    assert output_path.is_file()
+    assert get_mcap_topics(output_path) == ['/vehicle/cmd_vel']
+    messages = read_all_messages(output_path)
+    assert len(messages) == 50
+    assert all(topic_name == '/vehicle/cmd_vel' for topic_name, _, _ in messages)
+
+
+def _with_summary_channels(input_path: Path, output_path: Path, channel_ids: set[int]):
+    """Copy an MCAP file with a summary section of its chunk indexes and only some of its channels."""
+    with input_path.open('rb') as stream:
+        summary = read_summary(stream)
+    summary_section = b''.join(
+        serialize_channel(channel) for channel in summary.channels.values() if channel.id in channel_ids
+    )
+    summary_section += b''.join(serialize_chunk_index(index) for index in summary.chunk_indexes)
+    # No summary offsets and no CRC
+    footer = record(Opcode.FOOTER, struct.pack('<QQI', summary.summary_start, 0, 0))
+    output_path.write_bytes(input_path.read_bytes()[: summary.summary_start] + summary_section + footer + MCAP_MAGIC)
+
+
+def test_filter_mcap_without_channels_in_summary(tmp_path):
+    """Test that filter_mcap keeps the channels of chunks whose channels are missing from the summary section."""
+    expected_path = tmp_path / 'expected.mcap'
+    filter_mcap(input=str(CMD_VEL_2_MCAP), output=str(expected_path), output_topics=['/scaled/cmd_vel'])
+    with CMD_VEL_2_MCAP.open('rb') as stream:
+        channel_ids = {channel.topic: channel.id for channel in read_summary(stream).channels.values()}
+
+    # No channel records in the summary at all, or only the excluded one
+    for kept_channel_ids in (set(), {channel_ids['/scaled/cmd_vel']}):
+        input_path = tmp_path / 'input.mcap'
+        _with_summary_channels(CMD_VEL_2_MCAP, input_path, kept_channel_ids)
+        output_path = tmp_path / 'filtered.mcap'
+
+        filter_mcap(input=str(input_path), output=str(output_path), output_topics=['/scaled/cmd_vel'])
+
+        assert get_mcap_topics(output_path) == ['/vehicle/cmd_vel']
+        assert read_all_messages(output_path) == read_all_messages(expected_path)
+
+
+def test_filter_mcap_matches_rosbag2_filter(tmp_path):
+    """Test that the chunk passthrough filter keeps exactly the messages the rosbag2 filter keeps."""
+    passthrough_path = tmp_path / 'passthrough.mcap'
+    rosbag2_path = tmp_path / 'rosbag2.mcap'
+
+    filter_mcap(input=str(CMD_VEL_2_MCAP), output=str(passthrough_path), output_topics=['/scaled/cmd_vel'])
+    filter_mcap_rosbag2(input=str(CMD_VEL_2_MCAP), output=str(rosbag2_path), output_topics=['/scaled/cmd_vel'])
+
+    assert read_all_messages(passthrough_path) == read_all_messages(rosbag2_path)
+
+
+def test_filter_mcap_stream_matches_filter_mcap(tmp_path):
+    """Test that filtering while streaming keeps the same messages as filtering the complete file."""
+    streamed_path = tmp_path / 'streamed.mcap'
+    filtered_path = tmp_path / 'filtered.mcap'
+    cache_path = tmp_path / 'cache.mcap'
+
+    with CMD_VEL_2_MCAP.open('rb') as source, cache_path.open('wb') as cache_file:
+        tee = TeeReader(source, cache_file)
+        filter_mcap_stream(tee, streamed_path, ['/scaled/cmd_vel'])
+        tee.drain()
+    filter_mcap(input=str(CMD_VEL_2_MCAP), output=str(filtered_path), output_topics=['/scaled/cmd_vel'])
+
+    assert cache_path.read_bytes() == CMD_VEL_2_MCAP.read_bytes()
+    assert read_all_messages(streamed_path) == read_all_messages(filtered_path)
+
+
+def test_filter_mcap_time_window(tmp_path):
+    """Test that filter_mcap only keeps messages inside the time window, relative to the start of the fixture."""
+    output_path = tmp_path / 'filtered.mcap'
+    input_messages = read_all_messages(CMD_VEL_2_MCAP)
+    bag_start = min(timestamp for _, _, timestamp in input_messages)
+    bag_end = max(timestamp for _, _, timestamp in input_messages)
+    window_end = (bag_end - bag_start) / 2e9
+
+    filter_mcap(
+        input=str(CMD_VEL_2_MCAP),
+        output=str(output_path),
+        output_topics=['/scaled/cmd_vel'],
+        time_window=TimeWindow(end=window_end),
+    )
+
+    expected = [
+        message
+        for message in input_messages
+        if message[0] != '/scaled/cmd_vel' and message[2] <= bag_start + int(window_end * 1e9)
+    ]
+    assert 0 < len(expected) < 50
+    assert read_all_messages(output_path) == expected
+
+
+def test_filter_mcap_reencodes_chunks(tmp_path):
+    """Test that filter options change the compression and chunking of the output but not its messages."""
+    reference_path = tmp_path / 'reference.mcap'
+    output_path = tmp_path / 'filtered.mcap'
+
+    filter_mcap(input=str(CMD_VEL_2_MCAP), output=str(reference_path), output_topics=['/scaled/cmd_vel'])
+    filter_mcap(
+        input=str(CMD_VEL_2_MCAP),
+        output=str(output_path),
+        output_topics=['/scaled/cmd_vel'],
+        options=FilterOptions(compression='none', chunk_size=256),
+    )
+
+    with output_path.open('rb') as stream:
+        summary = read_summary(stream)
+    assert len(summary.chunk_indexes) > 1
+    assert all(index.compression == '' for index in summary.chunk_indexes)
+    assert read_all_messages(output_path) == read_all_messages(reference_path)
+
+
+def test_filter_mcap_downsamples_topics(tmp_path):
+    """Test that downsampling rules thin out a topic in the same pass as filtering."""
+    output_path = tmp_path / 'filtered.mcap'
+    kept_messages = [message for message in read_all_messages(CMD_VEL_2_MCAP) if message[0] == '/vehicle/cmd_vel']
+
+    filter_mcap(
+        input=str(CMD_VEL_2_MCAP),
+        output=str(output_path),
+        output_topics=['/scaled/cmd_vel'],
+        options=FilterOptions(downsample={'/vehicle/cmd_vel': Downsample(keep_every=3)}),
+    )
+
+    assert read_all_messages(output_path) == kept_messages[::3]
@@ -0,0 +1,136 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import stat
+from pathlib import Path
+
+from replay_testing.filter_cache import _CHUNK_CRC_OFFSET, FilteredFixtureCache, mcap_checksum
+from replay_testing.mcap_io import read_summary
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+CMD_VEL_MCAP = FIXTURES_DIR / 'cmd_vel_only.mcap'
+CMD_VEL_2_MCAP = FIXTURES_DIR / 'cmd_vel_only_2.mcap'
+
+
+def test_mcap_checksum_identifies_content(tmp_path):
+    """Test that the checksum follows file content, not file location."""
+    copy_path = tmp_path / 'copy.mcap'
+    copy_path.write_bytes(CMD_VEL_MCAP.read_bytes())
+
+    assert mcap_checksum(CMD_VEL_MCAP) == mcap_checksum(copy_path)
+    assert mcap_checksum(CMD_VEL_MCAP) != mcap_checksum(CMD_VEL_2_MCAP)
+
+
+def test_mcap_checksum_hashes_chunks_without_crc(tmp_path):
+    """Test that files whose chunks have no CRC still get different checksums for different payloads."""
+    data = bytearray(CMD_VEL_MCAP.read_bytes())
+    with CMD_VEL_MCAP.open('rb') as stream:
+        chunk_indexes = read_summary(stream).chunk_indexes
+    for index in chunk_indexes:
+        crc_offset = index.chunk_start_offset + _CHUNK_CRC_OFFSET
+        data[crc_offset : crc_offset + 4] = bytes(4)
+    first_path = tmp_path / 'first.mcap'
+    first_path.write_bytes(data)
+
+    # Same layout, one byte of the last chunk's records changed
+    last_index = chunk_indexes[-1]
+    data[last_index.chunk_start_offset + last_index.chunk_length - 1] ^= 0xFF
+    second_path = tmp_path / 'second.mcap'
+    second_path.write_bytes(data)
+
+    assert mcap_checksum(first_path) != mcap_checksum(second_path)
+
+
+def test_cache_key_depends_on_topics_and_options(tmp_path):
+    """Test that the cache key changes with the excluded topics and options, but not their order."""
+    cache = FilteredFixtureCache(cache_dir=tmp_path / 'cache')
+
+    key = cache.key(CMD_VEL_MCAP, ['/a', '/b'])
+    assert key == cache.key(CMD_VEL_MCAP, ['/b', '/a'])
+    assert key != cache.key(CMD_VEL_MCAP, ['/a'])
+    assert key != cache.key(CMD_VEL_MCAP, ['/a', '/b'], {'compression': 'lz4'})
+    assert key != cache.key(CMD_VEL_2_MCAP, ['/a', '/b'])
+
+
+def _filtered_copy(tmp_path: Path, name: str = 'run_filtered.mcap') -> Path:
+    filtered_path = tmp_path / name
+    filtered_path.write_bytes(CMD_VEL_MCAP.read_bytes())
+    return filtered_path
+
+
+def _is_read_only(path: Path) -> bool:
+    return not path.stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+
+
+def test_cache_store_and_fetch(tmp_path):
+    """Test that a stored filtered fixture is linked to the destination on a hit."""
+    cache = FilteredFixtureCache(cache_dir=tmp_path / 'cache')
+    key = cache.key(CMD_VEL_MCAP, ['/user/cmd_vel'])
+    destination = tmp_path / 'filtered.mcap'
+
+    assert not cache.fetch(key, destination)
+
+    cache.store(key, _filtered_copy(tmp_path))
+    assert cache.fetch(key, destination)
+    assert destination.read_bytes() == CMD_VEL_MCAP.read_bytes()
+    # A run cannot change the entry for later runs through its filtered fixture
+    assert _is_read_only(destination)
+
+
+def test_cache_copies_filtered_fixture_shared_with_other_files(tmp_path):
+    """Test that storing a filtered fixture linked to another file, e.g. its input, leaves that file writable."""
+    cache = FilteredFixtureCache(cache_dir=tmp_path / 'cache')
+    key = cache.key(CMD_VEL_MCAP, [])
+    input_path = _filtered_copy(tmp_path, 'input.mcap')
+    filtered_path = tmp_path / 'filtered.mcap'
+    os.link(input_path, filtered_path)
+
+    cache.store(key, filtered_path)
+
+    assert not _is_read_only(input_path)
+    assert cache.fetch(key, tmp_path / 'fetched.mcap')
+    assert (tmp_path / 'fetched.mcap').stat().st_ino != input_path.stat().st_ino
+
+
+def test_cache_discards_modified_entry(tmp_path):
+    """Test that an entry that no longer matches its size and checksum is a miss and is removed."""
+    cache = FilteredFixtureCache(cache_dir=tmp_path / 'cache')
+    key = cache.key(CMD_VEL_MCAP, ['/user/cmd_vel'])
+    cache.store(key, _filtered_copy(tmp_path))
+    (entry_path,) = (tmp_path / 'cache').glob('*/*.mcap')
+    entry_path.chmod(stat.S_IRUSR | stat.S_IWUSR)
+    with entry_path.open('ab') as f:
+        f.write(b'corrupted')
+
+    assert not cache.fetch(key, tmp_path / 'filtered.mcap')
+    assert not entry_path.exists()
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the oldest entries are evicted once the cache is over its size limit."""
+    fixture_size = CMD_VEL_MCAP.stat().st_size
+    cache = FilteredFixtureCache(cache_dir=tmp_path / 'cache', max_size_bytes=fixture_size)
+
+    first_key = cache.key(CMD_VEL_MCAP, ['/first'])
+    second_key = cache.key(CMD_VEL_MCAP, ['/second'])
+    cache.store(first_key, _filtered_copy(tmp_path, 'first_filtered.mcap'))
+    # Make the first entry unambiguously older, regardless of filesystem timestamp resolution
+    for metadata_path in (tmp_path / 'cache').glob('*/*.meta'):
+        os.utime(metadata_path, (0, 0))
+    cache.store(second_key, _filtered_copy(tmp_path, 'second_filtered.mcap'))
+
+    assert not cache.fetch(first_key, tmp_path / 'first.mcap')
+    assert cache.fetch(second_key, tmp_path / 'second.mcap')
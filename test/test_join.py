@@ -0,0 +1,80 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from replay_testing import get_sequential_mcap_reader, join_latencies, join_messages, merge_messages, read_messages
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+CMD_VEL_2_MCAP = FIXTURES_DIR / 'cmd_vel_only_2.mcap'
+
+
+def _stamped(topic_name: str, stamp: int, timestamp: int):
+    stamp_msg = SimpleNamespace(sec=stamp // 1_000_000_000, nanosec=stamp % 1_000_000_000)
+    return topic_name, SimpleNamespace(header=SimpleNamespace(stamp=stamp_msg)), timestamp
+
+
+def test_merge_messages_matches_bag_order():
+    """Test that merging the topics of a bag read separately gives the order of reading them together."""
+    streams = [
+        read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=[topic])
+        for topic in ['/vehicle/cmd_vel', '/scaled/cmd_vel']
+    ]
+    merged = [(topic_name, timestamp) for topic_name, _, timestamp in merge_messages(*streams)]
+    reader = get_sequential_mcap_reader(CMD_VEL_2_MCAP)
+    assert merged == [(topic_name, timestamp) for topic_name, _, timestamp in read_messages(reader, topics=[])]
+
+
+def test_join_on_timestamp_pairs_latest_input():
+    """Test that joining on log time pairs every output with the latest input logged at or before it."""
+    inputs = list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=['/vehicle/cmd_vel']))
+    outputs = list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=['/scaled/cmd_vel']))
+
+    latencies = join_latencies(iter(inputs), iter(outputs))
+
+    input_times = np.array([timestamp for _, _, timestamp in inputs])
+    expected = []
+    for _, _, output_time in outputs:
+        earlier = input_times[input_times <= output_time]
+        if len(earlier):
+            expected.append(output_time - earlier.max())
+    np.testing.assert_array_equal(latencies, expected)
+    assert np.all(latencies >= 0)
+    assert len(join_latencies(iter(inputs), iter(outputs), max_latency=0)) == 0
+
+
+def test_join_on_header_stamp():
+    """Test that joining on a stamp pairs outputs with the input of the same stamp, within the buffer."""
+    inputs = [_stamped('/camera', stamp, stamp + 1_000) for stamp in range(0, 100_000, 10_000)]
+    # Outputs carry the stamp of the input they were computed from, some inputs are dropped
+    outputs = [_stamped('/detections', stamp, stamp + 5_000 + stamp // 10) for stamp in range(0, 100_000, 20_000)]
+    outputs.append(_stamped('/detections', 123, 200_000))
+
+    joined = list(join_messages(inputs, outputs, on='header.stamp'))
+
+    assert [pair.input_time - 1_000 for pair in joined] == list(range(0, 100_000, 20_000))
+    assert [pair.latency for pair in joined] == [4_000 + stamp // 10 for stamp in range(0, 100_000, 20_000)]
+    assert all(pair.input_msg.header.stamp == pair.output_msg.header.stamp for pair in joined)
+
+
+def test_join_on_header_stamp_buffers_late_outputs():
+    """Test that outputs arriving out of stamp order are matched while their input is still buffered."""
+    inputs = [_stamped('/camera', stamp, stamp) for stamp in range(0, 40, 10)]
+    outputs = [_stamped('/detections', 20, 100), _stamped('/detections', 10, 110)]
+
+    assert [pair.latency for pair in join_messages(inputs, outputs, on='header.stamp')] == [80, 100]
+    assert [pair.latency for pair in join_messages(inputs, outputs, on='header.stamp', max_buffer=1)] == [80]
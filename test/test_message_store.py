@@ -0,0 +1,145 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+from pathlib import Path
+
+import rosbag2_py
+
+from replay_testing import MessageStore, get_sequential_mcap_reader, read_messages, read_serialized_messages
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+CMD_VEL_2_MCAP = FIXTURES_DIR / 'cmd_vel_only_2.mcap'
+
+
+def _bag_messages():
+    reader = get_sequential_mcap_reader(CMD_VEL_2_MCAP)
+    messages = []
+    while reader.has_next():
+        topic_name, data, timestamp = reader.read_next()
+        messages.append((topic_name, bytes(data), timestamp))
+    return messages
+
+
+def test_message_store_readers_are_independent():
+    """Test that every reader of the store has its own cursor, regardless of what other readers consumed."""
+    store = MessageStore(CMD_VEL_2_MCAP)
+    first_reader = store.reader()
+    second_reader = store.reader()
+
+    first_messages = list(read_messages(first_reader, topics=['/vehicle/cmd_vel']))
+    assert first_messages
+    assert list(read_messages(second_reader, topics=['/vehicle/cmd_vel'])) == first_messages
+    # Like a SequentialReader, reading continues from the cursor until the reader seeks back
+    assert list(read_messages(first_reader, topics=['/vehicle/cmd_vel'])) == []
+    first_reader.seek(0)
+    assert list(read_messages(first_reader, topics=['/vehicle/cmd_vel'])) == first_messages
+
+    third_reader = store.reader()
+    serialized = []
+    while third_reader.has_next():
+        serialized.append(third_reader.read_next())
+    assert serialized == _bag_messages()
+    store.close()
+
+
+def test_message_store_reader_respects_cursor():
+    """Test that a store reader filters and reads from its cursor like a SequentialReader does."""
+    store = MessageStore(CMD_VEL_2_MCAP)
+    bag_messages = _bag_messages()
+    store_reader = store.reader()
+    bag_reader = get_sequential_mcap_reader(CMD_VEL_2_MCAP)
+
+    for reader in (store_reader, bag_reader):
+        reader.read_next()
+        reader.read_next()
+    topic = bag_messages[2][0]
+    store_rest = [(t, bytes(data), ts) for t, data, ts in read_serialized_messages(store_reader, [topic])]
+    bag_rest = [(t, bytes(data), ts) for t, data, ts in read_serialized_messages(bag_reader, [topic])]
+    assert store_rest == bag_rest
+    assert store_rest == [message for message in bag_messages[2:] if message[0] == topic]
+
+    store_reader.seek(bag_messages[-1][2])
+    assert [name for name, _, _ in read_messages(store_reader, [])] == [bag_messages[-1][0]]
+    assert store_reader.get_metadata() is not None
+    store.close()
+
+
+def test_message_store_reads_topics_loaded_separately(tmp_path):
+    """Test that a reader skips no message at a timestamp shared by topics the store loaded in separate passes."""
+    # Give every /vehicle/cmd_vel message the timestamp of the /scaled/cmd_vel message before it
+    writer = rosbag2_py.SequentialWriter()
+    writer.open(
+        rosbag2_py.StorageOptions(uri=str(tmp_path / 'bag'), storage_id='mcap'),
+        rosbag2_py.ConverterOptions(input_serialization_format='cdr', output_serialization_format='cdr'),
+    )
+    for topic_metadata in get_sequential_mcap_reader(CMD_VEL_2_MCAP).get_all_topics_and_types():
+        writer.create_topic(topic_metadata)
+    shared_timestamp = None
+    for topic_name, data, timestamp in _bag_messages():
+        if topic_name == '/scaled/cmd_vel':
+            shared_timestamp = timestamp
+        elif shared_timestamp is not None:
+            timestamp = shared_timestamp
+        writer.write(topic_name, data, timestamp)
+    del writer
+    mcap_path = next((tmp_path / 'bag').glob('*.mcap'))
+
+    bag_reader = get_sequential_mcap_reader(mcap_path)
+    bag_messages = []
+    while bag_reader.has_next():
+        topic_name, data, timestamp = bag_reader.read_next()
+        bag_messages.append((topic_name, bytes(data), timestamp))
+
+    store = MessageStore(mcap_path)
+    store.load(['/vehicle/cmd_vel'])
+    store.load(['/scaled/cmd_vel'])
+    store_reader = store.reader()
+    store_messages = []
+    while store_reader.has_next():
+        store_messages.append(store_reader.read_next())
+        # Changing the filter resumes reading after the last message read
+        store_reader.reset_filter()
+    assert sorted(store_messages) == sorted(bag_messages)
+    store.close()
+
+
+def test_message_store_spills_to_disk(tmp_path):
+    """Test that messages over the memory budget are spilled to disk and read back unchanged."""
+    store = MessageStore(CMD_VEL_2_MCAP, max_memory_bytes=0, spill_dir=tmp_path)
+
+    assert list(store.serialized_messages()) == _bag_messages()
+    assert store.memory_bytes == 0
+    assert store.spilled_bytes == sum(len(data) for _, data, _ in _bag_messages())
+    store.close()
+
+
+def test_message_store_bounds_decoded_messages():
+    """Test that deserialized messages are cached within the memory budget, evicting the least recently used."""
+    serialized_bytes = sum(len(data) for _, data, _ in _bag_messages())
+    first_size = len(_bag_messages()[0][1])
+    store = MessageStore(CMD_VEL_2_MCAP, max_memory_bytes=serialized_bytes + first_size)
+
+    first_messages = list(store.messages())
+    assert store.memory_bytes == serialized_bytes
+    assert store.memory_bytes + store.decoded_bytes <= store.max_memory_bytes
+    # Only the last message fits in the cache, earlier ones were evicted
+    _, last_msg, last_time = first_messages[-1]
+    assert next(store.messages(start_time=last_time))[1] is last_msg
+    _, first_msg, first_time = first_messages[0]
+    assert next(store.messages(end_time=first_time))[1] is not first_msg
+    assert list(store.messages()) == first_messages
+    assert store.memory_bytes + store.decoded_bytes <= store.max_memory_bytes
+    store.close()
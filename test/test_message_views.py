@@ -0,0 +1,117 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import struct
+
+import numpy as np
+
+from replay_testing import image_to_array, laserscan_to_arrays, pointcloud2_to_array
+
+
+class _CdrWriter:
+    def __init__(self):
+        self.body = b''
+
+    def align(self, size: int):
+        self.body += b'\x00' * (-len(self.body) % size)
+
+    def pack(self, fmt: str, *values):
+        self.align(struct.calcsize('<' + fmt.lstrip('0123456789')[0]))
+        self.body += struct.pack('<' + fmt, *values)
+
+    def string(self, value: str):
+        self.pack('I', len(value) + 1)
+        self.body += value.encode() + b'\x00'
+
+    def header(self):
+        self.pack('iI', 12, 34)
+        self.string('sensor')
+
+    def data(self) -> bytes:
+        return b'\x00\x01\x00\x00' + self.body
+
+
+def test_pointcloud2_to_array():
+    """Test that points are viewed with their field layout, skipping padding, without copying."""
+    points = np.zeros((2, 3), dtype=[('x', '<f4'), ('y', '<f4'), ('z', '<f4'), ('intensity', 'u1'), ('pad', 'V3')])
+    points['x'] = np.arange(6).reshape(2, 3)
+    points['intensity'] = np.arange(6).reshape(2, 3) * 10
+    rows = b''.join(row.tobytes() + b'\xff' * 8 for row in points)
+
+    writer = _CdrWriter()
+    writer.header()
+    writer.pack('II', 2, 3)
+    writer.pack('I', 2)
+    for name, offset, datatype in (('x', 0, 7), ('intensity', 12, 2)):
+        writer.string(name)
+        writer.pack('I', offset)
+        writer.pack('B', datatype)
+        writer.pack('I', 1)
+    writer.pack('?', False)
+    writer.pack('II', 16, 3 * 16 + 8)
+    writer.pack('I', len(rows))
+    writer.body += rows
+    writer.pack('?', True)
+    data = writer.data()
+
+    cloud = pointcloud2_to_array(data)
+
+    assert cloud.shape == (2, 3)
+    assert cloud.dtype.names == ('x', 'intensity')
+    assert cloud['x'].tolist() == points['x'].tolist()
+    assert cloud['intensity'].tolist() == points['intensity'].tolist()
+    assert np.shares_memory(cloud, np.frombuffer(data, dtype=np.uint8))
+
+
+def test_image_to_array():
+    """Test that image pixels are viewed with the channels of their encoding, skipping row padding."""
+    pixels = np.arange(2 * 2 * 3, dtype=np.uint8).reshape(2, 2, 3)
+    rows = b''.join(row.tobytes() + b'\xff\xff' for row in pixels)
+
+    writer = _CdrWriter()
+    writer.header()
+    writer.pack('II', 2, 2)
+    writer.string('rgb8')
+    writer.pack('B', 0)
+    writer.pack('I', 8)
+    writer.pack('I', len(rows))
+    writer.body += rows
+    data = writer.data()
+
+    image = image_to_array(data)
+
+    assert image.shape == (2, 2, 3)
+    assert image.tolist() == pixels.tolist()
+    assert np.shares_memory(image, np.frombuffer(data, dtype=np.uint8))
+
+
+def test_laserscan_to_arrays():
+    """Test that laser scan ranges and intensities are viewed as float32 arrays, with their angles."""
+    writer = _CdrWriter()
+    writer.header()
+    writer.pack('7f', -1.0, 1.0, 0.5, 0.0, 0.1, 0.1, 10.0)
+    writer.pack('I', 5)
+    writer.pack('5f', 1.0, 2.0, 3.0, 4.0, 5.0)
+    writer.pack('I', 0)
+    data = writer.data()
+
+    scan = laserscan_to_arrays(data)
+
+    assert scan.ranges.dtype == np.float32
+    assert scan.ranges.tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert scan.intensities.size == 0
+    assert np.allclose(scan.angles, [-1.0, -0.5, 0.0, 0.5, 1.0])
+    assert np.shares_memory(scan.ranges, np.frombuffer(data, dtype=np.uint8))
@@ -0,0 +1,97 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pathlib import Path
+
+import numpy as np
+
+from replay_testing import MessageStore, get_sequential_mcap_reader, read_columns, read_fixture_summary, read_messages
+from replay_testing.reader import _get_decode_executor
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+CMD_VEL_2_MCAP = FIXTURES_DIR / 'cmd_vel_only_2.mcap'
+
+
+def test_read_messages_only_returns_requested_topics():
+    """Test that read_messages pushes the topic filter down and still returns every requested message."""
+    summary = read_fixture_summary(CMD_VEL_2_MCAP)
+    reader = get_sequential_mcap_reader(CMD_VEL_2_MCAP)
+
+    msgs = list(read_messages(reader, topics=['/vehicle/cmd_vel']))
+
+    assert len(msgs) == summary.topics['/vehicle/cmd_vel'].message_count
+    assert all(topic_name == '/vehicle/cmd_vel' for topic_name, _, _ in msgs)
+
+
+def test_read_messages_time_range():
+    """Test that read_messages only returns messages between the start and end time, inclusive."""
+    all_msgs = list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=['/vehicle/cmd_vel']))
+    start_time = all_msgs[len(all_msgs) // 4][2]
+    end_time = all_msgs[len(all_msgs) // 2][2]
+    expected = [msg for msg in all_msgs if start_time <= msg[2] <= end_time]
+
+    reader = get_sequential_mcap_reader(CMD_VEL_2_MCAP)
+    msgs = list(read_messages(reader, topics=['/vehicle/cmd_vel'], start_time=start_time, end_time=end_time))
+    assert msgs == expected
+
+    store = MessageStore(CMD_VEL_2_MCAP)
+    assert list(read_messages(store.reader(), ['/vehicle/cmd_vel'], start_time=start_time, end_time=end_time)) == (
+        expected
+    )
+    store.close()
+
+
+def test_read_columns_matches_read_messages():
+    """Test that read_columns returns the same values as reading the messages one by one."""
+    msgs = list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=['/vehicle/cmd_vel']))
+
+    columns = read_columns(
+        get_sequential_mcap_reader(CMD_VEL_2_MCAP),
+        '/vehicle/cmd_vel',
+        fields=['header.stamp', 'twist.linear.x'],
+        batch_size=7,
+    )
+
+    assert columns['timestamp'].dtype == np.int64
+    assert columns['timestamp'].tolist() == [timestamp for _, _, timestamp in msgs]
+    assert columns['header.stamp'].tolist() == [
+        msg.header.stamp.sec * 1_000_000_000 + msg.header.stamp.nanosec for _, msg, _ in msgs
+    ]
+    assert columns['twist.linear.x'].tolist() == [msg.twist.linear.x for _, msg, _ in msgs]
+
+
+def test_read_messages_in_parallel_keeps_order():
+    """Test that deserializing in worker processes yields the same messages in the same order."""
+    topics = ['/vehicle/cmd_vel', '/scaled/cmd_vel']
+    expected = list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=topics))
+
+    msgs = list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=topics, workers=2, batch_size=7))
+
+    assert [(topic_name, timestamp) for topic_name, _, timestamp in msgs] == [
+        (topic_name, timestamp) for topic_name, _, timestamp in expected
+    ]
+    assert [msg.twist.linear.x for _, msg, _ in msgs] == [msg.twist.linear.x for _, msg, _ in expected]
+
+
+def test_read_messages_in_parallel_reuses_pool():
+    """Test that reads with the same number of workers share one process pool."""
+    topics = ['/vehicle/cmd_vel']
+    list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=topics, workers=2))
+    executor = _get_decode_executor(2)
+
+    msgs = list(read_messages(get_sequential_mcap_reader(CMD_VEL_2_MCAP), topics=topics, workers=2))
+
+    assert len(msgs) > 0
+    assert _get_decode_executor(2) is executor
@@ -0,0 +1,111 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+from replay_testing import ReadinessConditions, readiness
+from replay_testing.readiness import (
+    PLAYER_NODE_NAME,
+    RECORDER_NODE_NAME,
+    _GraphProbe,
+    pending_readiness_path,
+    read_time_to_ready,
+    readiness_path,
+)
+from replay_testing.replay_fixture import ReplayFixture
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+
+def test_time_to_ready_follows_run_fixture(tmp_path):
+    """Test that the time to ready written during a run is read back from next to the cleaned up run fixture."""
+    replay_fixture = ReplayFixture(tmp_path, 'fixture')
+    run_fixture = replay_fixture.generate_run_fixture('default')
+    run_dir = Path(run_fixture.path)
+    run_dir.mkdir(parents=True)
+    shutil.copyfile(FIXTURES_DIR / 'cmd_vel_only.mcap', run_dir / f'{run_dir.name}_0.mcap')
+    with pending_readiness_path(run_dir).open('w') as f:
+        json.dump({'time_to_ready': 0.25}, f)
+
+    replay_fixture.cleanup_run_fixtures()
+
+    assert readiness_path(run_fixture.path) == run_dir.parent / f'{run_dir.name}_0.readiness.json'
+    assert not pending_readiness_path(run_dir).exists()
+    assert read_time_to_ready(run_fixture.path) == 0.25
+    assert [Path(previous.path) for previous in ReplayFixture(tmp_path, 'fixture').run_fixtures] == [
+        Path(run_fixture.path)
+    ]
+
+
+def test_time_to_ready_of_ungated_run(tmp_path):
+    """Test that runs whose playback was not gated have no time to ready."""
+    assert read_time_to_ready(tmp_path / 'run_0.mcap') is None
+
+
+class _ReadyClient:
+    def service_is_ready(self):
+        return True
+
+
+class _GraphNode:
+    """Node of a readiness probe, with a ROS graph set by the test."""
+
+    def __init__(self):
+        self.publishers: dict[str, list[str]] = {}
+        self.subscribers: dict[str, list[str]] = {}
+
+    def create_client(self, srv_type, name):
+        return _ReadyClient()
+
+    def get_publishers_info_by_topic(self, topic):
+        return [SimpleNamespace(node_name=name) for name in self.publishers.get(topic, [])]
+
+    def get_subscriptions_info_by_topic(self, topic):
+        return [SimpleNamespace(node_name=name) for name in self.subscribers.get(topic, [])]
+
+    def get_node_names_and_namespaces(self):
+        return []
+
+
+def test_recorder_awaited_on_topics_discovered_late(monkeypatch):
+    """Test that the run is not ready before the recorder subscribed to topics whose publisher is discovered late."""
+
+    def get_message_type(type_name):
+        if type_name == 'missing_msgs/msg/Missing':
+            raise ModuleNotFoundError("No module named 'missing_msgs'")
+        return object
+
+    monkeypatch.setattr(readiness, 'get_message_type', get_message_type)
+    node = _GraphNode()
+    probe = _GraphProbe(
+        node,
+        ReadinessConditions(),
+        {'/a': 'geometry_msgs/msg/Twist', '/b': 'geometry_msgs/msg/Twist', '/missing': 'missing_msgs/msg/Missing'},
+    )
+
+    # The player's publisher of /b is not discovered yet
+    node.publishers['/a'] = [PLAYER_NODE_NAME]
+    node.subscribers['/a'] = [RECORDER_NODE_NAME]
+    assert probe.unmet() == ['recorder subscribed to /b']
+
+    node.publishers['/b'] = [PLAYER_NODE_NAME]
+    assert probe.unmet() == ['recorder subscribed to /b']
+
+    # The player never publishes /missing, whose message type is not installed
+    node.subscribers['/b'] = [RECORDER_NODE_NAME]
+    assert probe.unmet() == []
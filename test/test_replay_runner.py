@@ -16,21 +16,30 @@
 import json
 import types
 from pathlib import Path
+from xml.etree import ElementTree as ET
 
 import pytest
+import rosbag2_py
 from launch import LaunchDescription
-from launch.actions import ExecuteProcess
+from launch.actions import ExecuteProcess, OpaqueFunction
 
 from replay_testing import (
     LocalFixture,
+    ReadinessConditions,
     ReplayRunParams,
     ReplayTestingRunner,
+    RunnerArgs,
+    TimeWindow,
+    TopicRequirement,
     analyze,
     fixtures,
     get_sequential_mcap_reader,
     read_messages,
     run,
 )
+from replay_testing.decorators.analyze import declared_topics
+from replay_testing.ros_domain import DomainLeaseAllocator
+from replay_testing.run_stats import run_stats_path
 
 fixtures_dir = Path(__file__).parent / 'fixtures'
 
@@ -74,6 +83,24 @@ def test_fixtures():
     return
 
 
+def test_fixtures_keep_class_time_window():
+    window = TimeWindow(end=1)
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture)])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = []
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture)])
+    class FixturesWithWindow:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = []
+        time_window = window
+
+    assert getattr(Fixtures, 'time_window', None) is None
+    assert FixturesWithWindow.time_window is window
+
+
 def test_fixtures_raises_err():
     test_module = types.ModuleType('test_module')
 
@@ -89,6 +116,59 @@ def test_fixtures_raises_err():
         runner.filter_fixtures()
 
 
+def test_fixtures_raises_err_on_topic_requirements():
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture)])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        input_topic_requirements = {'/vehicle/cmd_vel': TopicRequirement(min_message_count=1_000_000)}
+        expected_output_topics = []
+
+    test_module.Fixtures = Fixtures
+    runner = ReplayTestingRunner(test_module)
+
+    with pytest.raises(AssertionError):
+        runner.filter_fixtures()
+
+
+def test_fixtures_in_parallel():
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture), LocalFixture(path=cmd_vel_only_2_fixture)])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = []
+
+    test_module.Fixtures = Fixtures
+    runner = ReplayTestingRunner(test_module, fixture_workers=2)
+    replay_fixtures = runner.filter_fixtures()
+
+    # Fixtures keep the order of the fixture list regardless of completion order
+    assert [replay_fixture.name for replay_fixture in replay_fixtures] == ['cmd_vel_only', 'cmd_vel_only_2']
+    for replay_fixture in replay_fixtures:
+        assert replay_fixture.filtered_fixture.path.exists()
+
+
+def test_fixtures_in_parallel_raises_first_failure():
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([
+        LocalFixture(path=cmd_vel_only_fixture),
+        LocalFixture(path=fixtures_dir / 'does_not_exist.mcap'),
+    ])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel', '/does_not_exist']
+        expected_output_topics = []
+
+    test_module.Fixtures = Fixtures
+    runner = ReplayTestingRunner(test_module, fixture_workers=2)
+
+    # Both fixtures fail; the error of the first one in the fixture list is raised
+    with pytest.raises(AssertionError):
+        runner.filter_fixtures()
+
+
 def test_run():
     test_module = types.ModuleType('test_module')
 
@@ -162,6 +242,10 @@ def test_analyze():
             assert len(msgs) >= 1
             assert msgs[0][0] == '/user/cmd_vel'
 
+        def test_reader_is_sequential_reader(self):
+            assert isinstance(self.reader, rosbag2_py.SequentialReader)
+            assert self.reader.get_metadata().message_count >= 1
+
     test_module.Fixtures = Fixtures
     test_module.Run = Run
     test_module.Analyze = Analyze
@@ -175,6 +259,78 @@ def test_analyze():
     return
 
 
+def test_analyze_declared_topics():
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture)])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = ['/user/cmd_vel']
+
+    @run.default()
+    class Run:
+        def generate_launch_description(self) -> LaunchDescription:
+            return LaunchDescription([
+                ExecuteProcess(
+                    cmd=pub_cmd_vel,
+                    name='topic_pub',
+                    output='screen',
+                )
+            ])
+
+    @analyze
+    @analyze.topics('/user/cmd_vel')
+    class Analyze:
+        # Not a topic declaration, left to the test
+        topics = {'cmd_vel': '/user/cmd_vel'}
+
+        def test_cmd_vel(self):
+            msgs = list(self.messages())
+            assert len(msgs) >= 1
+            assert all(topic_name == self.topics['cmd_vel'] for topic_name, _, _ in msgs)
+
+        @analyze.topics('/vehicle/cmd_vel')
+        def test_vehicle_cmd_vel(self):
+            msgs = list(self.messages())
+            assert len(msgs) >= 1
+            assert all(topic_name == '/vehicle/cmd_vel' for topic_name, _, _ in msgs)
+
+    assert declared_topics(Analyze) == ['/user/cmd_vel', '/vehicle/cmd_vel']
+
+    test_module.Fixtures = Fixtures
+    test_module.Run = Run
+    test_module.Analyze = Analyze
+    runner = ReplayTestingRunner(test_module)
+
+    runner.filter_fixtures()
+    runner.run()
+    exit_code, _ = runner.analyze()
+    assert exit_code == 0
+
+    return
+
+
+def test_analyze_topics_must_be_strings():
+    with pytest.raises(TypeError):
+
+        @analyze
+        @analyze.topics(['/user/cmd_vel'])
+        class Analyze:
+            def test_cmd_vel(self):
+                pass
+
+
+def test_analyze_ignores_topics_attribute():
+    @analyze
+    class Analyze:
+        topics = '/user/cmd_vel'
+
+        def test_cmd_vel(self):
+            pass
+
+    assert declared_topics(Analyze) == []
+
+
 def test_failed_analyze():
     test_module = types.ModuleType('test_module')
 
@@ -264,6 +420,99 @@ def test_multiple_fixtures():
     return
 
 
+def test_multiple_fixtures_pipelined():
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([
+        LocalFixture(path=cmd_vel_only_fixture),
+        LocalFixture(path=cmd_vel_only_2_fixture),
+    ])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = ['/user/cmd_vel']
+
+    @run.default()
+    class Run:
+        def generate_launch_description(self) -> LaunchDescription:
+            return LaunchDescription([
+                ExecuteProcess(
+                    cmd=pub_cmd_vel,
+                    name='topic_pub',
+                    output='screen',
+                )
+            ])
+
+    @analyze
+    class Analyze:
+        def test_cmd_vel(self):
+            msgs = list(read_messages(self.reader, topics=['/user/cmd_vel']))
+            assert len(msgs) >= 1
+
+        def test_first_fixture_only(self):
+            assert 'cmd_vel_only_2' not in str(self.run_fixture.path)
+
+    test_module.Fixtures = Fixtures
+    test_module.Run = Run
+    test_module.Analyze = Analyze
+    runner = ReplayTestingRunner(test_module)
+
+    exit_code, junit_xml_path = runner.run_pipelined()
+    assert exit_code == 1
+
+    # Same report as running the stages one after another
+    suites = ET.parse(junit_xml_path).getroot().findall('testsuite')
+    assert [suite.get('failures') for suite in suites] == ['0', '1']
+    assert [Path(suite.find('properties/property').get('value')).parent.parent.name for suite in suites] == [
+        'cmd_vel_only',
+        'cmd_vel_only_2',
+    ]
+
+    return
+
+
+def test_pipelined_reports_fixtures_run_before_failed_fixture(tmp_path):
+    """Test that fixtures run before one that fails to prepare are still analyzed and reported."""
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([
+        LocalFixture(path=cmd_vel_only_fixture),
+        LocalFixture(path=tmp_path / 'missing.mcap'),
+    ])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = ['/user/cmd_vel']
+
+    @run.default()
+    class Run:
+        def generate_launch_description(self) -> LaunchDescription:
+            return LaunchDescription([
+                ExecuteProcess(
+                    cmd=pub_cmd_vel,
+                    name='topic_pub',
+                    output='screen',
+                )
+            ])
+
+    @analyze
+    class Analyze:
+        def test_cmd_vel(self):
+            msgs = list(read_messages(self.reader, topics=['/user/cmd_vel']))
+            assert len(msgs) >= 1
+
+    test_module.Fixtures = Fixtures
+    test_module.Run = Run
+    test_module.Analyze = Analyze
+    runner = ReplayTestingRunner(test_module)
+
+    with pytest.raises(RuntimeError, match='Failed to download input fixture'):
+        runner.run_pipelined()
+
+    suites = ET.parse(runner._replay_results_directory / 'results.xml').getroot().findall('testsuite')
+    assert [Path(suite.find('properties/property').get('value')).parent.parent.name for suite in suites] == [
+        'cmd_vel_only'
+    ]
+
+
 def test_against_duplicate_fixture_keys():
     """Test that duplicate fixture keys raise an error."""
     test_module = types.ModuleType('test_module')
@@ -349,6 +598,284 @@ def test_parametric_sweep():
     return
 
 
+def test_parametric_sweep_in_parallel():
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture)])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = ['/user/cmd_vel']
+
+    @run.parameterize([
+        ReplayRunParams(name='run_1_twist_slow', params={'x': 1.0}),
+        ReplayRunParams(name='run_2_twist_fast', params={'x': 10.0}),
+    ])
+    class Run:
+        def generate_launch_description(self, replay_run_params: ReplayRunParams) -> LaunchDescription:
+            twist_msg = {
+                'linear': {'x': replay_run_params.params['x']},
+                'angular': {'z': 0.5},
+            }
+            return LaunchDescription([
+                ExecuteProcess(
+                    cmd=[
+                        'ros2',
+                        'topic',
+                        'pub',
+                        '--use-sim-time',
+                        '-r',
+                        '10',
+                        '/user/cmd_vel',
+                        'geometry_msgs/msg/Twist',
+                        json.dumps(twist_msg),
+                    ],
+                    name='topic_pub',
+                    output='screen',
+                )
+            ])
+
+    @analyze
+    class Analyze:
+        def test_cmd_vel_is_isolated(self):
+            msgs = list(read_messages(self.reader, topics=['/user/cmd_vel']))
+            assert len(msgs) >= 1
+            # Runs in separate ROS domains never record each other's messages
+            assert len({msg.linear.x for _, msg, _ in msgs}) == 1
+
+    test_module.Fixtures = Fixtures
+    test_module.Run = Run
+    test_module.Analyze = Analyze
+    runner = ReplayTestingRunner(test_module, run_workers=2)
+
+    runner.filter_fixtures()
+    replay_fixtures = runner.run()
+    exit_code, _ = runner.analyze()
+    assert exit_code == 0
+
+    assert len(replay_fixtures[0].run_fixtures) == 2
+    logs_dir = Path(replay_fixtures[0].run_fixtures[0].path).parent / 'logs'
+    assert len(list(logs_dir.iterdir())) == 2
+    assert all((log_dir / 'launch.log').exists() for log_dir in logs_dir.iterdir())
+    return
+
+
+def _failing_sweep_module():
+    """Test module with a sweep of two runs, the second of which fails to launch."""
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture)])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = ['/user/cmd_vel']
+
+    def fail(context):
+        raise RuntimeError('Launch failed')
+
+    @run.parameterize([
+        ReplayRunParams(name='run_1_ok', params={}),
+        ReplayRunParams(name='run_2_failing', params={}),
+    ])
+    class Run:
+        def generate_launch_description(self, replay_run_params: ReplayRunParams) -> LaunchDescription:
+            if replay_run_params.name == 'run_2_failing':
+                return LaunchDescription([OpaqueFunction(function=fail)])
+            return LaunchDescription([
+                ExecuteProcess(
+                    cmd=pub_cmd_vel,
+                    name='topic_pub',
+                    output='screen',
+                )
+            ])
+
+    test_module.Fixtures = Fixtures
+    test_module.Run = Run
+    return test_module
+
+
+def _assert_only_ok_run_finished(runner: ReplayTestingRunner):
+    ok_run, failing_run = runner._replay_fixtures[0].run_fixtures
+    # The run that succeeded is moved out of its run directory and has its statistics written
+    assert ok_run.path.is_file()
+    assert run_stats_path(ok_run.path).exists()
+    assert failing_run.path.is_dir()
+
+
+def test_parametric_sweep_in_parallel_raises_failed_run():
+    runner = ReplayTestingRunner(_failing_sweep_module(), run_workers=2)
+
+    runner.filter_fixtures()
+    with pytest.raises(RuntimeError, match='1 runs failed'):
+        runner.run()
+    _assert_only_ok_run_finished(runner)
+
+
+def test_parametric_sweep_in_sequence_raises_failed_run():
+    runner = ReplayTestingRunner(_failing_sweep_module())
+
+    runner.filter_fixtures()
+    with pytest.raises(RuntimeError, match='1 runs failed'):
+        runner.run()
+    _assert_only_ok_run_finished(runner)
+
+
+def test_sequential_runs_lease_domain_when_isolated(monkeypatch):
+    """Test that runs launched one after another only lease a ROS domain when asked to, and close their helpers in it."""
+    for isolate_domain in (False, True):
+        runner = ReplayTestingRunner(_failing_sweep_module(), isolate_domain=isolate_domain)
+        leases = []
+        domains_free_on_close = []
+
+        def run_fixtures(run, replay_fixtures, lease):
+            leases.append(lease)
+
+        def close():
+            # Another runner must not get the domain while the bag helpers still run in it
+            lease = leases[0]
+            if lease is not None:
+                allocator = DomainLeaseAllocator(
+                    runner._domain_allocator.lease_dir, min_domain_id=lease.domain_id, max_domain_id=lease.domain_id
+                )
+                domains_free_on_close.append(allocator.try_acquire())
+
+        monkeypatch.setattr(runner, '_run_fixtures', run_fixtures)
+        monkeypatch.setattr(runner._bag_workers, 'close', close)
+        runner.run()
+
+        if isolate_domain:
+            assert leases[0] is not None
+            assert domains_free_on_close == [None]
+        else:
+            assert leases == [None]
+
+
+def test_parametric_sweep_in_process():
+    test_module = types.ModuleType('test_module')
+    runner_args = RunnerArgs(bag_backend='rosbag2_py', read_ahead_queue_size=100)
+    ready_runs = []
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture)])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = ['/user/cmd_vel']
+
+    @run.parameterize([
+        ReplayRunParams(name='run_1_in_process', runner_args=runner_args),
+        ReplayRunParams(name='run_2_in_process', runner_args=runner_args),
+    ])
+    class Run:
+        def before_playback(self, replay_run_params: ReplayRunParams):
+            ready_runs.append(replay_run_params.name)
+
+        def generate_launch_description(self, replay_run_params: ReplayRunParams) -> LaunchDescription:
+            return LaunchDescription([ExecuteProcess(cmd=pub_cmd_vel, name='topic_pub', output='screen')])
+
+    @analyze
+    class Analyze:
+        def test_cmd_vel(self):
+            assert len(list(read_messages(self.reader, topics=['/user/cmd_vel']))) >= 1
+
+        def test_input_recorded(self):
+            assert len(list(read_messages(self.reader, topics=['/vehicle/cmd_vel']))) >= 1
+
+    test_module.Fixtures = Fixtures
+    test_module.Run = Run
+    test_module.Analyze = Analyze
+    runner = ReplayTestingRunner(test_module)
+
+    runner.filter_fixtures()
+    replay_fixtures = runner.run()
+    exit_code, _ = runner.analyze()
+    assert exit_code == 0
+
+    assert ready_runs == ['run_1_in_process', 'run_2_in_process']
+    assert len(replay_fixtures[0].run_fixtures) == 2
+
+
+def test_readiness_gated_playback():
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture)])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = ['/user/cmd_vel']
+
+    @run.default(
+        params=ReplayRunParams(
+            name='default', readiness=ReadinessConditions(subscribed_topics=['/vehicle/cmd_vel'], timeout=30.0)
+        )
+    )
+    class Run:
+        def generate_launch_description(self) -> LaunchDescription:
+            return LaunchDescription([
+                ExecuteProcess(
+                    cmd=['ros2', 'topic', 'echo', '/vehicle/cmd_vel', 'geometry_msgs/msg/Twist'],
+                    name='topic_echo',
+                    output='screen',
+                )
+            ])
+
+    @analyze
+    class Analyze:
+        def test_first_input_recorded(self):
+            filtered = list(read_messages(self.filtered_reader, topics=['/vehicle/cmd_vel']))
+            recorded = list(read_messages(self.reader, topics=['/vehicle/cmd_vel']))
+            assert len(recorded) == len(filtered)
+
+        def test_time_to_ready(self):
+            assert 0 < self.time_to_ready < 30.0
+
+    test_module.Fixtures = Fixtures
+    test_module.Run = Run
+    test_module.Analyze = Analyze
+    runner = ReplayTestingRunner(test_module)
+
+    runner.filter_fixtures()
+    runner.run()
+    exit_code, junit_xml_path = runner.analyze()
+    assert exit_code == 0
+
+    properties = {prop.get('name') for prop in ET.parse(junit_xml_path).getroot().iter('property')}
+    assert 'readiness.time_to_ready' in properties
+
+
+def test_playback_not_gated_by_default():
+    test_module = types.ModuleType('test_module')
+
+    @fixtures.parameterize([LocalFixture(path=cmd_vel_only_fixture)])
+    class Fixtures:
+        required_input_topics = ['/vehicle/cmd_vel']
+        expected_output_topics = ['/user/cmd_vel']
+
+    @run.default()
+    class Run:
+        def generate_launch_description(self) -> LaunchDescription:
+            return LaunchDescription([])
+
+    @analyze
+    class Analyze:
+        def test_time_to_ready(self):
+            assert self.time_to_ready is None
+
+    test_module.Fixtures = Fixtures
+    test_module.Run = Run
+    test_module.Analyze = Analyze
+    runner = ReplayTestingRunner(test_module)
+
+    replay_fixture = runner.filter_fixtures()[0]
+    params = Run.parameters[0]
+    assert params.readiness is None
+    # Without readiness actions the player is not started paused
+    filtered_fixture = replay_fixture.filtered_fixture
+    assert runner._create_readiness_actions(filtered_fixture, filtered_fixture, Run(), params) == []
+
+    runner.run()
+    exit_code, junit_xml_path = runner.analyze()
+    assert exit_code == 0
+
+    properties = {prop.get('name') for prop in ET.parse(junit_xml_path).getroot().iter('property')}
+    assert 'readiness.time_to_ready' not in properties
+
+
 def test_only_analyze():
     test_module = types.ModuleType('test_module')
 
@@ -0,0 +1,65 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import multiprocessing
+import os
+
+import pytest
+
+from replay_testing.ros_domain import MAX_DOMAIN_ID, DomainLeaseAllocator, isolated_environment
+
+
+def test_isolated_environment(monkeypatch, tmp_path):
+    """Test that runs are confined to their domain on this host, using the discovery setting of the distro."""
+    monkeypatch.setenv('ROS_DISTRO', 'humble')
+    assert isolated_environment(3) == {'ROS_DOMAIN_ID': '3', 'ROS_LOCALHOST_ONLY': '1'}
+
+    monkeypatch.setenv('ROS_DISTRO', 'jazzy')
+    assert isolated_environment(4, tmp_path) == {
+        'ROS_DOMAIN_ID': '4',
+        'ROS_AUTOMATIC_DISCOVERY_RANGE': 'LOCALHOST',
+        'ROS_LOG_DIR': str(tmp_path),
+    }
+
+    with pytest.raises(ValueError):
+        isolated_environment(MAX_DOMAIN_ID + 1)
+
+
+def test_domain_leases_are_exclusive(tmp_path):
+    """Test that a leased domain is not handed out again until it is released, even by another allocator."""
+    allocator = DomainLeaseAllocator(tmp_path, min_domain_id=1, max_domain_id=2)
+    first = allocator.acquire()
+    second = DomainLeaseAllocator(tmp_path, min_domain_id=1, max_domain_id=2).acquire(timeout=0)
+    assert {first.domain_id, second.domain_id} == {1, 2}
+    assert allocator.try_acquire() is None
+    with pytest.raises(TimeoutError):
+        allocator.acquire(timeout=0)
+
+    first.release()
+    with allocator.acquire(timeout=0) as third:
+        assert third.domain_id == first.domain_id
+    second.release()
+
+
+def test_domain_leases_of_crashed_processes_are_reclaimed(tmp_path):
+    """Test that the lease of a process that exits without releasing it can be acquired again."""
+    allocator = DomainLeaseAllocator(tmp_path, min_domain_id=5, max_domain_id=5)
+    process = multiprocessing.get_context('fork').Process(target=lambda: (allocator.acquire(), os._exit(1)))
+    process.start()
+    process.join()
+    assert process.exitcode == 1
+
+    lease = allocator.acquire(timeout=0)
+    assert lease.domain_id == 5
+    lease.release()
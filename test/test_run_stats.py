@@ -0,0 +1,101 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import io
+import shutil
+import struct
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from replay_testing import get_sequential_mcap_reader, read_run_stats
+from replay_testing.mcap_io import MCAP_MAGIC, Header, McapError, Opcode, record, serialize_header
+from replay_testing.replay_fixture import ReplayFixture
+from replay_testing.run_stats import _accumulate_from_scan, compute_run_stats, run_stats_path, run_stats_properties
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+CMD_VEL_2_MCAP = FIXTURES_DIR / 'cmd_vel_only_2.mcap'
+
+
+def test_run_stats_match_messages():
+    """Test that the statistics match the counts, sizes and timestamps of the messages in the bag."""
+    reader = get_sequential_mcap_reader(CMD_VEL_2_MCAP)
+    timestamps: dict[str, list[int]] = {}
+    sizes: dict[str, int] = {}
+    while reader.has_next():
+        topic_name, data, timestamp = reader.read_next()
+        timestamps.setdefault(topic_name, []).append(timestamp)
+        sizes[topic_name] = sizes.get(topic_name, 0) + len(data)
+
+    stats = compute_run_stats(CMD_VEL_2_MCAP)
+
+    assert set(stats.topics) == set(timestamps)
+    for topic_name, topic_timestamps in timestamps.items():
+        topic_stats = stats.topics[topic_name]
+        intervals = np.diff(sorted(topic_timestamps))
+        assert topic_stats.message_count == len(topic_timestamps)
+        assert topic_stats.bytes == sizes[topic_name]
+        assert topic_stats.first_time == min(topic_timestamps)
+        assert topic_stats.last_time == max(topic_timestamps)
+        assert topic_stats.rate_hz == (len(topic_timestamps) - 1) * 1e9 / (
+            topic_stats.last_time - topic_stats.first_time
+        )
+        assert topic_stats.rate_p5_hz <= topic_stats.rate_p50_hz <= topic_stats.rate_p95_hz
+        assert topic_stats.max_interval_ns == intervals.max()
+        assert topic_stats.jitter_ns == np.std(intervals)
+    assert stats.message_count == sum(len(topic_timestamps) for topic_timestamps in timestamps.values())
+    assert stats.bytes == sum(sizes.values())
+
+    properties = dict(run_stats_properties(stats))
+    assert properties['stats./vehicle/cmd_vel.message_count'] == str(len(timestamps['/vehicle/cmd_vel']))
+
+
+def test_read_run_stats_uses_sidecar(tmp_path):
+    """Test that the sidecar is written once, read back unchanged and rewritten when the MCAP changes."""
+    mcap_path = tmp_path / 'run_0.mcap'
+    shutil.copyfile(CMD_VEL_2_MCAP, mcap_path)
+
+    stats = read_run_stats(mcap_path)
+    sidecar_path = run_stats_path(mcap_path)
+    assert sidecar_path == tmp_path / 'run_0.stats.json'
+    mtime_ns = sidecar_path.stat().st_mtime_ns
+    assert read_run_stats(mcap_path) == stats
+    assert sidecar_path.stat().st_mtime_ns == mtime_ns
+
+    shutil.copyfile(FIXTURES_DIR / 'cmd_vel_only.mcap', mcap_path)
+    assert read_run_stats(mcap_path) == compute_run_stats(mcap_path)
+
+
+def test_previous_run_fixtures_skip_sidecars(tmp_path):
+    """Test that statistics sidecars next to previous run fixtures are not picked up as run fixtures."""
+    runs_dir = tmp_path / 'fixture' / 'runs'
+    runs_dir.mkdir(parents=True)
+    mcap_path = runs_dir / 'run_0.mcap'
+    shutil.copyfile(CMD_VEL_2_MCAP, mcap_path)
+    read_run_stats(mcap_path)
+
+    replay_fixture = ReplayFixture(tmp_path, 'fixture')
+    assert [Path(run_fixture.path) for run_fixture in replay_fixture.run_fixtures] == [mcap_path]
+
+
+def test_scan_rejects_message_on_undeclared_channel():
+    """Test that scanning a message whose channel was never declared fails as an invalid MCAP file."""
+    message = struct.pack('<HIQQ', 7, 0, 1, 1) + b'data'
+    stream = io.BytesIO(
+        MCAP_MAGIC + record(Opcode.HEADER, serialize_header(Header('ros2', 'test'))) + record(Opcode.MESSAGE, message)
+    )
+
+    with pytest.raises(McapError, match='undeclared channel 7'):
+        _accumulate_from_scan(stream)
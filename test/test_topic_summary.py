@@ -0,0 +1,88 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import io
+import struct
+from pathlib import Path
+
+import pytest
+
+from replay_testing import TopicRequirement, get_sequential_mcap_reader, read_fixture_summary
+from replay_testing.mcap_io import MCAP_MAGIC, Header, McapError, Opcode, record, serialize_header
+from replay_testing.topic_summary import _summary_from_scan, check_topic_requirements
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+CMD_VEL_2_MCAP = FIXTURES_DIR / 'cmd_vel_only_2.mcap'
+
+
+def test_summary_matches_messages():
+    """Test that the summary has the same counts and time ranges as reading every message."""
+    reader = get_sequential_mcap_reader(CMD_VEL_2_MCAP)
+    topic_types = {topic.name: topic.type for topic in reader.get_all_topics_and_types()}
+    timestamps: dict[str, list[int]] = {}
+    while reader.has_next():
+        topic_name, _, timestamp = reader.read_next()
+        timestamps.setdefault(topic_name, []).append(timestamp)
+
+    summary = read_fixture_summary(CMD_VEL_2_MCAP)
+
+    assert set(summary.topics) == set(timestamps)
+    for topic_name, topic_timestamps in timestamps.items():
+        topic_summary = summary.topics[topic_name]
+        assert topic_summary.type == topic_types[topic_name]
+        assert topic_summary.message_count == len(topic_timestamps)
+        assert topic_summary.start_time == min(topic_timestamps)
+        assert topic_summary.end_time == max(topic_timestamps)
+    assert summary.message_count == sum(len(topic_timestamps) for topic_timestamps in timestamps.values())
+
+
+def test_check_topic_requirements():
+    """Test that unmet topic requirements are all reported."""
+    summary = read_fixture_summary(CMD_VEL_2_MCAP)
+    vehicle_cmd_vel = summary.topics['/vehicle/cmd_vel']
+
+    assert check_topic_requirements(summary, ['/vehicle/cmd_vel'], {}) == []
+    assert (
+        check_topic_requirements(
+            summary,
+            ['/vehicle/cmd_vel'],
+            {'/vehicle/cmd_vel': TopicRequirement(min_message_count=vehicle_cmd_vel.message_count)},
+        )
+        == []
+    )
+
+    errors = check_topic_requirements(
+        summary,
+        ['/vehicle/cmd_vel', '/does_not_exist'],
+        {
+            '/vehicle/cmd_vel': TopicRequirement(
+                min_message_count=vehicle_cmd_vel.message_count + 1,
+                min_duration=vehicle_cmd_vel.duration + 1.0,
+            )
+        },
+    )
+    assert len(errors) == 3
+    assert '/does_not_exist' in errors[0]
+
+
+def test_scan_rejects_message_on_undeclared_channel():
+    """Test that scanning a message whose channel was never declared fails as an invalid MCAP file."""
+    message = struct.pack('<HIQQ', 7, 0, 1, 1) + b'data'
+    stream = io.BytesIO(
+        MCAP_MAGIC + record(Opcode.HEADER, serialize_header(Header('ros2', 'test'))) + record(Opcode.MESSAGE, message)
+    )
+
+    with pytest.raises(McapError, match='undeclared channel 7'):
+        _summary_from_scan(stream)
@@ -0,0 +1,133 @@
+# Copyright (c) 2025-present Polymath Robotics, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from replay_testing.fixtures import LocalFixture
+from replay_testing.utils import make_read_only, materialize
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+CMD_VEL_MCAP = FIXTURES_DIR / 'cmd_vel_only.mcap'
+
+
+def unsupported(*args, **kwargs):
+    raise OSError('unsupported')
+
+
+def test_materialize_keeps_source_permissions(tmp_path):
+    """Test that a materialized fixture has the source content, and that the source stays writable."""
+    source = tmp_path / 'source.mcap'
+    source.write_bytes(CMD_VEL_MCAP.read_bytes())
+    source_mode = source.stat().st_mode
+    destination = tmp_path / 'destination.mcap'
+    destination.write_bytes(b'stale')
+
+    method = materialize(source, destination)
+    assert method in ('reflink', 'hardlink', 'symlink', 'copy')
+    assert destination.read_bytes() == CMD_VEL_MCAP.read_bytes()
+    assert source.stat().st_mode == source_mode
+    if method in ('reflink', 'copy'):
+        assert not destination.stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+
+
+def test_copied_fixture_is_read_only(tmp_path, monkeypatch):
+    """Test that a fixture materialized as an independent copy cannot be written to."""
+    monkeypatch.setattr('replay_testing.utils._reflink', unsupported)
+    monkeypatch.setattr(os, 'link', unsupported)
+    monkeypatch.setattr(Path, 'symlink_to', unsupported)
+
+    source = tmp_path / 'source.mcap'
+    source.write_bytes(CMD_VEL_MCAP.read_bytes())
+    destination = tmp_path / 'destination.mcap'
+
+    assert materialize(source, destination) == 'copy'
+    assert not destination.stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    assert source.stat().st_mode & stat.S_IWUSR
+
+
+def test_local_fixture_download_leaves_source_unchanged(tmp_path):
+    """Test that downloading a local fixture does not change the user's file."""
+    source = tmp_path / 'fixture.mcap'
+    source.write_bytes(CMD_VEL_MCAP.read_bytes())
+    source_stat = source.stat()
+    destination_dir = tmp_path / 'results'
+    destination_dir.mkdir()
+
+    mcap = LocalFixture(path=source).download(destination_dir)
+
+    assert Path(mcap.path).read_bytes() == CMD_VEL_MCAP.read_bytes()
+    assert source.stat().st_mode == source_stat.st_mode
+    assert source.read_bytes() == CMD_VEL_MCAP.read_bytes()
+
+
+def test_materialize_falls_back_to_copy(tmp_path, monkeypatch):
+    """Test that the fixture is copied when the filesystem supports neither clones nor links."""
+    monkeypatch.setattr('replay_testing.utils._reflink', unsupported)
+    monkeypatch.setattr(os, 'link', unsupported)
+    monkeypatch.setattr(Path, 'symlink_to', unsupported)
+
+    source = tmp_path / 'source.mcap'
+    source.write_bytes(CMD_VEL_MCAP.read_bytes())
+    destination = tmp_path / 'destination.mcap'
+
+    assert materialize(source, destination, read_only=False) == 'copy'
+    assert destination.read_bytes() == source.read_bytes()
+    assert not destination.is_symlink()
+    assert source.stat().st_ino != destination.stat().st_ino
+
+
+def test_hardlinked_cache_entry_is_read_only(tmp_path, monkeypatch):
+    """Test that a fixture hardlinked to a cache entry cannot be opened for writing, so it cannot corrupt the cache."""
+    monkeypatch.setattr('replay_testing.utils._reflink', unsupported)
+
+    cache_entry = tmp_path / 'cache.mcap'
+    cache_entry.write_bytes(CMD_VEL_MCAP.read_bytes())
+    destination = tmp_path / 'destination.mcap'
+
+    assert materialize(cache_entry, destination, owns_source=True) == 'hardlink'
+    assert destination.stat().st_ino == cache_entry.stat().st_ino
+    assert not destination.stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    if os.geteuid() != 0:
+        # Root may write to read-only files
+        with pytest.raises(PermissionError):
+            destination.open('r+b')
+
+
+def test_cache_entry_copied_when_it_cannot_be_made_read_only(tmp_path, monkeypatch):
+    """Test that a cache entry whose permissions cannot be changed is copied rather than linked."""
+    monkeypatch.setattr('replay_testing.utils._reflink', unsupported)
+    monkeypatch.setattr('replay_testing.utils.make_read_only', lambda path: False)
+
+    cache_entry = tmp_path / 'cache.mcap'
+    cache_entry.write_bytes(CMD_VEL_MCAP.read_bytes())
+    destination = tmp_path / 'destination.mcap'
+
+    assert materialize(cache_entry, destination, owns_source=True) == 'copy'
+    assert destination.stat().st_ino != cache_entry.stat().st_ino
+    assert destination.read_bytes() == CMD_VEL_MCAP.read_bytes()
+
+
+def test_make_read_only(tmp_path):
+    path = tmp_path / 'file'
+    path.write_bytes(b'data')
+
+    assert make_read_only(path)
+    assert not path.stat().st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    assert not make_read_only(tmp_path / 'missing')